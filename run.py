@@ -2,8 +2,13 @@
 """
 Script de entrada para o sistema PAMC-ADM.
 """
+import multiprocessing
+
 from src.main import main
 
 if __name__ == "__main__":
+    # Necessário para o modo de extração por processos no executável empacotado
+    multiprocessing.freeze_support()
+    
     # Executar o programa principal
     main()
\ No newline at end of file
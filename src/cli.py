@@ -0,0 +1,200 @@
+"""
+Linha de comando para execuções sem interface (agendadas pelo cron ou pelo
+Agendador de Tarefas do Windows).
+
+Não importa o Tkinter nem o atualizador: o caminho do Excel é informado na
+chamada, o progresso sai no stdout como uma linha JSON por evento e o log vai
+para o stderr (e para o arquivo JSON de src.utils.logger).
+
+Uso:
+    python -m src.cli --units PAMC,CPBV --out saida/ --format xlsx,parquet --test-limit 5
+
+Códigos de saída:
+    0 execução concluída
+    1 erro durante a execução
+    2 argumentos inválidos
+    3 sessão do Canaimé expirada (a execução pode ser retomada com --resume)
+    4 execução interrompida (SIGINT/SIGTERM ou gravação do Excel sem sucesso)
+"""
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+
+from src.utils import config
+from src.utils.logger import configurar
+from src.main import iniciar_extracao, CONCLUIDA, INTERROMPIDA, SESSAO_EXPIRADA, ERRO
+
+SAIDA_CONCLUIDA = 0
+SAIDA_ERRO = 1
+SAIDA_ARGUMENTOS = 2  # usado pelo argparse (parser.error)
+SAIDA_SESSAO_EXPIRADA = 3
+SAIDA_INTERROMPIDA = 4
+
+CODIGOS_SAIDA = {
+    CONCLUIDA: SAIDA_CONCLUIDA,
+    INTERROMPIDA: SAIDA_INTERROMPIDA,
+    SESSAO_EXPIRADA: SAIDA_SESSAO_EXPIRADA,
+}
+
+# O Excel é sempre gravado; os demais formatos são os de config.FORMATOS_EXPORTACAO
+FORMATOS = ['xlsx', *config.FORMATOS_EXPORTACAO]
+
+class InterfaceJSON:
+    """Interface da linha de comando: cada atualização de progresso vira uma linha JSON no stdout."""
+    
+    def __init__(self, saida=None):
+        """
+        Args:
+            saida: Stream dos eventos. Se None, usa o sys.stdout
+        """
+        self.saida = saida or sys.stdout
+        self.cancelado = threading.Event()
+        self.percentual = 0
+        self._trava = threading.Lock()
+    
+    def emitir(self, evento, **campos):
+        """Escreve um evento como uma linha JSON."""
+        linha = json.dumps({'evento': evento, 'ts': datetime.now().isoformat(timespec='seconds'), **campos},
+                           ensure_ascii=False, default=str)
+        with self._trava:
+            self.saida.write(linha + '\n')
+            self.saida.flush()
+    
+    def atualizar_progresso(self, mensagem, percentual=None):
+        # Sem percentual, mantém o último (como a barra da interface)
+        if percentual is not None:
+            self.percentual = round(percentual, 1)
+        self.emitir('progresso', mensagem=mensagem, percentual=self.percentual)
+    
+    def verificar_cancelamento(self):
+        return self.cancelado.is_set()
+
+def lista_separada(valor):
+    """Converte 'A,B, C' em ['A', 'B', 'C'] (tipo do argparse)."""
+    return [item.strip() for item in valor.split(',') if item.strip()]
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description=f"{config.APP_NAME} - extração sem interface gráfica",
+        epilog="Códigos de saída: 0 concluída, 1 erro, 2 argumentos inválidos, 3 sessão expirada, 4 interrompida"
+    )
+    parser.add_argument('--units', type=lista_separada, default=list(config.UNIDADES_PRISIONAIS),
+                        help=f"Unidades separadas por vírgula (padrão: todas - {','.join(config.UNIDADES_PRISIONAIS)})")
+    parser.add_argument('--out', required=True,
+                        help="Pasta de saída (arquivo com data e hora) ou caminho do arquivo .xlsx")
+    parser.add_argument('--format', type=lista_separada, default=['xlsx'],
+                        help=f"Formatos separados por vírgula entre {', '.join(FORMATOS)} (o xlsx é sempre gravado)")
+    parser.add_argument('--test-limit', type=int, metavar='N',
+                        help="Modo de teste: no máximo N presos por unidade")
+    parser.add_argument('--engine', choices=list(config.MODOS_EXTRACAO), default='navegador',
+                        help="Motor de extração (padrão: navegador)")
+    parser.add_argument('--connections', type=int, default=config.NUM_PAGINAS_PARALELAS,
+                        help=f"Páginas, conexões ou processos simultâneos (padrão: {config.NUM_PAGINAS_PARALELAS}; "
+                             f"no motor por processos, {config.NUM_PROCESSOS_UNIDADES} se não for maior que o padrão, "
+                             f"no máximo {config.MAX_PROCESSOS_UNIDADES})")
+    parser.add_argument('--delta-base', metavar='ARQUIVO',
+                        help="Excel de uma execução anterior: só presos novos ou alterados visitam os detalhes")
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help="Ignora as páginas guardadas no cache e baixa tudo de novo")
+    parser.add_argument('--resume', nargs='?', const=True, metavar='ID_EXECUCAO',
+                        help="Retoma a última execução interrompida (ou a execução informada)")
+    parser.add_argument('--trace', nargs='?', const=True, metavar='ARQUIVO',
+                        help="Grava o tempo das etapas em um arquivo Chrome trace (Perfetto)")
+    parser.add_argument('--show-browser', action='store_true', help="Exibe o navegador durante a execução")
+    return parser
+
+def caminho_excel(saida):
+    """
+    Caminho do Excel a partir de --out.
+    
+    Args:
+        saida: Pasta (criada se não existir) ou caminho terminado em .xlsx
+    """
+    if saida.lower().endswith('.xlsx'):
+        pasta, caminho = os.path.dirname(saida), saida
+    else:
+        pasta = saida
+        caminho = os.path.join(saida, f"Informações_Presos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    return os.path.abspath(caminho)
+
+def main(argv=None):
+    """
+    Executa a extração com os argumentos da linha de comando.
+    
+    Returns:
+        int: Código de saída
+    """
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    
+    desconhecidas = [up for up in args.units if up not in config.UNIDADES_PRISIONAIS]
+    if desconhecidas or not args.units:
+        parser.error(f"unidades inválidas: {', '.join(desconhecidas) or '(nenhuma)'} "
+                     f"(disponíveis: {', '.join(config.UNIDADES_PRISIONAIS)})")
+    formatos_invalidos = [formato for formato in args.format if formato not in FORMATOS]
+    if formatos_invalidos:
+        parser.error(f"formatos inválidos: {', '.join(formatos_invalidos)} (disponíveis: {', '.join(FORMATOS)})")
+    if args.test_limit is not None and args.test_limit < 1:
+        parser.error("--test-limit deve ser maior que zero")
+    if args.connections < 1:
+        parser.error("--connections deve ser maior que zero")
+    
+    # stdout reservado aos eventos JSON; o log vai para o stderr e para o arquivo
+    configurar(saida=sys.stderr)
+    interface = InterfaceJSON()
+    
+    # SIGINT/SIGTERM: interrompe no próximo preso e mantém o diário para --resume
+    def interromper(sinal, _quadro):
+        interface.emitir('sinal', sinal=signal.Signals(sinal).name)
+        interface.cancelado.set()
+    signal.signal(signal.SIGINT, interromper)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, interromper)
+    
+    try:
+        caminho = caminho_excel(args.out)
+    except OSError as e:
+        interface.emitir('fim', situacao=ERRO, codigo_saida=SAIDA_ERRO, erro=f"Pasta de saída inválida: {e}")
+        return SAIDA_ERRO
+    
+    opcoes = {
+        'modo_teste': args.test_limit is not None,
+        'limite_teste': args.test_limit or 0,
+        'mostrar_navegador': args.show_browser,
+        'paginas_paralelas': args.connections,
+        'modo_extracao': args.engine,
+        'forcar_atualizacao_cache': args.refresh_cache,
+        'arquivo_base_delta': args.delta_base,
+        'formatos_exportacao': [formato for formato in args.format if formato != 'xlsx'],
+        'caminho_saida': caminho,
+        'retomar': args.resume,
+        'trace': args.trace,
+    }
+    interface.emitir('inicio', unidades=args.units, opcoes=opcoes)
+    
+    execucao = iniciar_extracao(args.units, opcoes, interface)
+    codigo = CODIGOS_SAIDA.get(execucao['situacao'], SAIDA_ERRO)
+    
+    resultado = execucao['resultado'] or {}
+    interface.emitir(
+        'fim',
+        situacao=execucao['situacao'],
+        codigo_saida=codigo,
+        id_execucao=execucao['id_execucao'],
+        presos=len(resultado['consolidado']) if 'consolidado' in resultado else None,
+        arquivos={'xlsx': resultado.get('caminho_excel'), **resultado.get('arquivos', {})} if resultado else {}
+    )
+    return codigo
+
+if __name__ == "__main__":
+    # Necessário para o modo de extração por processos no executável empacotado
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Cache em disco das páginas de detalhes dos presos.
+
+O HTML de cada página é guardado comprimido em um banco SQLite, indexado
+pela chave da URL (config.URL_PARA_CHAVE) e pelo código do preso, com
+validade própria para cada família de URL (config.TTL_CACHE_PAGINAS). Junto
+com o HTML ficam os campos extraídos na gravação: um acerto devolve esses
+campos, sem interpretar a página de novo, de modo que acertos e faltas de uma
+mesma execução dão os mesmos valores. Os campos valem só para o extrator
+(navegador ou HTTP) e as regras de extração (LOCALIZADORES, ROTULOS) com que
+foram gravados. O tamanho total é limitado removendo primeiro as páginas
+acessadas há mais tempo; a data de acesso é gravada em lotes.
+
+A compressão usa zstandard quando o pacote está instalado e zlib caso
+contrário; cada página registra o formato usado na gravação.
+"""
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+from src.utils import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Gravações entre verificações do limite de tamanho
+GRAVACOES_ENTRE_LIMPEZAS = 500
+
+# Acessos acumulados antes de gravar a data de acesso (ordem de remoção) no banco
+ACESSOS_ENTRE_COMMITS = 200
+
+# Extratores que gravam campos no cache: os campos de um não são usados pelo outro
+EXTRATOR_NAVEGADOR = 'navegador'
+EXTRATOR_HTTP = 'http'
+
+def comprimir(conteudo):
+    """
+    Comprime o conteúdo de uma página.
+    
+    Returns:
+        tuple: (formato, dados comprimidos)
+    """
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=config.NIVEL_COMPRESSAO_CACHE).compress(conteudo)
+    return 'zlib', zlib.compress(conteudo, 6)
+
+def descomprimir(formato, dados):
+    """
+    Descomprime o conteúdo de uma página gravada no formato informado.
+    
+    Returns:
+        bytes: Conteúdo original, ou None se o formato não puder ser lido neste ambiente
+    """
+    if formato == 'zlib':
+        return zlib.decompress(dados)
+    if formato == 'zstd' and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(dados)
+    return None
+
+def assinatura_extracao(chave_url, extrator):
+    """
+    Identifica o extrator e as regras de extração de uma família de URL.
+    
+    Campos gravados com outra assinatura (seletor ou rótulo alterado, outro
+    extrator) não são reaproveitados.
+    """
+    regras = {
+        'localizadores': config.LOCALIZADORES.get(chave_url),
+        'rotulos': config.ROTULOS.get(chave_url) if config.EXTRACAO_POR_ROTULOS else None,
+        'ultimo': chave_url in config.LOCALIZADORES_ULTIMO_ELEMENTO,
+    }
+    resumo = hashlib.sha1(json.dumps(regras, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+    return f"{extrator}:{resumo}"
+
+class CachePaginas:
+    """Cache SQLite das páginas de detalhes, seguro para uso por várias threads."""
+    
+    def __init__(self, caminho=None, tamanho_maximo_mb=None, ttl=None, forcar_atualizacao=False):
+        """
+        Args:
+            caminho: Arquivo do banco SQLite. Se None, usa config.CAMINHO_CACHE_PAGINAS
+            tamanho_maximo_mb: Tamanho máximo das páginas comprimidas. Se None, usa config.TAMANHO_MAXIMO_CACHE_MB
+            ttl: Dicionário {chave_url: segundos}. Se None, usa config.TTL_CACHE_PAGINAS
+            forcar_atualizacao: Se True, ignora as páginas em cache (mas grava as novas)
+        """
+        self.caminho = caminho or config.CAMINHO_CACHE_PAGINAS
+        self.tamanho_maximo = int((tamanho_maximo_mb or config.TAMANHO_MAXIMO_CACHE_MB) * 1024 * 1024)
+        self.ttl = ttl if ttl is not None else config.TTL_CACHE_PAGINAS
+        self.forcar_atualizacao = forcar_atualizacao
+        self.estatisticas = {'acertos': 0, 'faltas': 0, 'bytes_economizados': 0}
+        self._gravacoes = 0
+        self._acessos_pendentes = []
+        self._assinaturas = {}
+        self._trava = threading.Lock()
+        
+        if os.path.dirname(self.caminho):
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paginas (
+                chave_url TEXT NOT NULL,
+                codigo TEXT NOT NULL,
+                formato TEXT NOT NULL,
+                conteudo BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                tamanho_original INTEGER NOT NULL,
+                gravado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL,
+                PRIMARY KEY (chave_url, codigo)
+            )
+            """
+        )
+        # Bancos gravados antes dos campos: as páginas sem campos contam como faltas
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(paginas)")}
+        if 'campos' not in colunas:
+            self._conexao.execute("ALTER TABLE paginas ADD COLUMN campos TEXT")
+            self._conexao.execute("ALTER TABLE paginas ADD COLUMN assinatura TEXT")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_paginas_acesso ON paginas (acessado_em)")
+        self._conexao.commit()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.fechar()
+    
+    def _assinatura(self, chave_url, extrator):
+        chave = (chave_url, extrator)
+        if chave not in self._assinaturas:
+            self._assinaturas[chave] = assinatura_extracao(chave_url, extrator)
+        return self._assinaturas[chave]
+    
+    def _gravar_acessos(self):
+        """Grava as datas de acesso acumuladas (chamar com a trava, antes de um commit)."""
+        if self._acessos_pendentes:
+            self._conexao.executemany(
+                "UPDATE paginas SET acessado_em = ? WHERE chave_url = ? AND codigo = ?",
+                self._acessos_pendentes
+            )
+            self._acessos_pendentes = []
+    
+    def obter_campos(self, chave_url, codigo, extrator=EXTRATOR_NAVEGADOR):
+        """
+        Retorna os campos gravados com a página em cache, se ainda estiver válida.
+        
+        Args:
+            chave_url: Chave da URL em config.URL_PARA_CHAVE
+            codigo: Código (id_cad_preso) do preso
+            extrator: EXTRATOR_NAVEGADOR ou EXTRATOR_HTTP (quem vai usar os campos)
+        
+        Returns:
+            dict: Dicionário {coluna: texto}, ou None se não houver página válida em
+                  cache com campos do mesmo extrator e das mesmas regras
+        """
+        if self.forcar_atualizacao:
+            self.estatisticas['faltas'] += 1
+            return None
+        
+        validade = self.ttl.get(chave_url, 0)
+        agora = time.time()
+        assinatura = self._assinatura(chave_url, extrator)
+        
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT campos, assinatura, tamanho_original, gravado_em FROM paginas WHERE chave_url = ? AND codigo = ?",
+                (chave_url, codigo)
+            ).fetchone()
+            
+            if not linha or linha[0] is None or linha[1] != assinatura or agora - linha[3] > validade:
+                self.estatisticas['faltas'] += 1
+                return None
+            
+            self._acessos_pendentes.append((agora, chave_url, codigo))
+            if len(self._acessos_pendentes) >= ACESSOS_ENTRE_COMMITS:
+                self._gravar_acessos()
+                self._conexao.commit()
+            self.estatisticas['acertos'] += 1
+            self.estatisticas['bytes_economizados'] += linha[2]
+        return json.loads(linha[0])
+    
+    def obter(self, chave_url, codigo):
+        """
+        Retorna o HTML de uma página em cache, se ainda estiver válido (sem contar acerto).
+        
+        Returns:
+            bytes: HTML da página, ou None se não houver página válida em cache
+        """
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT formato, conteudo, gravado_em FROM paginas WHERE chave_url = ? AND codigo = ?",
+                (chave_url, codigo)
+            ).fetchone()
+        if not linha or time.time() - linha[2] > self.ttl.get(chave_url, 0):
+            return None
+        return descomprimir(linha[0], linha[1])
+    
+    def gravar(self, chave_url, codigo, conteudo, campos, extrator=EXTRATOR_NAVEGADOR):
+        """
+        Grava (ou substitui) o HTML de uma página e os campos extraídos dela.
+        
+        Args:
+            chave_url: Chave da URL em config.URL_PARA_CHAVE
+            codigo: Código (id_cad_preso) do preso
+            conteudo: HTML da página (bytes ou str)
+            campos: Campos extraídos da página. Se nenhum campo tiver valor (sessão
+                    expirada, página de erro), a página não é gravada.
+            extrator: EXTRATOR_NAVEGADOR ou EXTRATOR_HTTP (quem extraiu os campos)
+        """
+        if not any(campos.values()):
+            return
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode('utf-8')
+        formato, dados = comprimir(conteudo)
+        campos_json = json.dumps(campos, ensure_ascii=False)
+        assinatura = self._assinatura(chave_url, extrator)
+        agora = time.time()
+        
+        with self._trava:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO paginas "
+                "(chave_url, codigo, formato, conteudo, tamanho, tamanho_original, gravado_em, acessado_em, campos, assinatura) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave_url, codigo, formato, dados, len(dados), len(conteudo), agora, agora, campos_json, assinatura)
+            )
+            self._gravacoes += 1
+            if self._gravacoes % GRAVACOES_ENTRE_LIMPEZAS == 0:
+                self._aplicar_limite()
+            else:
+                self._gravar_acessos()
+                self._conexao.commit()
+    
+    def _aplicar_limite(self):
+        """Remove as páginas vencidas e, se preciso, as acessadas há mais tempo (chamar com a trava)."""
+        self._gravar_acessos()
+        agora = time.time()
+        for chave_url, validade in self.ttl.items():
+            self._conexao.execute(
+                "DELETE FROM paginas WHERE chave_url = ? AND gravado_em < ?",
+                (chave_url, agora - validade)
+            )
+        
+        total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM paginas").fetchone()[0]
+        if total > self.tamanho_maximo:
+            excedente = total - self.tamanho_maximo
+            removidos = 0
+            for chave_url, codigo, tamanho in self._conexao.execute(
+                "SELECT chave_url, codigo, tamanho FROM paginas ORDER BY acessado_em"
+            ).fetchall():
+                if removidos >= excedente:
+                    break
+                self._conexao.execute(
+                    "DELETE FROM paginas WHERE chave_url = ? AND codigo = ?",
+                    (chave_url, codigo)
+                )
+                removidos += tamanho
+        self._conexao.commit()
+    
+    def limpar(self):
+        """Remove todas as páginas do cache."""
+        with self._trava:
+            self._acessos_pendentes = []
+            self._conexao.execute("DELETE FROM paginas")
+            self._conexao.commit()
+            self._conexao.execute("VACUUM")
+    
+    def resumo(self):
+        """Retorna um texto com os acertos e o volume de download evitado."""
+        acertos = self.estatisticas['acertos']
+        total = acertos + self.estatisticas['faltas']
+        megabytes = self.estatisticas['bytes_economizados'] / (1024 * 1024)
+        return f"Cache de páginas: {acertos}/{total} páginas reaproveitadas ({megabytes:.1f} MB não baixados)"
+    
+    def fechar(self):
+        """Aplica o limite de tamanho e fecha o banco."""
+        with self._trava:
+            if self._conexao is None:
+                return
+            self._aplicar_limite()
+            self._conexao.close()
+            self._conexao = None
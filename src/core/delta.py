@@ -0,0 +1,101 @@
+"""
+Modo delta: reaproveita os detalhes dos presos de uma execução anterior.
+
+A lista da unidade (CÓDIGO, NOME, MÃE, CPF, ALA, CELA) é lida a cada
+execução. Ela é comparada com o Excel gerado por uma execução anterior, e
+apenas os presos novos ou com alguma coluna de config.COLUNAS_COMPARACAO_DELTA
+alterada têm as páginas de detalhes visitadas. Os demais recebem as colunas
+de detalhe da execução anterior, sem nenhuma navegação.
+"""
+import pandas as pd
+
+from src.utils import config
+from src.utils.logger import Logger
+
+logger = Logger.get_logger('delta')
+
+# Colunas preenchidas pelas páginas de detalhes (as que são reaproveitadas)
+COLUNAS_DETALHE = [
+    coluna
+    for localizadores in config.LOCALIZADORES.values()
+    for coluna in localizadores
+]
+
+def carregar_base_anterior(caminho):
+    """
+    Lê o Excel de uma execução anterior.
+    
+    As abas de cada unidade são usadas (a aba Consolidado repete os mesmos
+    dados); a coluna UP é reconstruída pelo nome da aba.
+    
+    Args:
+        caminho: Caminho do arquivo .xlsx gerado por listar_presos_up
+    
+    Returns:
+        dict: Dicionário {código: {coluna: texto}} com as colunas de config.COLUNAS
+    """
+    abas = pd.read_excel(caminho, sheet_name=None, dtype=str, keep_default_na=False)
+    
+    partes = []
+    for nome, df in abas.items():
+        if nome == 'Consolidado' or 'CÓDIGO' not in df.columns:
+            continue
+        df = df.copy()
+        df['UP'] = nome
+        partes.append(df.reindex(columns=config.COLUNAS))
+    
+    if not partes:
+        return {}
+    
+    base = pd.concat(partes, ignore_index=True)
+    base = base[base['CÓDIGO'].str.strip() != '']
+    base = base.drop_duplicates(subset='CÓDIGO', keep='first')
+    logger.info("Base anterior carregada: %d presos de %d unidades (%s)", len(base), len(partes), caminho)
+    return base.set_index('CÓDIGO', drop=False).to_dict('index')
+
+def _normalizar(valor):
+    """Texto usado na comparação: nulos viram '' e espaços das pontas são ignorados."""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ''
+    return str(valor).strip()
+
+def aplicar_delta(presos, base):
+    """
+    Compara a lista atual de uma unidade com a base anterior.
+    
+    Os presos sem alteração recebem as colunas de detalhe da base anterior,
+    diretamente no RegistrosUnidade.
+    
+    Args:
+        presos: RegistrosUnidade com a lista atual da unidade (alterado no lugar)
+        base: Dicionário retornado por carregar_base_anterior
+    
+    Returns:
+        tuple: (lista de códigos que precisam das páginas de detalhes,
+                dict com as contagens de novos, alterados e mantidos)
+    """
+    pendentes = []
+    contagem = {'novos': 0, 'alterados': 0, 'mantidos': 0}
+    
+    for codigo in presos.codigos():
+        anterior = base.get(codigo)
+        
+        if anterior is None:
+            contagem['novos'] += 1
+            pendentes.append(codigo)
+            continue
+        
+        alterado = any(
+            _normalizar(presos.obter(codigo, coluna)) != _normalizar(anterior.get(coluna))
+            for coluna in config.COLUNAS_COMPARACAO_DELTA
+        )
+        if alterado:
+            contagem['alterados'] += 1
+            pendentes.append(codigo)
+        else:
+            contagem['mantidos'] += 1
+            presos.atualizar(codigo, {coluna: anterior.get(coluna, '') for coluna in COLUNAS_DETALHE})
+    
+    logger.info("Modo delta (%s): %d novos, %d alterados, %d reaproveitados da execução anterior",
+                presos.up, contagem['novos'], contagem['alterados'], contagem['mantidos'], extra={'up': presos.up})
+    return pendentes, contagem
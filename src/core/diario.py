@@ -0,0 +1,215 @@
+"""
+Diário de execução (checkpoint) para retomar extrações interrompidas.
+
+Cada execução grava um arquivo JSONL próprio em config.DIRETORIO_DIARIOS,
+apenas com acréscimos: um registro de início com as unidades e opções, um
+registro por preso assim que todos os seus campos são extraídos e um de fim
+após a gravação do Excel. Ao retomar, a lista de cada unidade é lida de novo
+(uma página) e os presos já registrados não visitam as páginas de detalhes.
+"""
+import os
+import json
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from src.utils import config
+from src.utils.logger import Logger
+from src.core.registros import POSICAO_COLUNA, VAZIO
+
+logger = Logger.get_logger('diario')
+
+# Opções que definem os dados da execução e são restauradas ao retomar
+OPCOES_DIARIO = ['modo_teste', 'limite_teste', 'arquivo_base_delta']
+
+def _valor_json(valor):
+    """Nulos do pandas (NaN) são gravados como null."""
+    if isinstance(valor, float) and pd.isna(valor):
+        return None
+    return valor
+
+def retomar_presos(presos, codigos, registrados):
+    """
+    Preenche os presos já registrados em um diário e retorna os que faltam.
+    
+    Args:
+        presos: RegistrosUnidade da unidade (alterado no lugar)
+        codigos: Códigos que precisariam das páginas de detalhes
+        registrados: Dicionário {código: registro} dos presos da unidade já registrados
+    
+    Returns:
+        list: Códigos ainda não registrados
+    """
+    pendentes = []
+    for codigo in codigos:
+        registro = registrados.get(codigo)
+        if registro is None:
+            pendentes.append(codigo)
+        else:
+            presos.atualizar(codigo, registro)
+    
+    if registrados:
+        logger.info("Retomando %s: %d presos recuperados do diário, %d pendentes",
+                    presos.up, len(codigos) - len(pendentes), len(pendentes), extra={'up': presos.up})
+    return pendentes
+
+class DiarioExecucao:
+    """Diário JSONL de uma execução, seguro para uso por várias threads."""
+    
+    def __init__(self, id_execucao, diretorio=None):
+        """
+        Args:
+            id_execucao: Identificador da execução (nome do arquivo, sem extensão)
+            diretorio: Pasta dos diários. Se None, usa config.DIRETORIO_DIARIOS
+        """
+        self.id_execucao = id_execucao
+        self.caminho = os.path.join(diretorio or config.DIRETORIO_DIARIOS, f"{id_execucao}.jsonl")
+        self.unidades = []
+        self.opcoes = {}
+        self.finalizado = False
+        self._presos = {}
+        self._trava = threading.Lock()
+        self._arquivo = None
+        # Quebra de linha a gravar antes do próximo evento (última linha truncada)
+        self._prefixo = ''
+    
+    @classmethod
+    def criar(cls, unidades, opcoes, diretorio=None):
+        """
+        Inicia o diário de uma nova execução.
+        
+        Args:
+            unidades: Lista de códigos das unidades selecionadas
+            opcoes: Dicionário de opções da interface (apenas OPCOES_DIARIO são gravadas)
+            diretorio: Pasta dos diários. Se None, usa config.DIRETORIO_DIARIOS
+        
+        Returns:
+            DiarioExecucao: Diário aberto para gravação
+        """
+        diario = cls(datetime.now().strftime("%Y%m%d_%H%M%S"), diretorio)
+        diario.unidades = list(unidades)
+        diario.opcoes = {chave: opcoes.get(chave) for chave in OPCOES_DIARIO}
+        os.makedirs(os.path.dirname(diario.caminho), exist_ok=True)
+        diario._gravar({
+            'tipo': 'inicio',
+            'unidades': diario.unidades,
+            'opcoes': diario.opcoes,
+            'hora': datetime.now().isoformat(timespec='seconds')
+        })
+        return diario
+    
+    @classmethod
+    def abrir(cls, id_execucao, diretorio=None):
+        """
+        Carrega o diário de uma execução anterior para retomá-la.
+        
+        Linhas incompletas (gravação interrompida no meio) são ignoradas.
+        
+        Returns:
+            DiarioExecucao: Diário carregado, aberto para novos registros
+        """
+        diario = cls(id_execucao, diretorio)
+        linha = ''
+        with open(diario.caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    evento = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                
+                tipo = evento.get('tipo')
+                if tipo == 'inicio':
+                    diario.unidades = evento.get('unidades', [])
+                    diario.opcoes = evento.get('opcoes', {})
+                elif tipo == 'preso':
+                    # Colunas removidas de config.COLUNAS desde a gravação são descartadas
+                    registro = {
+                        coluna: VAZIO if valor is None else valor
+                        for coluna, valor in evento['registro'].items()
+                        if coluna in POSICAO_COLUNA
+                    }
+                    diario._presos.setdefault(evento['up'], {})[registro['CÓDIGO']] = registro
+                elif tipo == 'fim':
+                    diario.finalizado = True
+        
+        if linha and not linha.endswith('\n'):
+            diario._prefixo = '\n'
+        return diario
+    
+    @classmethod
+    def ultimo_interrompido(cls, diretorio=None):
+        """
+        Procura a execução mais recente que não chegou a gravar o Excel.
+        
+        Returns:
+            DiarioExecucao: Diário carregado, ou None se não houver execução interrompida
+        """
+        diretorio = diretorio or config.DIRETORIO_DIARIOS
+        if not os.path.isdir(diretorio):
+            return None
+        
+        for nome in sorted(os.listdir(diretorio), reverse=True):
+            if not nome.endswith('.jsonl'):
+                continue
+            diario = cls.abrir(nome[:-len('.jsonl')], diretorio)
+            if not diario.finalizado:
+                return diario
+        return None
+    
+    def _gravar(self, evento):
+        """Acrescenta um evento ao arquivo e força a gravação em disco."""
+        evento['execucao'] = self.id_execucao
+        linha = json.dumps(evento, ensure_ascii=False) + '\n'
+        with self._trava:
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+            self._arquivo.write(self._prefixo + linha)
+            self._prefixo = ''
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+    
+    def registrar_preso(self, up, registro):
+        """Grava os dados completos de um preso assim que sua extração termina."""
+        registro = {coluna: _valor_json(valor) for coluna, valor in registro.items()}
+        self._gravar({'tipo': 'preso', 'up': up, 'registro': registro})
+    
+    def finalizar(self, caminho_excel=None):
+        """
+        Marca a execução como concluída (Excel gravado) e fecha o arquivo.
+        
+        Sem config.MANTER_DIARIOS_CONCLUIDOS, o arquivo é removido, já que os
+        dados estão no Excel.
+        """
+        self._gravar({'tipo': 'fim', 'caminho_excel': caminho_excel})
+        self.finalizado = True
+        self.fechar()
+        if not config.MANTER_DIARIOS_CONCLUIDOS:
+            try:
+                os.remove(self.caminho)
+            except OSError as e:
+                logger.warning("Não foi possível remover o diário %s: %s", self.caminho, e)
+    
+    def fechar(self):
+        """Fecha o arquivo do diário."""
+        with self._trava:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+    
+    def presos_registrados(self, up):
+        """Retorna o dicionário {código: registro} dos presos da unidade já registrados."""
+        return dict(self._presos.get(up, {}))
+    
+    def retomar(self, presos, codigos):
+        """
+        Preenche os presos já registrados no diário e retorna os que faltam.
+        
+        Args:
+            presos: RegistrosUnidade da unidade (alterado no lugar)
+            codigos: Códigos que precisariam das páginas de detalhes
+        
+        Returns:
+            list: Códigos ainda não registrados no diário
+        """
+        return retomar_presos(presos, codigos, self._presos.get(presos.up, {}))
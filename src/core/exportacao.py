@@ -0,0 +1,261 @@
+"""
+Exportação dos dados extraídos.
+
+O Excel é gravado pelo xlsxwriter em modo constant_memory: as linhas de cada
+aba são lidas do DataFrame consolidado em blocos pequenos e escritas uma a
+uma, sem montar um DataFrame por unidade nem cópias sem a coluna UP. O
+formato das células é o mesmo do DataFrame.to_excel (cabeçalho em negrito,
+com borda, centralizado) e as colunas seguem a ordem de config.COLUNAS.
+
+Os formatos adicionais (Parquet, CSV e SQLite) são destinados a análises: o
+consolidado é gravado uma única vez, com as datas tipadas, e a divisão por
+unidade fica na coluna UP (e, no SQLite, também na tabela unidades). O
+Parquet usa pyarrow quando o pacote está instalado.
+"""
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from src.utils import config
+from src.utils.logger import Logger
+from src.core.normalizacao import tipar_colunas
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = Logger.get_logger('exportacao')
+
+# Extensão dos arquivos de cada formato adicional (mesmo nome do Excel)
+EXTENSOES_FORMATOS = {
+    'parquet': '.parquet',
+    'csv': '.csv',
+    'sqlite': '.sqlite3',
+}
+
+# Índices criados na tabela presos do SQLite {nome: coluna}
+INDICES_SQLITE = {
+    'idx_presos_codigo': 'CÓDIGO',
+    'idx_presos_cpf': 'CPF',
+    'idx_presos_up': 'UP',
+}
+
+# Formato do cabeçalho do DataFrame.to_excel no pandas 2.x (o pandas 3 grava sem estilo)
+FORMATO_CABECALHO = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+def _valor_celula(valor):
+    """Converte um valor do DataFrame para o tipo nativo gravado na célula (None = vazia)."""
+    if valor is None or valor is pd.NA:
+        return None
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor
+
+def iterar_linhas(df, colunas, posicoes=None, tamanho_bloco=None):
+    """
+    Percorre as linhas de um DataFrame em blocos, sem copiá-lo por inteiro.
+    
+    Args:
+        df: DataFrame de origem
+        colunas: Colunas a devolver, na ordem desejada
+        posicoes: Posições (iloc) das linhas a devolver. Se None, todas as linhas
+        tamanho_bloco: Linhas copiadas por vez. Se None, usa config.LINHAS_POR_BLOCO_EXPORTACAO
+    
+    Yields:
+        list: Valores de uma linha, já convertidos por _valor_celula
+    """
+    tamanho_bloco = tamanho_bloco or config.LINHAS_POR_BLOCO_EXPORTACAO
+    if posicoes is None:
+        posicoes = np.arange(len(df))
+    indices_colunas = [df.columns.get_loc(coluna) for coluna in colunas]
+    
+    for inicio in range(0, len(posicoes), tamanho_bloco):
+        bloco = df.iloc[posicoes[inicio:inicio + tamanho_bloco], indices_colunas]
+        for linha in bloco.itertuples(index=False, name=None):
+            yield [_valor_celula(valor) for valor in linha]
+
+def posicoes_unidades(df, unidades):
+    """
+    Retorna as posições (iloc) das linhas de cada unidade, na ordem do DataFrame.
+    
+    Args:
+        df: DataFrame consolidado, com a coluna UP
+        unidades: Códigos das unidades, na ordem das abas
+    
+    Returns:
+        dict: Dicionário {unidade: array de posições}
+    """
+    coluna_up = df['UP'].to_numpy(dtype=object)
+    return {up: np.flatnonzero(coluna_up == up) for up in unidades}
+
+class UnidadesConsolidado(Mapping):
+    """
+    Dicionário {unidade: DataFrame} montado sob demanda a partir do consolidado.
+    
+    Mantém o formato 'unidades' devolvido pelos motores sem guardar uma cópia
+    dos dados por unidade: cada acesso seleciona as linhas da unidade no
+    consolidado (já tratado e ordenado) e devolve um DataFrame novo.
+    """
+    
+    def __init__(self, df_consolidado, unidades):
+        self._df = df_consolidado
+        self._unidades = list(unidades)
+        self._posicoes = None
+    
+    def __getitem__(self, up):
+        if up not in self._unidades:
+            raise KeyError(up)
+        if self._posicoes is None:
+            self._posicoes = posicoes_unidades(self._df, self._unidades)
+        return self._df.iloc[self._posicoes[up]]
+    
+    def __iter__(self):
+        return iter(self._unidades)
+    
+    def __len__(self):
+        return len(self._unidades)
+
+def _escrever_aba(workbook, nome, df, colunas, posicoes, formato_cabecalho):
+    """Escreve uma aba linha a linha: cabeçalho e depois os dados."""
+    aba = workbook.add_worksheet(nome)
+    for coluna, titulo in enumerate(colunas):
+        aba.write(0, coluna, titulo, formato_cabecalho)
+    
+    for linha, valores in enumerate(iterar_linhas(df, colunas, posicoes), start=1):
+        for coluna, valor in enumerate(valores):
+            if valor is not None:
+                aba.write(linha, coluna, valor)
+
+def exportar_excel(caminho, df_consolidado, unidades):
+    """
+    Grava o Excel com a aba Consolidado (se houver mais de uma unidade) e uma aba por unidade.
+    
+    Args:
+        caminho: Caminho do arquivo .xlsx
+        df_consolidado: DataFrame tratado e ordenado com os dados de todas as unidades
+        unidades: Códigos das unidades, na ordem das abas (unidades sem presos geram aba vazia)
+    """
+    colunas = [coluna for coluna in config.COLUNAS if coluna in df_consolidado.columns]
+    colunas_sem_up = [coluna for coluna in colunas if coluna != 'UP']
+    
+    workbook = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+    try:
+        formato_cabecalho = workbook.add_format(FORMATO_CABECALHO)
+        
+        # Primeira aba é o consolidado
+        if len(unidades) > 1:
+            _escrever_aba(workbook, 'Consolidado', df_consolidado, colunas, None, formato_cabecalho)
+        
+        # Uma aba para cada unidade sem a coluna UP
+        for up, posicoes in posicoes_unidades(df_consolidado, unidades).items():
+            _escrever_aba(workbook, up, df_consolidado, colunas_sem_up, posicoes, formato_cabecalho)
+    finally:
+        workbook.close()
+
+def tipar_para_analise(df_consolidado):
+    """
+    Retorna uma cópia tipada do consolidado para os formatos de análise.
+    
+    As datas viram datetime64 (tipar_colunas) e as colunas de
+    config.COLUNAS_CATEGORICAS_EXPORTACAO viram category, gravadas com
+    dicionário no Parquet.
+    """
+    tipado = tipar_colunas(df_consolidado).reset_index(drop=True)
+    for coluna in config.COLUNAS_CATEGORICAS_EXPORTACAO:
+        if coluna in tipado.columns:
+            tipado[coluna] = tipado[coluna].astype('category')
+    return tipado
+
+def exportar_parquet(caminho, tipado):
+    """
+    Grava o consolidado tipado em Parquet (pyarrow, dicionário e compressão zstd).
+    
+    Raises:
+        ImportError: Se o pyarrow não estiver instalado
+    """
+    if pyarrow is None:
+        raise ImportError("o pacote pyarrow não está instalado (pip install pamc-svi[parquet])")
+    tipado.to_parquet(caminho, engine='pyarrow', index=False, compression='zstd', use_dictionary=True)
+
+def exportar_csv(caminho, tipado, tamanho_bloco=None):
+    """Grava o consolidado tipado em CSV, um bloco de linhas por vez (datas em aaaa-mm-dd)."""
+    tamanho_bloco = tamanho_bloco or config.LINHAS_POR_BLOCO_EXPORTACAO
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        # Sem presos, o primeiro bloco (vazio) ainda grava o cabeçalho
+        for inicio in range(0, max(len(tipado), 1), tamanho_bloco):
+            tipado.iloc[inicio:inicio + tamanho_bloco].to_csv(
+                arquivo, index=False, header=inicio == 0, date_format='%Y-%m-%d'
+            )
+
+def exportar_sqlite(caminho, tipado, unidades):
+    """
+    Grava o consolidado tipado em um banco SQLite novo.
+    
+    A tabela presos recebe todas as linhas, com os índices de INDICES_SQLITE,
+    e a tabela unidades recebe a ordem das unidades e o total de presos de cada uma.
+    """
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    
+    contagem = tipado['UP'].value_counts()
+    df_unidades = pd.DataFrame({
+        'UP': unidades,
+        'ORDEM': range(len(unidades)),
+        'PRESOS': [int(contagem.get(up, 0)) for up in unidades],
+    })
+    
+    with closing(sqlite3.connect(caminho)) as conexao:
+        tipado.to_sql('presos', conexao, index=False, chunksize=config.LINHAS_POR_BLOCO_EXPORTACAO)
+        df_unidades.to_sql('unidades', conexao, index=False)
+        for nome, coluna in INDICES_SQLITE.items():
+            conexao.execute(f'CREATE INDEX "{nome}" ON presos ("{coluna}")')
+        conexao.commit()
+
+def exportar_formatos(caminho_excel, df_consolidado, unidades, formatos):
+    """
+    Grava os formatos adicionais ao lado do Excel, com o mesmo nome de arquivo.
+    
+    Uma falha em um formato é informada e não impede os demais.
+    
+    Args:
+        caminho_excel: Caminho do arquivo .xlsx (define a pasta e o nome dos demais arquivos)
+        df_consolidado: DataFrame tratado e ordenado com os dados de todas as unidades
+        unidades: Códigos das unidades, na ordem das abas do Excel
+        formatos: Formatos a gravar (chaves de EXTENSOES_FORMATOS)
+    
+    Returns:
+        dict: Dicionário {formato: caminho} dos arquivos gravados
+    """
+    formatos = [formato for formato in formatos if formato in EXTENSOES_FORMATOS]
+    if not formatos:
+        return {}
+    
+    tipado = tipar_para_analise(df_consolidado)
+    base = os.path.splitext(caminho_excel)[0]
+    arquivos = {}
+    
+    for formato in formatos:
+        caminho = base + EXTENSOES_FORMATOS[formato]
+        try:
+            if formato == 'parquet':
+                exportar_parquet(caminho, tipado)
+            elif formato == 'csv':
+                exportar_csv(caminho, tipado)
+            else:
+                exportar_sqlite(caminho, tipado, unidades)
+        except Exception as e:
+            logger.error("Erro ao criar arquivo %s: %s", formato.upper(), e)
+            continue
+        
+        arquivos[formato] = caminho
+        logger.info("Arquivo %s criado com sucesso: %s", formato.upper(), caminho)
+    
+    return arquivos
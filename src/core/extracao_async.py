@@ -0,0 +1,338 @@
+"""
+Motor de extração assíncrono com um pool de páginas do Playwright.
+
+O login é feito uma única vez (pelo login_canaime, na API síncrona) e o estado
+da sessão autenticada é exportado para um novo contexto assíncrono, onde um
+pool de N páginas visita as páginas de detalhes dos presos em paralelo.
+"""
+import asyncio
+import logging
+import threading
+
+from playwright.async_api import async_playwright
+
+from src.utils import config
+from src.core.plano_extracao import obter_plano
+from src.core.registros import RegistrosUnidade
+from src.core.delta import aplicar_delta
+from src.core.tentativas import obter_politica, verificar_sessao, SessaoExpiradaError
+from src.core.politica_recursos import navegar_async, obter_politica_recursos
+from src.core.medicao import obter_medicoes
+from src.utils.logger import Logger, contexto_log
+from src.core.listar_presos_up import (
+    SCRIPT_LISTA_PRESOS,
+    finalizar_extracao,
+    montar_registros_lista,
+)
+
+logger = Logger.get_logger('extracao_async')
+
+async def retry_async(func, *args, **kwargs):
+    """
+    Versão assíncrona de retry_em_caso_de_erro.
+    
+    Args:
+        func: Função assíncrona a ser executada
+        *args, **kwargs: Argumentos para a função
+    
+    Returns:
+        O resultado da função, relançando a exceção quando não há nova tentativa
+    """
+    return await obter_politica().executar_async(func, *args, **kwargs)
+
+async def _ir_para_url(page, url):
+    """Versão assíncrona de ir_para_url: navega e verifica se a sessão continua válida."""
+    resposta = await navegar_async(page, url)
+    verificar_sessao(page.url)
+    return resposta
+
+class PoolPaginas:
+    """Pool de páginas que compartilham o mesmo contexto autenticado."""
+    
+    def __init__(self, contexto, tamanho):
+        self.contexto = contexto
+        self.tamanho = max(1, int(tamanho))
+        self.semaforo = asyncio.BoundedSemaphore(self.tamanho)
+        self.livres = asyncio.Queue()
+        self.paginas = []
+    
+    async def abrir(self):
+        """Cria as páginas do pool."""
+        for _ in range(self.tamanho):
+            pagina = await self.contexto.new_page()
+            self.paginas.append(pagina)
+            self.livres.put_nowait(pagina)
+    
+    async def fechar(self):
+        """Fecha todas as páginas do pool."""
+        for pagina in self.paginas:
+            try:
+                await pagina.close()
+            except Exception:
+                pass
+        self.paginas = []
+    
+    async def executar(self, func, *args):
+        """
+        Executa func(pagina, *args) com uma página livre do pool.
+        
+        O semáforo limita o número de navegações simultâneas ao tamanho do pool.
+        """
+        async with self.semaforo:
+            pagina = await self.livres.get()
+            try:
+                return await func(pagina, *args)
+            finally:
+                self.livres.put_nowait(pagina)
+
+async def _extrair_lista_presos(page, up):
+    """
+    Lê a página da unidade e retorna a lista de registros básicos dos presos.
+    
+    Args:
+        page: Página assíncrona do Playwright
+        up: Código da unidade prisional
+    
+    Returns:
+        list: Lista de dicionários com os dados da lista de presos
+    """
+    medicoes = obter_medicoes()
+    with medicoes.medir('lista', up=up):
+        with medicoes.medir('navegacao', up=up, familia='URL_UNIDADE'):
+            await retry_async(_ir_para_url, page, config.URL_UNIDADE + up)
+        
+        # Textos e fotos de todos os presos em uma única chamada ao navegador
+        itens = await retry_async(
+            page.eval_on_selector_all,
+            config.SELETORES_LISTA_PRESOS['containers_informacoes'],
+            SCRIPT_LISTA_PRESOS,
+            [config.SELETORES_LISTA_PRESOS['containers_informacoes'], config.SELETORES_LISTA_PRESOS['fotos']]
+        )
+        return montar_registros_lista(itens, up)
+
+async def _extrair_detalhes_preso(page, presos, codigo, cache=None, diario=None):
+    """
+    Visita as páginas de detalhes de um preso e preenche o seu registro.
+    
+    Args:
+        page: Página assíncrona do Playwright obtida do pool
+        presos: RegistrosUnidade da unidade, atualizado no lugar
+        codigo: Código do preso
+        cache: CachePaginas opcional consultado antes de navegar
+        diario: DiarioExecucao opcional onde o preso concluído é gravado
+    """
+    medicoes = obter_medicoes()
+    
+    # Contexto do log da tarefa: mensagens e novas tentativas deste preso levam o código
+    with contexto_log(up=presos.up, codigo=codigo):
+        for url in config.LISTA_URLS_INFO_PRESO:
+            chave_url = config.URL_PARA_CHAVE.get(url)
+            
+            if not chave_url:
+                logger.warning("AVISO: URL %s não possui mapeamento para LOCALIZADORES. Pulando.", url)
+                continue
+            
+            if not config.LOCALIZADORES[chave_url]:
+                continue
+            
+            try:
+                # Página ainda válida no cache: extrair sem navegar
+                campos = cache.obter_campos(chave_url, codigo) if cache is not None else None
+                if campos is not None:
+                    presos.atualizar(codigo, campos)
+                    continue
+                
+                with medicoes.medir('navegacao', up=presos.up, familia=chave_url, codigo=codigo):
+                    resposta = await retry_async(_ir_para_url, page, url + codigo)
+                
+                # Todos os campos da URL em uma única chamada ao navegador
+                with medicoes.medir('campos', up=presos.up, familia=chave_url, codigo=codigo):
+                    campos, invalidos = await retry_async(obter_plano(chave_url).executar_async, page)
+                presos.atualizar(codigo, campos)
+                
+                for localizador in invalidos:
+                    logger.warning("Erro ao obter %s na URL %s para o código %s: seletor inválido", localizador, url, codigo)
+                
+                if cache is not None and resposta is not None:
+                    try:
+                        cache.gravar(chave_url, codigo, await resposta.body(), campos)
+                    except Exception as e:
+                        logger.warning("Não foi possível gravar a página %s do código %s no cache: %s", chave_url, codigo, e)
+            
+            except SessaoExpiradaError:
+                raise
+            except Exception as e:
+                logger.error("Erro ao acessar URL %s para o código %s: %s", url, codigo, e)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Preso processado: %s - %s", codigo, presos.obter(codigo, 'NOME', 'Nome não encontrado'))
+    
+    if diario is not None:
+        diario.registrar_preso(presos.up, presos.registro(codigo))
+
+async def listar_presos_up_async(estado_sessao, interface=None, unidades_selecionadas=None,
+                                 modo_teste=False, limite_teste=10, num_paginas=None, headless=True, cache=None,
+                                 base_anterior=None, diario=None):
+    """
+    Extrai os dados dos presos usando um pool de páginas em paralelo.
+    
+    Args:
+        estado_sessao: Estado da sessão autenticada (storage_state) exportado após o login
+        interface: Objeto da interface SeletorUnidades para atualizar o progresso
+        unidades_selecionadas: Lista de códigos das unidades a serem processadas. Se None, processa todas.
+        modo_teste: Se True, limita o número de presos por unidade
+        limite_teste: Número máximo de presos a processar por unidade no modo de teste
+        num_paginas: Quantidade de páginas simultâneas. Se None, usa config.NUM_PAGINAS_PARALELAS
+        headless: Se False, exibe o navegador durante a execução
+        cache: CachePaginas opcional consultado antes de navegar para as páginas de detalhes
+        base_anterior: Base de uma execução anterior (modo delta)
+        diario: DiarioExecucao opcional para gravar e retomar os presos concluídos
+    
+    Returns:
+        dict: Dicionário {unidade: DataFrame} com os dados brutos, ou None se cancelado
+    """
+    usando_interface = interface is not None
+    unidades_para_processar = unidades_selecionadas or config.UNIDADES_PRISIONAIS
+    total_unidades = len(unidades_para_processar)
+    num_paginas = num_paginas or config.NUM_PAGINAS_PARALELAS
+    
+    def cancelado():
+        return usando_interface and interface.verificar_cancelamento()
+    
+    dfs_unidades = {}
+    
+    async with async_playwright() as p:
+        navegador = await p.chromium.launch(headless=headless)
+        contexto = await navegador.new_context(storage_state=estado_sessao)
+        contexto.set_default_timeout(config.TIMEOUT)
+        
+        # Bloquear os recursos que a extração não usa e servir os estáticos do disco
+        await obter_politica_recursos().aplicar_async(contexto)
+        
+        pool = PoolPaginas(contexto, num_paginas)
+        await pool.abrir()
+        logger.info("Pool de %d páginas aberto para extração paralela", pool.tamanho)
+        
+        try:
+            for i, up in enumerate(unidades_para_processar):
+                percentual = (i / total_unidades) * 100
+                mensagem = f"Processando unidade: {up} ({i+1}/{total_unidades})"
+                
+                if usando_interface:
+                    interface.atualizar_progresso(mensagem, percentual)
+                else:
+                    logger.info(mensagem)
+                
+                if cancelado():
+                    logger.info("Processamento cancelado pelo usuário")
+                    return None
+                
+                registros = await pool.executar(_extrair_lista_presos, up)
+                
+                if modo_teste and limite_teste > 0:
+                    msg_limite = f"MODO TESTE: Limitando a {limite_teste} presos na unidade {up} (total disponível: {len(registros)})"
+                    logger.info(msg_limite, extra={'up': up})
+                    if usando_interface:
+                        interface.atualizar_progresso(msg_limite, percentual)
+                    registros = registros[:limite_teste]
+                
+                if usando_interface:
+                    interface.atualizar_progresso(f"Coletando detalhes dos presos da unidade {up}", percentual)
+                
+                presos = RegistrosUnidade(up, registros)
+                if base_anterior is not None:
+                    codigos_detalhes, _ = aplicar_delta(presos, base_anterior)
+                else:
+                    codigos_detalhes = presos.codigos()
+                if diario is not None:
+                    codigos_detalhes = diario.retomar(presos, codigos_detalhes)
+                
+                tarefas = [
+                    asyncio.create_task(pool.executar(_extrair_detalhes_preso, presos, codigo, cache, diario))
+                    for codigo in codigos_detalhes
+                ]
+                
+                try:
+                    for concluidos, tarefa in enumerate(asyncio.as_completed(tarefas), start=1):
+                        await tarefa
+                        
+                        if usando_interface and concluidos % 5 == 0:
+                            sub_percentual = percentual + ((concluidos / len(tarefas)) * 100 / total_unidades)
+                            interface.atualizar_progresso(f"Extraindo detalhes: {up} - Preso {concluidos}/{len(tarefas)}", sub_percentual)
+                        
+                        if cancelado():
+                            logger.info("Processamento cancelado pelo usuário")
+                            return None
+                finally:
+                    for tarefa in tarefas:
+                        tarefa.cancel()
+                    await asyncio.gather(*tarefas, return_exceptions=True)
+                
+                dfs_unidades[up] = presos.para_dataframe()
+        finally:
+            await pool.fechar()
+            await contexto.close()
+            await navegador.close()
+    
+    return dfs_unidades
+
+def listar_presos_up_paralelo(page, caminho_saida=None, interface=None, unidades_selecionadas=None,
+                              modo_teste=False, limite_teste=10, num_paginas=None, headless=True, cache=None,
+                              base_anterior=None, diario=None, formatos_exportacao=None):
+    """
+    Equivalente paralelo de listar_presos_up, usando o motor assíncrono.
+    
+    Reaproveita a sessão autenticada da página síncrona recebida e produz o
+    mesmo resultado de listar_presos_up.
+    
+    Args:
+        page: Objeto page do Playwright (síncrono) já autenticado pelo Login
+        caminho_saida: Caminho opcional para salvar o arquivo Excel
+        interface: Objeto da interface SeletorUnidades para atualizar o progresso
+        unidades_selecionadas: Lista de códigos das unidades a serem processadas. Se None, processa todas.
+        modo_teste: Se True, limita o número de presos por unidade
+        limite_teste: Número máximo de presos a processar por unidade no modo de teste
+        num_paginas: Quantidade de páginas simultâneas. Se None, usa config.NUM_PAGINAS_PARALELAS
+        headless: Se False, exibe o navegador durante a execução
+        cache: CachePaginas opcional consultado antes de navegar para as páginas de detalhes
+        base_anterior: Base de uma execução anterior (modo delta)
+        diario: DiarioExecucao opcional para gravar e retomar os presos concluídos
+        formatos_exportacao: Formatos gravados além do Excel (chaves de config.FORMATOS_EXPORTACAO)
+    
+    Returns:
+        dict: Dicionário com o DataFrame consolidado, a lista de unidades e o caminho do arquivo Excel
+    """
+    estado_sessao = page.context.storage_state()
+    resultado = {}
+    
+    # A API síncrona do Playwright mantém seu próprio loop de eventos nesta
+    # thread, então o motor assíncrono roda em uma thread dedicada
+    def executar():
+        try:
+            resultado['dfs'] = asyncio.run(listar_presos_up_async(
+                estado_sessao,
+                interface=interface,
+                unidades_selecionadas=unidades_selecionadas,
+                modo_teste=modo_teste,
+                limite_teste=limite_teste,
+                num_paginas=num_paginas,
+                headless=headless,
+                cache=cache,
+                base_anterior=base_anterior,
+                diario=diario
+            ))
+        except BaseException as e:
+            resultado['erro'] = e
+    
+    thread = threading.Thread(target=executar, daemon=True)
+    thread.start()
+    thread.join()
+    
+    if 'erro' in resultado:
+        raise resultado['erro']
+    
+    dfs_unidades = resultado.get('dfs')
+    if dfs_unidades is None:
+        return None
+    
+    return finalizar_extracao(dfs_unidades, caminho_saida, interface, formatos_exportacao)
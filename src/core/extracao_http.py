@@ -0,0 +1,411 @@
+"""
+Extração sem navegador das páginas do Canaimé.
+
+As páginas de lista e de detalhes dos presos são HTML estático gerado no
+servidor, então, depois do login pelo navegador, os cookies da sessão são
+exportados para um cliente HTTP com conexões persistentes e as páginas são
+interpretadas pelo lxml, avaliando os mesmos seletores de config.LOCALIZADORES
+(compilados uma única vez para XPath).
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import lxml.html
+import requests
+from cssselect import HTMLTranslator
+from lxml import etree
+from requests.adapters import HTTPAdapter
+
+from src.utils import config
+from src.core.extrator_rotulos import IndiceRotulos, pares_rotulos_html
+from src.core.registros import RegistrosUnidade
+from src.core.delta import aplicar_delta
+from src.core.cache_paginas import EXTRATOR_HTTP
+from src.core.tentativas import verificar_sessao, SessaoExpiradaError
+from src.core.medicao import obter_medicoes
+from src.utils.logger import Logger, contexto_log
+from src.core.listar_presos_up import (
+    extrair_campos_pagina,
+    finalizar_extracao,
+    ir_para_url,
+    montar_registros_lista,
+    retry_em_caso_de_erro,
+)
+
+logger = Logger.get_logger('extracao_http')
+
+# Seletores CSS já compilados para XPath, indexados pelo próprio seletor
+_XPATH_COMPILADOS = {}
+_TRADUTOR = HTMLTranslator()
+
+def compilar_seletor(seletor):
+    """
+    Compila um seletor CSS em uma expressão XPath do lxml, com cache.
+    
+    Args:
+        seletor: Seletor CSS no formato usado em config.LOCALIZADORES
+    
+    Returns:
+        etree.XPath: Expressão compilada, chamável com o documento
+    """
+    xpath = _XPATH_COMPILADOS.get(seletor)
+    if xpath is None:
+        xpath = etree.XPath(_TRADUTOR.css_to_xpath(seletor))
+        _XPATH_COMPILADOS[seletor] = xpath
+    return xpath
+
+def interpretar_html(html):
+    """
+    Converte o HTML de uma página em um documento do lxml.
+    
+    Quebras de linha CRLF são normalizadas para LF, como faz o navegador,
+    para que o texto dos elementos seja o mesmo obtido pelo Playwright.
+    
+    Args:
+        html: Texto já decodificado (charset do cabeçalho HTTP) ou bytes, que o
+              lxml decodifica pelo <meta charset> da página
+    """
+    if isinstance(html, bytes):
+        html = html.replace(b'\r\n', b'\n')
+    else:
+        html = html.replace('\r\n', '\n')
+    return lxml.html.document_fromstring(html)
+
+def extrair_campos_html(html, chave_url):
+    """
+    Extrai de um HTML todos os campos configurados para uma URL.
+    
+    Segue as mesmas regras de extrair_campos_pagina: rótulos de config.ROTULOS
+    quando habilitados, com fallback para o seletor posicional, e a regra de
+    primeiro/último elemento.
+    
+    Args:
+        html: Conteúdo da página (str/bytes) ou documento já interpretado
+        chave_url: Chave da URL no dicionário config.LOCALIZADORES
+    
+    Returns:
+        dict: Dicionário {coluna: texto}
+    """
+    documento = interpretar_html(html) if isinstance(html, (str, bytes)) else html
+    ultimo = chave_url in config.LOCALIZADORES_ULTIMO_ELEMENTO
+    rotulos = config.ROTULOS.get(chave_url) if config.EXTRACAO_POR_ROTULOS else None
+    indice = IndiceRotulos(pares_rotulos_html(documento)) if rotulos else None
+    campos = {}
+    
+    for localizador, seletor in config.LOCALIZADORES[chave_url].items():
+        if indice is not None:
+            valor = indice.resolver(rotulos.get(localizador), ultimo)
+            if valor is not None:
+                campos[localizador] = valor
+                continue
+        
+        elementos = compilar_seletor(seletor)(documento)
+        if elementos:
+            alvo = elementos[-1] if ultimo else elementos[0]
+            campos[localizador] = str(alvo.text_content()).strip()
+        else:
+            campos[localizador] = ""
+    
+    return campos
+
+def itens_lista_presos_html(documento):
+    """
+    Equivalente em lxml de SCRIPT_LISTA_PRESOS.
+    
+    Args:
+        documento: Documento da página da unidade interpretado pelo lxml.html
+    
+    Returns:
+        list: Lista de dicionários {'texto', 'foto'}, um por container de preso
+    """
+    seletor_container = compilar_seletor(config.SELETORES_LISTA_PRESOS['containers_informacoes'])
+    seletor_foto = compilar_seletor(config.SELETORES_LISTA_PRESOS['fotos'])
+    corpo = documento.find('body')
+    itens = []
+    
+    for container in seletor_container(documento):
+        foto = None
+        no = container
+        while no is not None and no is not corpo:
+            if no is not container and len(seletor_container(no)) > 1:
+                break
+            # O XPath compilado (descendant-or-self) busca apenas dentro do bloco atual
+            imagens = seletor_foto(no)
+            if imagens:
+                foto = imagens[0].get('src')
+                break
+            no = no.getparent()
+        itens.append({'texto': str(container.text_content()), 'foto': foto})
+    
+    return itens
+
+def criar_sessao_http(page, num_conexoes=None):
+    """
+    Cria uma sessão HTTP autenticada a partir da página do Playwright.
+    
+    Args:
+        page: Objeto page do Playwright já autenticado pelo Login
+        num_conexoes: Tamanho do pool de conexões persistentes
+    
+    Returns:
+        requests.Session: Sessão com os cookies e o User-Agent do navegador
+    """
+    num_conexoes = num_conexoes or config.NUM_CONEXOES_HTTP
+    sessao = requests.Session()
+    
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=num_conexoes)
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    
+    for cookie in page.context.cookies():
+        sessao.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain', ''),
+            path=cookie.get('path', '/')
+        )
+    
+    sessao.headers['User-Agent'] = page.evaluate("() => navigator.userAgent")
+    return sessao
+
+class ClienteCanaimeHTTP:
+    """Cliente HTTP para as páginas do Canaimé usando uma sessão autenticada."""
+    
+    def __init__(self, sessao, timeout=None, cache=None):
+        self.sessao = sessao
+        self.timeout = timeout or config.TIMEOUT_HTTP
+        self.cache = cache
+    
+    def _baixar(self, url):
+        resposta = self.sessao.get(url, timeout=self.timeout)
+        if resposta.status_code in (401, 403):
+            raise SessaoExpiradaError(f"Sessão expirada (HTTP {resposta.status_code} em {url})")
+        verificar_sessao(resposta.url)
+        resposta.raise_for_status()
+        # Charset declarado no cabeçalho Content-Type: decodificado aqui, como faz o
+        # navegador (o cabeçalho vale mais que o <meta>). Sem ele, os bytes vão para o
+        # lxml, que segue o <meta charset> da página
+        if 'charset=' in resposta.headers.get('Content-Type', '').lower():
+            return resposta.text
+        return resposta.content
+    
+    def obter_html(self, url):
+        """Baixa uma página com a política de novas tentativas (ver src.core.tentativas)."""
+        return retry_em_caso_de_erro(self._baixar, url)
+    
+    def extrair_lista_presos(self, up):
+        """
+        Lê a página da unidade e retorna a lista de registros básicos dos presos.
+        
+        Args:
+            up: Código da unidade prisional
+        
+        Returns:
+            list: Lista de dicionários com os dados da lista de presos
+        """
+        medicoes = obter_medicoes()
+        with medicoes.medir('lista', up=up):
+            with medicoes.medir('navegacao', up=up, familia='URL_UNIDADE'):
+                html = self.obter_html(config.URL_UNIDADE + up)
+            return montar_registros_lista(itens_lista_presos_html(interpretar_html(html)), up)
+    
+    def extrair_detalhes(self, codigo, up=None):
+        """
+        Baixa as páginas de detalhes de um preso e extrai todos os campos.
+        
+        Args:
+            codigo: Código (id_cad_preso) do preso
+            up: Código da unidade prisional (etiqueta das medições)
+        
+        Returns:
+            dict: Dicionário {coluna: texto} com os campos de todas as URLs
+        """
+        medicoes = obter_medicoes()
+        campos = {}
+        
+        # Executado nas threads do pool: o contexto do log é definido aqui
+        with contexto_log(up=up, codigo=codigo):
+            for url in config.LISTA_URLS_INFO_PRESO:
+                chave_url = config.URL_PARA_CHAVE.get(url)
+                if not chave_url or not config.LOCALIZADORES[chave_url]:
+                    continue
+                
+                try:
+                    # Página ainda válida no cache: extrair sem baixar
+                    campos_url = self.cache.obter_campos(chave_url, codigo, EXTRATOR_HTTP) if self.cache is not None else None
+                    html = None
+                    
+                    if campos_url is None:
+                        with medicoes.medir('navegacao', up=up, familia=chave_url, codigo=codigo):
+                            html = self.obter_html(url + codigo)
+                        with medicoes.medir('campos', up=up, familia=chave_url, codigo=codigo):
+                            campos_url = extrair_campos_html(html, chave_url)
+                    
+                    # Os campos extraídos não dependem da gravação no cache
+                    campos.update(campos_url)
+                    if self.cache is not None and html is not None:
+                        try:
+                            self.cache.gravar(chave_url, codigo, html, campos_url, EXTRATOR_HTTP)
+                        except Exception as e:
+                            logger.warning("Não foi possível gravar a página %s do código %s no cache: %s", chave_url, codigo, e)
+                except SessaoExpiradaError:
+                    raise
+                except Exception as e:
+                    logger.error("Erro ao acessar URL %s para o código %s: %s", url, codigo, e)
+        
+        return campos
+
+def verificar_paridade(page, cliente, codigos):
+    """
+    Compara, campo a campo, a extração HTTP com a extração pelo navegador.
+    
+    Args:
+        page: Objeto page do Playwright autenticado
+        cliente: ClienteCanaimeHTTP usando a mesma sessão
+        codigos: Lista de códigos de presos a comparar
+    
+    Returns:
+        dict: Relatório com o total de campos comparados e a lista de divergências
+    """
+    relatorio = {'presos': 0, 'campos': 0, 'divergencias': []}
+    
+    for codigo in codigos:
+        for url in config.LISTA_URLS_INFO_PRESO:
+            chave_url = config.URL_PARA_CHAVE.get(url)
+            if not chave_url or not config.LOCALIZADORES[chave_url]:
+                continue
+            
+            try:
+                retry_em_caso_de_erro(ir_para_url, page, url + codigo)
+                campos_navegador = extrair_campos_pagina(page, chave_url, codigo)
+                campos_http = extrair_campos_html(cliente.obter_html(url + codigo), chave_url)
+            except Exception as e:
+                logger.error("Erro na verificação de paridade da URL %s para o código %s: %s", url, codigo, e)
+                continue
+            
+            for coluna, valor in campos_navegador.items():
+                relatorio['campos'] += 1
+                if campos_http.get(coluna) != valor:
+                    relatorio['divergencias'].append({
+                        'CÓDIGO': codigo,
+                        'COLUNA': coluna,
+                        'NAVEGADOR': valor,
+                        'HTTP': campos_http.get(coluna)
+                    })
+        
+        relatorio['presos'] += 1
+    
+    return relatorio
+
+def listar_presos_up_http(page, caminho_saida=None, interface=None, unidades_selecionadas=None,
+                          modo_teste=False, limite_teste=10, num_conexoes=None, amostra_paridade=0, cache=None,
+                          base_anterior=None, diario=None, formatos_exportacao=None):
+    """
+    Equivalente de listar_presos_up que baixa as páginas por HTTP, sem navegação.
+    
+    Args:
+        page: Objeto page do Playwright já autenticado pelo Login
+        caminho_saida: Caminho opcional para salvar o arquivo Excel
+        interface: Objeto da interface SeletorUnidades para atualizar o progresso
+        unidades_selecionadas: Lista de códigos das unidades a serem processadas. Se None, processa todas.
+        modo_teste: Se True, limita o número de presos por unidade
+        limite_teste: Número máximo de presos a processar por unidade no modo de teste
+        num_conexoes: Número de downloads simultâneos. Se None, usa config.NUM_CONEXOES_HTTP
+        amostra_paridade: Quantidade de presos por unidade a comparar com a extração pelo
+                          navegador (modo sombra). Se 0, não compara.
+        cache: CachePaginas opcional consultado antes de baixar as páginas de detalhes
+        base_anterior: Base de uma execução anterior (modo delta)
+        diario: DiarioExecucao opcional para gravar e retomar os presos concluídos
+        formatos_exportacao: Formatos gravados além do Excel (chaves de config.FORMATOS_EXPORTACAO)
+    
+    Returns:
+        dict: Dicionário com o DataFrame consolidado, a lista de unidades e o caminho do arquivo Excel.
+              Quando há verificação de paridade, inclui também a chave 'paridade'.
+    """
+    usando_interface = interface is not None
+    unidades_para_processar = unidades_selecionadas or config.UNIDADES_PRISIONAIS
+    total_unidades = len(unidades_para_processar)
+    num_conexoes = num_conexoes or config.NUM_CONEXOES_HTTP
+    
+    cliente = ClienteCanaimeHTTP(criar_sessao_http(page, num_conexoes), cache=cache)
+    paridade = {'presos': 0, 'campos': 0, 'divergencias': []}
+    dfs_unidades = {}
+    
+    with ThreadPoolExecutor(max_workers=num_conexoes) as executor:
+        for i, up in enumerate(unidades_para_processar):
+            percentual = (i / total_unidades) * 100
+            mensagem = f"Processando unidade: {up} ({i+1}/{total_unidades})"
+            
+            if usando_interface:
+                interface.atualizar_progresso(mensagem, percentual)
+                
+                if interface.verificar_cancelamento():
+                    logger.info("Processamento cancelado pelo usuário")
+                    return None
+            else:
+                logger.info(mensagem)
+            
+            registros = cliente.extrair_lista_presos(up)
+            
+            if modo_teste and limite_teste > 0:
+                msg_limite = f"MODO TESTE: Limitando a {limite_teste} presos na unidade {up} (total disponível: {len(registros)})"
+                logger.info(msg_limite, extra={'up': up})
+                if usando_interface:
+                    interface.atualizar_progresso(msg_limite, percentual)
+                registros = registros[:limite_teste]
+            
+            # Modo sombra: comparar uma amostra com a extração pelo navegador
+            if amostra_paridade and registros:
+                amostra = random.sample(registros, min(amostra_paridade, len(registros)))
+                if usando_interface:
+                    interface.atualizar_progresso(f"Verificando paridade HTTP x navegador: {up} ({len(amostra)} presos)", percentual)
+                relatorio = verificar_paridade(page, cliente, [registro['CÓDIGO'] for registro in amostra])
+                paridade['presos'] += relatorio['presos']
+                paridade['campos'] += relatorio['campos']
+                paridade['divergencias'].extend(relatorio['divergencias'])
+            
+            if usando_interface:
+                interface.atualizar_progresso(f"Coletando detalhes dos presos da unidade {up}", percentual)
+            
+            presos = RegistrosUnidade(up, registros)
+            if base_anterior is not None:
+                codigos_detalhes, _ = aplicar_delta(presos, base_anterior)
+            else:
+                codigos_detalhes = presos.codigos()
+            if diario is not None:
+                codigos_detalhes = diario.retomar(presos, codigos_detalhes)
+            
+            futuros = {executor.submit(cliente.extrair_detalhes, codigo, up): codigo for codigo in codigos_detalhes}
+            
+            try:
+                for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+                    codigo = futuros[futuro]
+                    presos.atualizar(codigo, futuro.result())
+                    logger.debug("Preso processado: %s - %s", codigo, presos.obter(codigo, 'NOME'))
+                    if diario is not None:
+                        diario.registrar_preso(up, presos.registro(codigo))
+                    
+                    if usando_interface and concluidos % 5 == 0:
+                        sub_percentual = percentual + ((concluidos / len(futuros)) * 100 / total_unidades)
+                        interface.atualizar_progresso(f"Extraindo detalhes: {up} - Preso {concluidos}/{len(futuros)}", sub_percentual)
+                        
+                        if interface.verificar_cancelamento():
+                            logger.info("Processamento cancelado pelo usuário")
+                            return None
+            finally:
+                for futuro in futuros:
+                    futuro.cancel()
+            
+            dfs_unidades[up] = presos.para_dataframe()
+    
+    if amostra_paridade:
+        logger.info("Paridade HTTP x navegador: %d presos, %d campos comparados, %d divergências",
+                    paridade['presos'], paridade['campos'], len(paridade['divergencias']))
+        for divergencia in paridade['divergencias']:
+            logger.warning("  DIVERGÊNCIA %s [%s]: navegador=%r http=%r", divergencia['CÓDIGO'], divergencia['COLUNA'],
+                           divergencia['NAVEGADOR'], divergencia['HTTP'], extra={'codigo': divergencia['CÓDIGO']})
+    
+    resultado = finalizar_extracao(dfs_unidades, caminho_saida, interface, formatos_exportacao)
+    if resultado is not None and amostra_paridade:
+        resultado['paridade'] = paridade
+    return resultado
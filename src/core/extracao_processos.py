@@ -0,0 +1,283 @@
+"""
+Extração com as unidades distribuídas entre processos, um navegador por processo.
+
+O login é feito uma única vez no processo principal e o estado da sessão
+autenticada (storage_state) é enviado a cada processo do pool, que abre o
+seu próprio Chromium e extrai a unidade com extrair_unidade, como o motor
+síncrono. O progresso, as mensagens do log (registros do src.utils.logger e
+o que for impresso) e os presos concluídos voltam ao processo principal por uma fila do Manager, e o cancelamento é um Event do
+Manager consultado pelos processos entre os presos. O processo principal
+junta as unidades e grava o Excel.
+"""
+import sys
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from playwright.sync_api import sync_playwright
+
+from src.utils import config
+from src.core.cache_paginas import CachePaginas
+from src.core.diario import retomar_presos
+from src.core.tentativas import obter_politica
+from src.core.politica_recursos import obter_politica_recursos
+from src.core.medicao import obter_medicoes
+from src.utils.logger import Logger, contexto_log, encaminhar_registros, reemitir
+from src.core.listar_presos_up import extrair_unidade, finalizar_extracao
+
+# Intervalo, em segundos, entre as leituras da fila de eventos dos processos
+INTERVALO_EVENTOS = 0.2
+
+logger = Logger.get_logger('extracao_processos')
+
+class _InterfaceProcesso:
+    """Interface usada dentro do processo: repassa o progresso da unidade ao processo principal."""
+    
+    def __init__(self, fila, cancelar, up):
+        self.fila = fila
+        self.cancelar = cancelar
+        self.up = up
+    
+    def atualizar_progresso(self, mensagem, percentual=None):
+        self.fila.put(('progresso', self.up, mensagem, percentual))
+    
+    def verificar_cancelamento(self):
+        return self.cancelar.is_set()
+
+class _SaidaProcesso:
+    """Substitui o sys.stdout do processo: cada linha impressa vai para o log do processo principal."""
+    
+    def __init__(self, fila, up):
+        self.fila = fila
+        self.up = up
+        self._pendente = ''
+    
+    def write(self, texto):
+        self._pendente += texto
+        *linhas, self._pendente = self._pendente.split('\n')
+        for linha in linhas:
+            self.fila.put(('log', self.up, linha))
+        return len(texto)
+    
+    def flush(self):
+        if self._pendente:
+            self.fila.put(('log', self.up, self._pendente))
+            self._pendente = ''
+
+class _DiarioProcesso:
+    """Diário usado dentro do processo: os presos concluídos são gravados pelo processo principal."""
+    
+    def __init__(self, fila, registrados):
+        self.fila = fila
+        self.registrados = registrados
+    
+    def retomar(self, presos, codigos):
+        return retomar_presos(presos, codigos, self.registrados)
+    
+    def registrar_preso(self, up, registro):
+        self.fila.put(('preso', up, registro))
+
+def _extrair_unidade_processo(up, estado_sessao, opcoes, fila, cancelar):
+    """
+    Extrai uma unidade em um processo do pool, com um navegador próprio.
+    
+    Args:
+        up: Código da unidade prisional
+        estado_sessao: Estado da sessão autenticada (storage_state) exportado após o login
+        opcoes: Dicionário com modo_teste, limite_teste, headless, cache (argumentos do
+                CachePaginas ou None), base_anterior e registrados (presos da unidade já
+                gravados no diário, ou None sem diário) e guardar_intervalos (trace pedido)
+        fila: Fila do Manager para progresso, log e presos concluídos
+        cancelar: Event do Manager marcado quando o usuário cancela
+    
+    Returns:
+        tuple: (unidade, DataFrame da unidade ou None se cancelado, dicionário com as
+                estatísticas do cache ('cache', None sem cache), das novas tentativas
+                ('tentativas'), da política de recursos ('recursos') e as medições
+                ('medicoes', de Medicoes.estado))
+    """
+    sys.stdout = _SaidaProcesso(fila, up)
+    # Mensagens do log gravadas pelo processo principal (um único arquivo rotativo)
+    encaminhar_registros(lambda registro: fila.put(('registro', up, registro)))
+    # O processo do pool pode ser reaproveitado: as estatísticas devolvidas são só desta unidade
+    obter_politica().reiniciar()
+    obter_politica_recursos().reiniciar()
+    obter_medicoes().reiniciar(guardar_intervalos=opcoes['guardar_intervalos'])
+    interface = _InterfaceProcesso(fila, cancelar, up)
+    diario = _DiarioProcesso(fila, opcoes['registrados']) if opcoes['registrados'] is not None else None
+    cache = CachePaginas(**opcoes['cache']) if opcoes['cache'] is not None else None
+    presos = None
+    
+    try:
+        with sync_playwright() as p:
+            navegador = p.chromium.launch(headless=opcoes['headless'])
+            try:
+                contexto = navegador.new_context(storage_state=estado_sessao)
+                contexto.set_default_timeout(config.TIMEOUT)
+                
+                # Bloquear os recursos que a extração não usa e servir os estáticos do disco
+                obter_politica_recursos().aplicar(contexto)
+                
+                with contexto_log(up=up):
+                    presos = extrair_unidade(
+                        contexto.new_page(),
+                        up,
+                        interface=interface,
+                        modo_teste=opcoes['modo_teste'],
+                        limite_teste=opcoes['limite_teste'],
+                        cache=cache,
+                        base_anterior=opcoes['base_anterior'],
+                        diario=diario
+                    )
+            finally:
+                navegador.close()
+    finally:
+        estatisticas = {
+            'cache': dict(cache.estatisticas) if cache is not None else None,
+            'tentativas': obter_politica().estatisticas,
+            'recursos': obter_politica_recursos().estatisticas,
+            'medicoes': obter_medicoes().estado()
+        }
+        if cache is not None:
+            cache.fechar()
+        sys.stdout.flush()
+    
+    return up, None if presos is None else presos.para_dataframe(), estatisticas
+
+def listar_presos_up_processos(page, caminho_saida=None, interface=None, unidades_selecionadas=None,
+                               modo_teste=False, limite_teste=10, num_processos=None, headless=True, cache=None,
+                               base_anterior=None, diario=None, formatos_exportacao=None):
+    """
+    Equivalente de listar_presos_up com as unidades extraídas em processos paralelos.
+    
+    Args:
+        page: Objeto page do Playwright (síncrono) já autenticado pelo Login
+        caminho_saida: Caminho opcional para salvar o arquivo Excel
+        interface: Objeto da interface SeletorUnidades para atualizar o progresso
+        unidades_selecionadas: Lista de códigos das unidades a serem processadas. Se None, processa todas.
+        modo_teste: Se True, limita o número de presos por unidade
+        limite_teste: Número máximo de presos a processar por unidade no modo de teste
+        num_processos: Quantidade de processos (navegadores), limitada a
+                       config.MAX_PROCESSOS_UNIDADES. Se None, usa config.NUM_PROCESSOS_UNIDADES
+        headless: Se False, exibe os navegadores durante a execução
+        cache: CachePaginas opcional; cada processo abre o mesmo banco com as mesmas opções
+        base_anterior: Base de uma execução anterior (modo delta)
+        diario: DiarioExecucao opcional para gravar e retomar os presos concluídos
+        formatos_exportacao: Formatos gravados além do Excel (chaves de config.FORMATOS_EXPORTACAO)
+    
+    Returns:
+        dict: O mesmo resultado de finalizar_extracao
+    """
+    usando_interface = interface is not None
+    unidades_para_processar = unidades_selecionadas or config.UNIDADES_PRISIONAIS
+    total_unidades = len(unidades_para_processar)
+    num_processos = max(1, min(num_processos or config.NUM_PROCESSOS_UNIDADES,
+                               config.MAX_PROCESSOS_UNIDADES, total_unidades))
+    
+    estado_sessao = page.context.storage_state()
+    opcoes_cache = None
+    if cache is not None:
+        opcoes_cache = {
+            'caminho': cache.caminho,
+            'tamanho_maximo_mb': cache.tamanho_maximo / (1024 * 1024),
+            'ttl': cache.ttl,
+            'forcar_atualizacao': cache.forcar_atualizacao
+        }
+    
+    progresso = {up: 0 for up in unidades_para_processar}
+    dfs_coletados = {}
+    erro = None
+    
+    def tratar_evento(evento):
+        tipo, up = evento[0], evento[1]
+        if tipo == 'registro':
+            reemitir(evento[2])
+        elif tipo == 'log':
+            logger.info("[%s] %s", up, evento[2], extra={'up': up})
+        elif tipo == 'preso':
+            if diario is not None:
+                diario.registrar_preso(up, evento[2])
+        elif usando_interface:
+            mensagem, percentual = evento[2], evento[3]
+            if percentual is not None:
+                progresso[up] = percentual
+                percentual = sum(progresso.values()) / total_unidades
+            interface.atualizar_progresso(mensagem, percentual)
+    
+    def consumir_eventos(fila):
+        while True:
+            try:
+                tratar_evento(fila.get_nowait())
+            except queue.Empty:
+                return
+    
+    logger.info("Extração com %d processos (um navegador por processo) para %d unidades", num_processos, total_unidades)
+    
+    # spawn: os processos não herdam as threads do Tkinter nem do Playwright
+    contexto_mp = multiprocessing.get_context('spawn')
+    with contexto_mp.Manager() as manager:
+        fila = manager.Queue()
+        cancelar = manager.Event()
+        
+        with ProcessPoolExecutor(max_workers=num_processos, mp_context=contexto_mp) as executor:
+            pendentes = set()
+            for up in unidades_para_processar:
+                opcoes = {
+                    'modo_teste': modo_teste,
+                    'limite_teste': limite_teste,
+                    'headless': headless,
+                    'cache': opcoes_cache,
+                    'base_anterior': base_anterior,
+                    'registrados': diario.presos_registrados(up) if diario is not None else None,
+                    'guardar_intervalos': obter_medicoes().guardar_intervalos
+                }
+                pendentes.add(executor.submit(_extrair_unidade_processo, up, estado_sessao, opcoes, fila, cancelar))
+            
+            while pendentes:
+                concluidos, pendentes = wait(pendentes, timeout=INTERVALO_EVENTOS, return_when=FIRST_COMPLETED)
+                consumir_eventos(fila)
+                
+                for futuro in concluidos:
+                    if futuro.cancelled():
+                        continue
+                    if futuro.exception() is not None:
+                        # Interrompe as demais unidades e relança o erro ao final
+                        erro = erro or futuro.exception()
+                        cancelar.set()
+                        continue
+                    
+                    up, df, estatisticas = futuro.result()
+                    obter_politica().somar(estatisticas['tentativas'])
+                    obter_politica_recursos().somar(estatisticas['recursos'])
+                    obter_medicoes().somar(estatisticas['medicoes'])
+                    if df is not None:
+                        dfs_coletados[up] = df
+                        progresso[up] = 100
+                        if usando_interface:
+                            interface.atualizar_progresso(
+                                f"Unidade {up} concluída ({len(dfs_coletados)}/{total_unidades})",
+                                sum(progresso.values()) / total_unidades
+                            )
+                    if cache is not None and estatisticas['cache'] is not None:
+                        for chave, valor in estatisticas['cache'].items():
+                            cache.estatisticas[chave] += valor
+                
+                # Cancelamento: unidades ainda na fila não começam e as em andamento param no próximo preso
+                if usando_interface and not cancelar.is_set() and interface.verificar_cancelamento():
+                    logger.info("Processamento cancelado pelo usuário")
+                    cancelar.set()
+                if cancelar.is_set():
+                    for futuro in pendentes:
+                        futuro.cancel()
+        
+        consumir_eventos(fila)
+    
+    if erro is not None:
+        raise erro
+    # Alguma unidade não concluída: o usuário cancelou
+    if any(up not in dfs_coletados for up in unidades_para_processar):
+        return None
+    
+    # Unidades na ordem selecionada, como nos demais motores
+    dfs_unidades = {up: dfs_coletados[up] for up in unidades_para_processar}
+    return finalizar_extracao(dfs_unidades, caminho_saida, interface, formatos_exportacao)
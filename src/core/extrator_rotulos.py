@@ -0,0 +1,131 @@
+"""
+Extração por rótulos das páginas de detalhes do Canaimé.
+
+Em vez de um seletor posicional por coluna (tr:nth-child(25) ...), a página
+é percorrida uma única vez montando pares (rótulo, valor): o texto que
+antecede cada elemento .titulobk na mesma linha da tabela é o seu rótulo.
+As colunas são então resolvidas pelo rótulo configurado em config.ROTULOS,
+de modo que uma linha a mais na tabela não desalinha os campos. O rótulo da
+página precisa ser igual a um dos configurados (após normalizar acentos,
+maiúsculas e ':'); colunas sem rótulo configurado ou não encontrado continuam
+usando o seletor posicional. Ativada por config.EXTRACAO_POR_ROTULOS.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from src.utils import config
+
+# Classe dos elementos que contêm os valores nas páginas do Canaimé
+CLASSE_VALOR = 'titulobk'
+
+# Função executada no navegador: devolve a lista de pares [rótulo, valor] da página
+SCRIPT_PARES_ROTULOS = """
+() => {
+    const pares = [];
+    let buffer = [];
+    const percorrer = (no) => {
+        for (const filho of no.childNodes) {
+            if (filho.nodeType === Node.TEXT_NODE) {
+                const texto = filho.nodeValue.trim();
+                if (texto) buffer.push(texto);
+            } else if (filho.nodeType === Node.ELEMENT_NODE) {
+                if (filho.tagName === 'SCRIPT' || filho.tagName === 'STYLE') continue;
+                if (filho.classList.contains('%s')) {
+                    if (buffer.length) pares.push([buffer.join(' '), filho.textContent || '']);
+                    buffer = [];
+                } else {
+                    if (filho.tagName === 'TR') buffer = [];
+                    percorrer(filho);
+                }
+            }
+        }
+    };
+    if (document.body) percorrer(document.body);
+    return pares;
+}
+""" % CLASSE_VALOR
+
+@lru_cache(maxsize=1024)
+def normalizar_rotulo(texto):
+    """
+    Normaliza um rótulo para comparação: maiúsculas, sem acentos, sem ':' e
+    com espaços simples.
+    """
+    texto = unicodedata.normalize('NFD', texto)
+    texto = ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
+    texto = texto.replace(':', ' ')
+    return re.sub(r'\s+', ' ', texto).strip().upper()
+
+def pares_rotulos_html(documento):
+    """
+    Equivalente em lxml de SCRIPT_PARES_ROTULOS.
+    
+    Args:
+        documento: Documento interpretado pelo lxml.html
+    
+    Returns:
+        list: Lista de pares [rótulo, valor] na ordem do documento
+    """
+    pares = []
+    buffer = []
+    
+    def acumular(texto):
+        if texto and texto.strip():
+            buffer.append(texto.strip())
+    
+    def percorrer(elemento):
+        acumular(elemento.text)
+        for filho in elemento:
+            # Comentários e instruções de processamento não têm tag em texto
+            if isinstance(filho.tag, str):
+                tag = filho.tag.lower()
+                if tag in ('script', 'style'):
+                    pass
+                elif CLASSE_VALOR in (filho.get('class') or '').split():
+                    if buffer:
+                        pares.append([' '.join(buffer), str(filho.text_content())])
+                    buffer.clear()
+                else:
+                    if tag == 'tr':
+                        buffer.clear()
+                    percorrer(filho)
+            acumular(filho.tail)
+    
+    corpo = documento.find('body')
+    percorrer(corpo if corpo is not None else documento)
+    return pares
+
+class IndiceRotulos:
+    """Mapa rótulo → valores de uma página, montado em uma única passada."""
+    
+    __slots__ = ('exatos',)
+    
+    def __init__(self, pares):
+        # Só correspondência exata: um trecho do rótulo ("NASCIMENTO" em "LOCAL DE
+        # NASCIMENTO") levaria o valor para a coluna errada sem nenhum erro
+        self.exatos = {}
+        for rotulo, valor in pares:
+            self.exatos.setdefault(normalizar_rotulo(rotulo), []).append(valor)
+    
+    def resolver(self, rotulos, ultimo=False):
+        """
+        Busca o valor de uma coluna pelos seus rótulos possíveis.
+        
+        Args:
+            rotulos: Rótulo ou tupla de rótulos alternativos (config.ROTULOS)
+            ultimo: Se True, usa a última ocorrência do rótulo; senão a primeira
+        
+        Returns:
+            str: Valor encontrado (com strip) ou None se nenhum rótulo existir na página
+        """
+        if not rotulos:
+            return None
+        if isinstance(rotulos, str):
+            rotulos = (rotulos,)
+        
+        for rotulo in rotulos:
+            valores = self.exatos.get(normalizar_rotulo(rotulo))
+            if valores:
+                return (valores[-1] if ultimo else valores[0]).strip()
+        return None
@@ -1,17 +1,42 @@
 from src.utils import config
+from src.core.plano_extracao import obter_plano
+from src.core.registros import RegistrosUnidade
+from src.core.normalizacao import normalizar_dados
+from src.core.delta import aplicar_delta
+from src.core.exportacao import exportar_excel, exportar_formatos, UnidadesConsolidado
+from src.core.tentativas import obter_politica, verificar_sessao, SessaoExpiradaError
+from src.core.politica_recursos import navegar
+from src.core.medicao import obter_medicoes
+from src.utils.logger import Logger, contexto_log
 import pandas as pd
 import os
 import sys
 from datetime import datetime
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import time
 import re
 
-# Número máximo de tentativas para operações de rede
-MAX_TENTATIVAS = 3
-# Tempo de espera entre tentativas em segundos
-TEMPO_ESPERA = 2
+logger = Logger.get_logger('listar_presos_up')
+
+# Função executada no navegador sobre todos os containers da lista de presos.
+# Para cada container, sobe pelo DOM até o menor bloco que contenha uma foto;
+# se o bloco já contiver outro preso, o container fica sem foto.
+SCRIPT_LISTA_PRESOS = """
+(containers, [seletorContainer, seletorFoto]) => {
+    return containers.map(container => {
+        let foto = null;
+        let no = container;
+        while (no && no !== document.body) {
+            if (no !== container && no.querySelectorAll(seletorContainer).length > 1) break;
+            const img = no.matches(seletorFoto) ? no : no.querySelector(seletorFoto);
+            if (img) {
+                foto = img.getAttribute('src');
+                break;
+            }
+            no = no.parentElement;
+        }
+        return {texto: container.textContent, foto: foto};
+    });
+}
+"""
 
 def formatar_data(data_str):
     """
@@ -19,7 +44,7 @@ def formatar_data(data_str):
     
     Args:
         data_str: String com a data em qualquer formato
-        
+    
     Returns:
         String formatada como dd/mm/aaaa ou string original se não for possível formatar
     """
@@ -69,7 +94,7 @@ def calcular_idade(data_nascimento):
     
     Args:
         data_nascimento: String com a data de nascimento no formato dd/mm/aaaa
-        
+    
     Returns:
         Idade em anos ou string vazia se não for possível calcular
     """
@@ -97,7 +122,7 @@ def tratar_ala_cela(ala_cela_str):
     
     Args:
         ala_cela_str: String com informações de ala e cela (ex: "ALA: ENTRADA / 407")
-        
+    
     Returns:
         Tupla com (ala, cela)
     """
@@ -138,30 +163,296 @@ def tratar_sentenca_dias(sentenca_str):
     
     return sentenca_str.replace(" DIAS", "").strip()
 
+def montar_link_foto(foto):
+    """
+    Converte o atributo src de uma foto da lista de presos em um link absoluto.
+    
+    Args:
+        foto: Valor do atributo src da imagem
+    
+    Returns:
+        String com o link completo da foto ou string vazia se o formato não for reconhecido
+    """
+    if not foto or not isinstance(foto, str):
+        # Se não puder extrair o caminho, retorna link vazio
+        return ""
+    
+    # Tenta extrair o ID da foto de várias maneiras possíveis
+    if "../../fotos/presos/" in foto:
+        # Formato padrão encontrado no HTML
+        caminho_relativo = foto.split("../../fotos/presos/")[-1]
+        return config.INICIO_URL_FOTOS + caminho_relativo
+    elif "/fotos/presos/" in foto:
+        # Alternativa se o caminho estiver em formato diferente
+        caminho_relativo = foto.split("/fotos/presos/")[-1]
+        return config.INICIO_URL_FOTOS + caminho_relativo
+    elif foto.endswith(".jpg") or foto.endswith(".png") or foto.endswith(".jpeg"):
+        # Se apenas temos o nome do arquivo, usamos diretamente
+        return config.INICIO_URL_FOTOS + foto
+    
+    logger.warning("AVISO: Formato de foto não reconhecido: %s", foto)
+    return ""
+
+def extrair_lista_presos(page, up):
+    """
+    Lê a lista de presos da página da unidade em uma única chamada ao navegador.
+    
+    Cada container de preso é associado à foto do seu próprio bloco no DOM
+    (ver SCRIPT_LISTA_PRESOS), e não pela posição na lista de imagens.
+    
+    Args:
+        page: Objeto page do Playwright já posicionado na página da unidade
+        up: Código da unidade prisional
+    
+    Returns:
+        list: Lista de registros (dict) com os dados da lista de presos
+    """
+    itens = retry_em_caso_de_erro(
+        page.eval_on_selector_all,
+        config.SELETORES_LISTA_PRESOS['containers_informacoes'],
+        SCRIPT_LISTA_PRESOS,
+        [config.SELETORES_LISTA_PRESOS['containers_informacoes'], config.SELETORES_LISTA_PRESOS['fotos']]
+    )
+    return montar_registros_lista(itens, up)
+
+def montar_registros_lista(itens, up):
+    """
+    Converte os itens {'texto', 'foto'} da lista de presos em registros.
+    
+    Args:
+        itens: Lista de dicionários com o texto do container e o src da sua foto
+        up: Código da unidade prisional
+    
+    Returns:
+        list: Lista de registros (dict) com os dados da lista de presos
+    """
+    sem_foto = sum(1 for item in itens if not item.get('foto'))
+    logger.info("Encontrados %d presos na unidade %s", len(itens), up, extra={'up': up})
+    if sem_foto:
+        logger.warning("AVISO: %d presos sem foto na unidade %s", sem_foto, up, extra={'up': up})
+    
+    return [interpretar_container(item['texto'], up, montar_link_foto(item.get('foto'))) for item in itens]
+
+def interpretar_container(texto, up, link=""):
+    """
+    Converte o texto de um container da lista de presos em um registro.
+    
+    Args:
+        texto: Conteúdo textual do container (código, nome, mãe, CPF e ala/cela em linhas)
+        up: Código da unidade prisional
+        link: Link da foto do preso
+    
+    Returns:
+        dict: Registro com as colunas da lista de presos
+    """
+    codigo, nome, mae, cpf, ala_cela = texto.split('\n')
+    
+    # Aplicar strip para remover espaços extras
+    ala, cela = tratar_ala_cela(ala_cela)
+    return {
+        'UP': up,
+        'CÓDIGO': codigo[2:].strip(), 
+        'NOME': nome.strip(), 
+        'MÃE': tratar_mae(mae), 
+        'CPF': tratar_cpf(cpf), 
+        'ALA': ala, 
+        'CELA': cela, 
+        'FOTO': link
+    }
+
 def retry_em_caso_de_erro(func, *args, **kwargs):
     """
-    Função para retentar operações em caso de erro de rede.
+    Executa uma operação de rede com a política de novas tentativas da execução.
+    
+    Só timeouts e erros de navegação são tentados de novo (ver src.core.tentativas).
     
     Args:
         func: A função a ser executada
         *args, **kwargs: Argumentos para a função
-        
+    
     Returns:
-        O resultado da função ou None em caso de falha após as tentativas
+        O resultado da função, relançando a exceção quando não há nova tentativa
     """
-    for tentativa in range(MAX_TENTATIVAS):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            if tentativa < MAX_TENTATIVAS - 1:
-                print(f"Erro na tentativa {tentativa+1}/{MAX_TENTATIVAS}: {str(e)}")
-                print(f"Tentando novamente em {TEMPO_ESPERA} segundos...")
-                time.sleep(TEMPO_ESPERA)
-            else:
-                print(f"Falha após {MAX_TENTATIVAS} tentativas: {str(e)}")
-                raise
+    return obter_politica().executar(func, *args, **kwargs)
+
+def ir_para_url(page, url):
+    """
+    Navega para uma URL (com o evento de carregamento da política de recursos)
+    e verifica se a sessão continua válida.
+    
+    Raises:
+        SessaoExpiradaError: Se a navegação terminou na tela de login
+    """
+    resposta = navegar(page, url)
+    verificar_sessao(page.url)
+    return resposta
+
+def extrair_campos_pagina(page, chave_url, codigo=""):
+    """
+    Extrai da página atual todos os campos configurados para uma URL.
+    
+    Todos os localizadores da URL são avaliados em uma única chamada ao
+    navegador (ver src.core.plano_extracao). Os localizadores das chaves em
+    config.LOCALIZADORES_ULTIMO_ELEMENTO usam o último elemento encontrado;
+    os demais usam o primeiro.
+    
+    Args:
+        page: Objeto page do Playwright já posicionado na URL de detalhes
+        chave_url: Chave da URL no dicionário config.LOCALIZADORES
+        codigo: Código do preso (usado nas mensagens de erro)
+    
+    Returns:
+        dict: Dicionário {coluna: texto} com os campos extraídos com sucesso
+    """
+    plano = obter_plano(chave_url)
+    campos, invalidos = retry_em_caso_de_erro(plano.executar, page)
+    
+    for localizador in invalidos:
+        tipo_item = "último" if chave_url in config.LOCALIZADORES_ULTIMO_ELEMENTO else "primeiro"
+        logger.warning("Erro ao obter %s (%s) na URL %s para o código %s: seletor inválido", localizador, tipo_item, chave_url, codigo)
+    
+    return campos
+
+def extrair_unidade(page, up, interface=None, percentual=0, peso=100, modo_teste=False, limite_teste=10,
+                    cache=None, base_anterior=None, diario=None):
+    """
+    Extrai a lista e os detalhes dos presos de uma unidade.
+    
+    Args:
+        page: Objeto page do Playwright para navegação
+        up: Código da unidade prisional
+        interface: Objeto com atualizar_progresso e verificar_cancelamento (SeletorUnidades)
+        percentual: Progresso total no início da unidade
+        peso: Parcela do progresso total correspondente à unidade
+        modo_teste: Se True, limita o número de presos da unidade
+        limite_teste: Número máximo de presos a processar no modo de teste
+        cache: CachePaginas opcional consultado antes de navegar para as páginas de detalhes
+        base_anterior: Base de uma execução anterior (modo delta)
+        diario: DiarioExecucao opcional para gravar e retomar os presos concluídos
+    
+    Returns:
+        RegistrosUnidade: Registros da unidade, ou None se o usuário cancelar
+    """
+    usando_interface = interface is not None
+    medicoes = obter_medicoes()
+    
+    # Navegação com retry para lidar com problemas de conexão
+    def navegar_para_url(url):
+        return retry_em_caso_de_erro(ir_para_url, page, url)
+    
+    with medicoes.medir('lista', up=up), contexto_log(up=up):
+        # Navegar para a página da unidade com retry
+        with medicoes.medir('navegacao', up=up, familia='URL_UNIDADE'):
+            navegar_para_url(config.URL_UNIDADE + up)
+        
+        # Obter textos e fotos de todos os presos em uma única chamada ao navegador
+        registros = extrair_lista_presos(page, up)
+    
+    # Atualizar progresso ao iniciar a coleta de dados dos presos
+    if usando_interface:
+        interface.atualizar_progresso(f"Coletando informações de {len(registros)} presos da unidade {up}", percentual)
+    
+    # Se estiver no modo de teste, limita o número de presos a processar
+    if modo_teste and limite_teste > 0:
+        # Log da limitação
+        msg_limite = f"MODO TESTE: Limitando a {limite_teste} presos na unidade {up} (total disponível: {len(registros)})"
+        logger.info(msg_limite, extra={'up': up})
+        if usando_interface:
+            interface.atualizar_progresso(msg_limite, percentual)
+        
+        # Limita a lista de presos ao número definido no modo de teste
+        registros = registros[:limite_teste]
+    
+    # Registros indexados pelo CÓDIGO: cada campo extraído é gravado em O(1)
+    # e o DataFrame da unidade só é criado ao final
+    presos = RegistrosUnidade(up, registros)
+    
+    # Modo delta: só os presos novos ou alterados visitam as páginas de detalhes
+    if base_anterior is not None:
+        codigos_detalhes, _ = aplicar_delta(presos, base_anterior)
+    else:
+        codigos_detalhes = presos.codigos()
+    
+    # Execução retomada: presos já gravados no diário não são extraídos de novo
+    if diario is not None:
+        codigos_detalhes = diario.retomar(presos, codigos_detalhes)
+    total_presos = len(codigos_detalhes)
+    
+    # Atualizar progresso ao iniciar a coleta de informações detalhadas
+    if usando_interface:
+        interface.atualizar_progresso(f"Coletando detalhes dos presos da unidade {up}", percentual)
+    
+    for j, codigo in enumerate(codigos_detalhes):
+        # Atualizar progresso para cada conjunto de detalhes
+        if usando_interface and j % 5 == 0:
+            perc_detalhes = (j / total_presos) * 100
+            sub_percentual = percentual + (perc_detalhes * peso / 100)
+            interface.atualizar_progresso(f"Extraindo detalhes: {up} - Preso {j+1}/{total_presos}", sub_percentual)
+            
+            # Verificar cancelamento
+            if interface.verificar_cancelamento():
+                logger.info("Processamento cancelado pelo usuário")
+                return None
+        
+        # Contexto do log: mensagens e novas tentativas deste preso levam o código
+        with contexto_log(up=up, codigo=codigo):
+            # Iterar por cada URL (página) uma única vez
+            for url in config.LISTA_URLS_INFO_PRESO:
+                # Obter a chave correspondente para o dicionário LOCALIZADORES
+                chave_url = config.URL_PARA_CHAVE.get(url)
+                
+                if not chave_url:
+                    logger.warning("AVISO: URL %s não possui mapeamento para LOCALIZADORES. Pulando.", url)
+                    continue
+                
+                # Verificar se há campos para extrair desta URL
+                if not config.LOCALIZADORES[chave_url]:
+                    continue
+                
+                # Acessar a URL apenas uma vez
+                try:
+                    # Página ainda válida no cache: extrair sem navegar
+                    campos = cache.obter_campos(chave_url, codigo) if cache is not None else None
+                    resposta = None
+                    
+                    if campos is None:
+                        with medicoes.medir('navegacao', up=up, familia=chave_url, codigo=codigo):
+                            resposta = navegar_para_url(url + codigo)
+                        
+                        # Extrair todos os campos desta URL de uma só vez
+                        with medicoes.medir('campos', up=up, familia=chave_url, codigo=codigo):
+                            campos = extrair_campos_pagina(page, chave_url, codigo)
+                    
+                    # Armazenar os valores no registro do preso antes de gravar no cache: uma
+                    # falha do cache (banco bloqueado por outro processo, disco cheio) não os perde
+                    presos.atualizar(codigo, campos)
+                    
+                    if cache is not None and resposta is not None:
+                        try:
+                            cache.gravar(chave_url, codigo, resposta.body(), campos)
+                        except Exception as e:
+                            logger.warning("Não foi possível gravar a página %s do código %s no cache: %s", chave_url, codigo, e)
+                
+                except SessaoExpiradaError:
+                    # Sem sessão nenhuma página seguinte funciona: interrompe a execução
+                    raise
+                except Exception as e:
+                    logger.error("Erro ao acessar URL %s para o código %s: %s", url, codigo, e)
+            
+            # Registrar ID e nome do preso após processar todos os seus detalhes
+            nome_preso = presos.obter(codigo, 'NOME', "Nome não encontrado")
+            # Uma mensagem por preso: DEBUG, descartada sem formatação no nível padrão
+            logger.debug("Preso processado: %s - %s", codigo, nome_preso)
+        
+        # Gravar o preso concluído no diário antes de seguir para o próximo
+        if diario is not None:
+            diario.registrar_preso(up, presos.registro(codigo))
+        if usando_interface:
+            interface.atualizar_progresso(f"Preso processado: {codigo} - {nome_preso}", None)
+    
+    return presos
 
-def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecionadas=None, modo_teste=False, limite_teste=10):
+def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecionadas=None, modo_teste=False, limite_teste=10, cache=None, base_anterior=None, diario=None, formatos_exportacao=None):
     """
     Extrai dados de presos de todas as unidades prisionais e cria um arquivo Excel.
     
@@ -172,14 +463,19 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
         unidades_selecionadas: Lista de códigos das unidades a serem processadas. Se None, processa todas.
         modo_teste: Se True, ativa o modo de teste limitando o número de presos por unidade
         limite_teste: Número máximo de presos a processar por unidade no modo de teste
-        
+        cache: CachePaginas opcional consultado antes de navegar para as páginas de detalhes
+        base_anterior: Base de uma execução anterior (delta.carregar_base_anterior). Se
+                       informada, só os presos novos ou alterados visitam as páginas de detalhes.
+        diario: DiarioExecucao opcional. Cada preso concluído é gravado nele, e os presos
+                já gravados (execução retomada) não visitam as páginas de detalhes.
+        formatos_exportacao: Formatos gravados além do Excel (chaves de config.FORMATOS_EXPORTACAO)
+    
     Returns:
-        dict: Dicionário com DataFrames consolidado, por unidade e caminho do arquivo Excel
+        dict: Dicionário com o DataFrame consolidado, a lista de unidades e o caminho do arquivo Excel
     """
     # Dicionário para armazenar os DataFrames de cada unidade
+    # (o consolidado é montado uma única vez, ao final)
     dfs_unidades = {}
-    # DataFrame para consolidar todas as unidades
-    df_consolidado = pd.DataFrame(columns=config.COLUNAS)
     
     # Verificar se deve usar a interface ou console
     usando_interface = interface is not None
@@ -203,289 +499,96 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
             
             # Verificar se o usuário cancelou o processamento
             if interface.verificar_cancelamento():
-                print("Processamento cancelado pelo usuário")
+                logger.info("Processamento cancelado pelo usuário")
                 return None
         else:
-            print(mensagem)
-        
-        df_presos = pd.DataFrame(columns=config.COLUNAS)
-        
-        # Navegação com retry para lidar com problemas de conexão
-        def navegar_para_url(url):
-            return retry_em_caso_de_erro(page.goto, url)
-        
-        # Navegar para a página da unidade com retry
-        navegar_para_url(config.URL_UNIDADE + up)
-        
-        # Obter todas as fotos e containers de uma vez
-        # Usar .all() para obter todos os elementos de imagem, depois coletar os atributos src individualmente
-        elementos_foto = retry_em_caso_de_erro(page.locator, config.SELETORES_LISTA_PRESOS['fotos']).all()
-        lista_foto = []
-        for elemento in elementos_foto:
-            try:
-                src = retry_em_caso_de_erro(elemento.get_attribute, 'src')
-                if src:
-                    lista_foto.append(src)
-            except Exception as e:
-                print(f"Erro ao obter atributo src: {e}")
-        
-        # Log do número de fotos encontradas
-        print(f"Encontradas {len(lista_foto)} fotos na unidade {up}")
-        
-        lista_containers = retry_em_caso_de_erro(page.locator, config.SELETORES_LISTA_PRESOS['containers_informacoes']).all()
-        print(f"Encontrados {len(lista_containers)} containers de presos na unidade {up}")
-        
-        # Verificar se o número de fotos corresponde ao número de containers
-        if len(lista_foto) != len(lista_containers):
-            mensagem_diferenca = f"AVISO: Número diferente de fotos ({len(lista_foto)}) e presos ({len(lista_containers)}) na unidade {up}"
-            print(mensagem_diferenca)
-            if usando_interface:
-                interface.atualizar_progresso(mensagem_diferenca, percentual)
-            
-            # Se não encontramos nenhuma foto, usar URLs vazias
-            if len(lista_foto) == 0:
-                print(f"ALERTA: Nenhuma foto encontrada para a unidade {up}. Usando links vazios.")
-                lista_link = [""] * len(lista_containers)
-            # Se temos menos fotos que presos, repetir a última foto ou adicionar vazias
-            elif len(lista_foto) < len(lista_containers):
-                ultima_foto = lista_foto[-1] if lista_foto else ""
-                while len(lista_foto) < len(lista_containers):
-                    if ultima_foto:
-                        lista_foto.append(ultima_foto)
-                    else:
-                        lista_foto.append("")
-            # Se temos mais fotos que presos, truncar a lista
-            else:
-                lista_foto = lista_foto[:len(lista_containers)]
-        
-        # Criar lista de links completos para as fotos
-        lista_link = []
-        for foto in lista_foto:
-            if foto and isinstance(foto, str):
-                # Tenta extrair o ID da foto de várias maneiras possíveis
-                if "../../fotos/presos/" in foto:
-                    # Formato padrão encontrado no HTML
-                    caminho_relativo = foto.split("../../fotos/presos/")[-1]
-                    link = config.INICIO_URL_FOTOS + caminho_relativo
-                elif "/fotos/presos/" in foto:
-                    # Alternativa se o caminho estiver em formato diferente
-                    caminho_relativo = foto.split("/fotos/presos/")[-1]
-                    link = config.INICIO_URL_FOTOS + caminho_relativo
-                elif foto.endswith(".jpg") or foto.endswith(".png") or foto.endswith(".jpeg"):
-                    # Se apenas temos o nome do arquivo, usamos diretamente
-                    link = config.INICIO_URL_FOTOS + foto
-                else:
-                    print(f"AVISO: Formato de foto não reconhecido: {foto}")
-                    link = ""
-                
-                lista_link.append(link)
-            else:
-                # Se não puder extrair o caminho, adiciona link vazio
-                lista_link.append("")
-        
-        # Verificar e ajustar os links conforme necessário
-        if len(lista_link) != len(lista_containers):
-            print(f"ALERTA: Número de links ({len(lista_link)}) diferente do número de presos ({len(lista_containers)}). Ajustando...")
-            if len(lista_link) < len(lista_containers):
-                lista_link.extend([""] * (len(lista_containers) - len(lista_link)))
-            else:
-                lista_link = lista_link[:len(lista_containers)]
-        
-        # Atualizar progresso ao iniciar a coleta de dados dos presos
-        if usando_interface:
-            interface.atualizar_progresso(f"Coletando informações de {len(lista_containers)} presos da unidade {up}", percentual)
-        
-        # Se estiver no modo de teste, limita o número de presos a processar
-        if modo_teste and limite_teste > 0:
-            # Log da limitação
-            msg_limite = f"MODO TESTE: Limitando a {limite_teste} presos na unidade {up} (total disponível: {len(lista_containers)})"
-            print(msg_limite)
-            if usando_interface:
-                interface.atualizar_progresso(msg_limite, percentual)
-            
-            # Limita a lista de containers e links ao número definido no modo de teste
-            lista_containers = lista_containers[:limite_teste] if len(lista_containers) > limite_teste else lista_containers
-            lista_link = lista_link[:limite_teste] if len(lista_link) > limite_teste else lista_link
-        
-        # Agora processar os containers junto com seus links correspondentes
-        for index, container_preso in enumerate(lista_containers):
-            # Atualizar progresso para cada grupo de presos (a cada 10)
-            if usando_interface and index % 10 == 0:
-                perc_presos = (index / len(lista_containers)) * 100
-                sub_percentual = percentual + (perc_presos / total_unidades)
-                interface.atualizar_progresso(f"Extraindo dados: {up} - Preso {index+1}/{len(lista_containers)}", sub_percentual)
-                
-                # Verificar cancelamento
-                if interface.verificar_cancelamento():
-                    print("Processamento cancelado pelo usuário")
-                    return None
-            
-            codigo, nome, mae, cpf, ala_cela = container_preso.text_content().split('\n')
-            # Obter a foto correspondente ao índice atual
-            link = lista_link[index] if index < len(lista_link) else ""
-            
-            # Aplicar strip para remover espaços extras
-            codigo = codigo[2:].strip()
-            nome = nome.strip()
-            mae = tratar_mae(mae)
-            cpf = tratar_cpf(cpf)
-            ala, cela = tratar_ala_cela(ala_cela)
-            
-            # Adicionando dados ao DataFrame da unidade
-            novo_registro = {
-                'UP': up,
-                'CÓDIGO': codigo, 
-                'NOME': nome, 
-                'MÃE': mae, 
-                'CPF': cpf, 
-                'ALA': ala, 
-                'CELA': cela, 
-                'FOTO': link
-            }
-            df_presos = pd.concat([df_presos, pd.DataFrame([novo_registro])], ignore_index=True)
-        
-        # Atualizar progresso ao iniciar a coleta de informações detalhadas
-        if usando_interface:
-            interface.atualizar_progresso(f"Coletando detalhes dos presos da unidade {up}", percentual)
-        
-        # Mapeamento de URLs para as chaves no dicionário LOCALIZADORES
-        url_para_chave = {
-            config.URL_FICHA_PRESO: 'URL_FICHA_PRESO',
-            config.URL_CADASTRO: 'URL_CADASTRO',
-            config.URL_INFORMES: 'URL_INFORMES',
-            config.URL_CERTIDAO_CARCERARIA: 'URL_CERTIDAO_CARCERARIA',
-            config.URL_FICHA_CARCERARIA: 'URL_FICHA_CARCERARIA'
-        }
-        
-        for j, codigo in enumerate(df_presos['CÓDIGO']):
-            # Atualizar progresso para cada conjunto de detalhes
-            if usando_interface and j % 5 == 0:
-                perc_detalhes = (j / len(df_presos)) * 100
-                sub_percentual = percentual + (perc_detalhes / total_unidades)
-                interface.atualizar_progresso(f"Extraindo detalhes: {up} - Preso {j+1}/{len(df_presos)}", sub_percentual)
-                
-                # Verificar cancelamento
-                if interface.verificar_cancelamento():
-                    print("Processamento cancelado pelo usuário")
-                    return None
-            
-            # Iterar por cada URL (página) uma única vez
-            for url in config.LISTA_URLS_INFO_PRESO:
-                # Obter a chave correspondente para o dicionário LOCALIZADORES
-                chave_url = url_para_chave.get(url)
-                
-                if not chave_url:
-                    print(f"AVISO: URL {url} não possui mapeamento para LOCALIZADORES. Pulando.")
-                    continue
-                
-                # Verificar se há campos para extrair desta URL
-                if not config.LOCALIZADORES[chave_url]:
-                    continue
-                
-                # Acessar a URL apenas uma vez
-                try:
-                    navegar_para_url(url + codigo)
-                    
-                    # Extrair todos os campos desta URL de uma só vez
-                    for localizador in config.LOCALIZADORES[chave_url]:
-                        try:
-                            elementos = retry_em_caso_de_erro(page.locator, config.LOCALIZADORES[chave_url][localizador])
-                            
-                            if url == config.URL_CERTIDAO_CARCERARIA:
-                                # Para URL_CERTIDAO_CARCERARIA, sempre pegar o último item
-                                if elementos.count() > 0:
-                                    texto = retry_em_caso_de_erro(elementos.last.text_content).strip()
-                                else:
-                                    texto = ""
-                            else:
-                                # Para outras URLs, sempre pegar o primeiro item
-                                if elementos.count() > 0:
-                                    texto = retry_em_caso_de_erro(elementos.first.text_content).strip()
-                                else:
-                                    texto = ""
-                                    
-                            # Armazenar o valor no DataFrame
-                            df_presos.loc[df_presos['CÓDIGO'] == codigo, localizador] = texto
-                            
-                        except Exception as e:
-                            tipo_item = "último" if url == config.URL_CERTIDAO_CARCERARIA else "primeiro"
-                            erro = f"Erro ao obter {localizador} ({tipo_item}) na URL {url} para o código {codigo}: {str(e)}"
-                            print(erro)
-                            
-                except Exception as e:
-                    erro = f"Erro ao acessar URL {url} para o código {codigo}: {str(e)}"
-                    print(erro)
-            
-            # Exibir ID e nome do preso após processar todos os seus detalhes
-            nome_preso = df_presos.loc[df_presos['CÓDIGO'] == codigo, 'NOME'].values[0] if len(df_presos[df_presos['CÓDIGO'] == codigo]) > 0 else "Nome não encontrado"
-            print(f"Preso processado: {codigo} - {nome_preso}")
-            if usando_interface:
-                interface.atualizar_progresso(f"Preso processado: {codigo} - {nome_preso}", None)
+            logger.info(mensagem)
+        
+        presos = extrair_unidade(
+            page,
+            up,
+            interface=interface,
+            percentual=percentual,
+            peso=100 / total_unidades,
+            modo_teste=modo_teste,
+            limite_teste=limite_teste,
+            cache=cache,
+            base_anterior=base_anterior,
+            diario=diario
+        )
+        if presos is None:
+            return None
         
         # Armazena o DataFrame no dicionário
-        dfs_unidades[up] = df_presos.copy()
-        
-        # Adiciona ao DataFrame consolidado
-        df_consolidado = pd.concat([df_consolidado, df_presos], ignore_index=True)
-    
-    # Aplicar tratamentos finais em todos os DataFrames
-    for up, df in dfs_unidades.items():
-        # Formatar datas
-        if 'DATA NASC.' in df.columns:
-            df['DATA NASC.'] = df['DATA NASC.'].apply(formatar_data)
-        
-        if 'DATA PRISÃO' in df.columns:
-            df['DATA PRISÃO'] = df['DATA PRISÃO'].apply(formatar_data)
-        
-        # Calcular idade
-        if 'DATA NASC.' in df.columns:
-            df['IDADE'] = df['DATA NASC.'].apply(calcular_idade)
-        
-        # Tratar sentença dias
-        if 'SENTENÇA DIAS' in df.columns:
-            df['SENTENÇA DIAS'] = df['SENTENÇA DIAS'].apply(tratar_sentenca_dias)
-        
-        # Ordenar o DataFrame por ALA, CELA, NOME
-        if 'ALA' in df.columns and 'CELA' in df.columns and 'NOME' in df.columns:
-            df = df.sort_values(by=['ALA', 'CELA', 'NOME'])
-        
-        # Atualizar o DataFrame no dicionário
-        dfs_unidades[up] = df
+        dfs_unidades[up] = presos.para_dataframe()
     
-    # Também aplicar os mesmos tratamentos ao DataFrame consolidado
-    if 'DATA NASC.' in df_consolidado.columns:
-        df_consolidado['DATA NASC.'] = df_consolidado['DATA NASC.'].apply(formatar_data)
+    return finalizar_extracao(dfs_unidades, caminho_saida, interface, formatos_exportacao)
+
+def consolidar_unidades(dfs_unidades):
+    """
+    Monta o DataFrame consolidado com uma única concatenação.
     
-    if 'DATA PRISÃO' in df_consolidado.columns:
-        df_consolidado['DATA PRISÃO'] = df_consolidado['DATA PRISÃO'].apply(formatar_data)
+    Args:
+        dfs_unidades: Dicionário {unidade: DataFrame}
     
-    if 'DATA NASC.' in df_consolidado.columns:
-        df_consolidado['IDADE'] = df_consolidado['DATA NASC.'].apply(calcular_idade)
+    Returns:
+        DataFrame com os dados de todas as unidades, na ordem do dicionário
+    """
+    if not dfs_unidades:
+        return pd.DataFrame(columns=config.COLUNAS)
+    return pd.concat(list(dfs_unidades.values()), ignore_index=True)
+
+def finalizar_extracao(dfs_unidades, caminho_saida=None, interface=None, formatos_exportacao=None):
+    """
+    Aplica os tratamentos finais aos dados extraídos e cria o arquivo Excel.
     
-    if 'SENTENÇA DIAS' in df_consolidado.columns:
-        df_consolidado['SENTENÇA DIAS'] = df_consolidado['SENTENÇA DIAS'].apply(tratar_sentenca_dias)
+    Compartilhada entre os motores de extração para que todos produzam
+    exatamente o mesmo resultado a partir dos DataFrames coletados.
     
-    # Ordenar o DataFrame consolidado por UP (conforme a ordem em config.UNIDADES_PRISIONAIS), depois ALA, CELA, NOME
-    if len(df_consolidado) > 0:
-        # Criar um mapeamento de UP para posição na lista
-        ordem_up = {up: i for i, up in enumerate(config.UNIDADES_PRISIONAIS)}
-        
-        # Adicionar coluna temporária para ordenação
-        df_consolidado['_ORDEM_UP'] = df_consolidado['UP'].map(ordem_up)
-        
-        # Ordenar o DataFrame
-        colunas_ordenacao = ['_ORDEM_UP']
-        if 'ALA' in df_consolidado.columns:
-            colunas_ordenacao.append('ALA')
-        if 'CELA' in df_consolidado.columns:
-            colunas_ordenacao.append('CELA')
-        if 'NOME' in df_consolidado.columns:
-            colunas_ordenacao.append('NOME')
-        
-        df_consolidado = df_consolidado.sort_values(by=colunas_ordenacao)
-        
-        # Remover a coluna temporária
-        df_consolidado = df_consolidado.drop(columns=['_ORDEM_UP'])
+    Args:
+        dfs_unidades: Dicionário {unidade: DataFrame} com os dados brutos de cada unidade
+        caminho_saida: Caminho opcional para salvar o arquivo Excel
+        interface: Objeto da interface SeletorUnidades para atualizar o progresso
+        formatos_exportacao: Formatos gravados além do Excel, com o mesmo nome de arquivo
+                             (chaves de config.FORMATOS_EXPORTACAO)
+    
+    Returns:
+        dict: 'consolidado' (DataFrame), 'unidades' ({unidade: DataFrame}, montado sob demanda
+              a partir do consolidado), 'caminho_excel' e 'arquivos' dos formatos adicionais,
+              ou None se o usuário cancelar ou a gravação falhar
+    """
+    usando_interface = interface is not None
+    medicoes = obter_medicoes()
+    
+    with medicoes.medir('pos_processamento', presos=sum(len(df) for df in dfs_unidades.values())):
+        # Tratamentos finais aplicados uma única vez, sobre os dados de todas as unidades
+        df_consolidado = normalizar_dados(consolidar_unidades(dfs_unidades))
+        
+        # Ordenar o DataFrame consolidado por UP (conforme a ordem em config.UNIDADES_PRISIONAIS), depois ALA, CELA, NOME
+        if len(df_consolidado) > 0:
+            # Criar um mapeamento de UP para posição na lista
+            ordem_up = {up: i for i, up in enumerate(config.UNIDADES_PRISIONAIS)}
+            
+            # Adicionar coluna temporária para ordenação
+            df_consolidado['_ORDEM_UP'] = df_consolidado['UP'].map(ordem_up)
+            
+            # Ordenar o DataFrame
+            colunas_ordenacao = ['_ORDEM_UP']
+            if 'ALA' in df_consolidado.columns:
+                colunas_ordenacao.append('ALA')
+            if 'CELA' in df_consolidado.columns:
+                colunas_ordenacao.append('CELA')
+            if 'NOME' in df_consolidado.columns:
+                colunas_ordenacao.append('NOME')
+            
+            df_consolidado = df_consolidado.sort_values(by=colunas_ordenacao)
+            
+            # Remover a coluna temporária
+            df_consolidado = df_consolidado.drop(columns=['_ORDEM_UP'])
+    
+    # Abas por unidade lidas do consolidado já tratado e ordenado na exportação
+    # (a ordenação é estável, então cada unidade fica ordenada por ALA, CELA, NOME)
+    unidades = list(dfs_unidades)
     
     # Atualizar a interface indicando que o processamento foi concluído
     if usando_interface:
@@ -497,6 +600,11 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
         nome_arquivo = f"Informações_Presos_{data_hora}.xlsx"
         
         if usando_interface:
+            # Tkinter importado só para os diálogos: a linha de comando (src.cli)
+            # informa o caminho de saída e não carrega a interface
+            import tkinter as tk
+            from tkinter import filedialog
+            
             # Exibe diálogo para escolher onde salvar o arquivo
             root = tk.Tk()
             root.withdraw()  # Esconde a janela principal
@@ -512,10 +620,10 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
             if not caminho_saida:
                 if usando_interface:
                     interface.atualizar_progresso("Operação cancelada pelo usuário.", 0)
-                print("Usuário cancelou seleção. Operação cancelada.")
+                logger.info("Usuário cancelou seleção. Operação cancelada.")
                 return None
         else:
-            caminho_saida = os.path.join(config.BASE_DIR, '..', 'output', nome_arquivo)
+            caminho_saida = os.path.join(config.DIRETORIO_DADOS, 'output', nome_arquivo)
         
         # Garante que o diretório de saída exista, se for um caminho padrão
         if os.path.dirname(caminho_saida) and not os.path.exists(os.path.dirname(caminho_saida)):
@@ -525,44 +633,37 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
     try:
         if usando_interface:
             interface.atualizar_progresso("Criando arquivo Excel...", 98)
-            
-        with pd.ExcelWriter(caminho_saida, engine='xlsxwriter') as writer:
-            # Primeira aba é o consolidado
-            if len(dfs_unidades) > 1:
-                df_consolidado.to_excel(writer, sheet_name='Consolidado', index=False)
-            
-            # Uma aba para cada unidade sem a coluna UP
-            for up, df in dfs_unidades.items():
-                # Remove a coluna UP para as abas individuais
-                df_sem_up = df.drop(columns=['UP'])
-                df_sem_up.to_excel(writer, sheet_name=up, index=False)
+        
+        # Consolidado e uma aba por unidade gravados linha a linha (constant_memory)
+        with medicoes.medir('excel'):
+            exportar_excel(caminho_saida, df_consolidado, unidades)
         
         if usando_interface:
             interface.atualizar_progresso(f"Arquivo Excel criado com sucesso: {caminho_saida}", 100)
-        print(f"Arquivo Excel criado com sucesso: {caminho_saida}")
+        logger.info("Arquivo Excel criado com sucesso: %s", caminho_saida)
         
         # Mostrar mensagem de sucesso
         if not usando_interface:
+            from tkinter import messagebox
             messagebox.showinfo("Sucesso", f"Arquivo Excel criado com sucesso!\n\nCaminho: {caminho_saida}")
     except Exception as e:
         erro_msg = f"Erro ao criar arquivo Excel: {e}"
         if usando_interface:
             interface.atualizar_progresso(erro_msg, 0)
-        print(erro_msg)
+        logger.error(erro_msg)
         
         # Tenta salvar em um local alternativo em caso de erro
         try:
             caminho_alternativo = os.path.join(os.path.expanduser('~'), 'presos_unidades_backup.xlsx')
-            with pd.ExcelWriter(caminho_alternativo, engine='xlsxwriter') as writer:
-                if len(dfs_unidades) > 1:
-                    df_consolidado.to_excel(writer, sheet_name='Consolidado', index=False)
+            exportar_excel(caminho_alternativo, df_consolidado, unidades)
             
             msg_backup = f"Arquivo de backup criado em: {caminho_alternativo}"
             if usando_interface:
                 interface.atualizar_progresso(msg_backup, 100)
-            print(msg_backup)
+            logger.warning(msg_backup)
             
             if not usando_interface:
+                from tkinter import messagebox
                 messagebox.showinfo("Backup Criado", f"Arquivo de backup criado em:\n{caminho_alternativo}")
             
             caminho_saida = caminho_alternativo
@@ -570,8 +671,21 @@ def listar_presos_up(page, caminho_saida=None, interface=None, unidades_selecion
             erro_backup = f"Erro ao criar arquivo de backup: {e2}"
             if usando_interface:
                 interface.atualizar_progresso(erro_backup, 0)
-            print(erro_backup)
+            logger.error(erro_backup)
             return None
     
-    return {'consolidado': df_consolidado, 'unidades': dfs_unidades, 'caminho_excel': caminho_saida}
+    # Formatos adicionais: o consolidado gravado uma única vez em cada formato
+    arquivos = {}
+    if formatos_exportacao:
+        if usando_interface:
+            interface.atualizar_progresso("Gravando formatos adicionais...", 99)
+        with medicoes.medir('exportacao', formatos=','.join(formatos_exportacao)):
+            arquivos = exportar_formatos(caminho_saida, df_consolidado, unidades, formatos_exportacao)
+    
+    return {
+        'consolidado': df_consolidado,
+        'unidades': UnidadesConsolidado(df_consolidado, unidades),
+        'caminho_excel': caminho_saida,
+        'arquivos': arquivos
+    }
 
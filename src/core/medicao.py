@@ -0,0 +1,228 @@
+"""
+Medição do tempo das etapas da extração.
+
+Cada etapa (login, lista da unidade, navegação para uma página de detalhes,
+extração dos campos, pós-processamento e gravação do Excel) é registrada
+como um intervalo com o nome da etapa, o processo, o fluxo de execução
+(thread ou tarefa asyncio) e etiquetas como a unidade e a família da URL.
+
+Cada intervalo só atualiza agregados de tamanho fixo: o tempo somado por
+etapa e, para as navegações, um histograma por família de URL (endpoint do
+Canaimé) com faixas logarítmicas, de onde saem os percentis p50/p95/p99 do
+resumo. A lista completa dos intervalos, que cresce com o número de presos,
+só é guardada quando pedida (--trace), para ser exportada no formato JSON do
+Chrome trace, aberto no Perfetto (https://ui.perfetto.dev) ou em
+chrome://tracing.
+"""
+import os
+import json
+import math
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+
+from src.utils import config
+
+# Percentis do resumo das navegações
+PERCENTIS = (50, 95, 99)
+
+# Razão entre faixas vizinhas do histograma: o percentil devolvido fica a menos
+# de 0,5% da duração medida
+RAZAO_FAIXAS = 1.01
+_LOG_RAZAO = math.log(RAZAO_FAIXAS)
+
+def _fluxo():
+    """Identifica o fluxo atual: a tarefa asyncio em execução ou, fora do asyncio, a thread."""
+    try:
+        tarefa = asyncio.current_task()
+    except RuntimeError:
+        tarefa = None
+    return id(tarefa) if tarefa is not None else threading.get_ident()
+
+class Histograma:
+    """Durações agrupadas em faixas logarítmicas: memória fixa, qualquer que seja o número de medidas."""
+    
+    def __init__(self):
+        self.faixas = Counter()
+        self.quantidade = 0
+        self.total = 0
+    
+    def registrar(self, duracao):
+        """Conta uma duração, em nanossegundos."""
+        self.faixas[int(math.log(max(duracao, 1)) / _LOG_RAZAO)] += 1
+        self.quantidade += 1
+        self.total += duracao
+    
+    def somar(self, outro):
+        """Acrescenta as contagens de outro histograma (de outro processo)."""
+        self.faixas.update(outro.faixas)
+        self.quantidade += outro.quantidade
+        self.total += outro.total
+    
+    def percentil(self, p):
+        """
+        Percentil pelo método do posto mais próximo, em nanossegundos.
+        
+        Devolve o centro (geométrico) da faixa que contém o posto.
+        """
+        posicao = max(1, -(-self.quantidade * p // 100))
+        acumulado = 0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= posicao:
+                return RAZAO_FAIXAS ** (faixa + 0.5)
+        return 0
+
+class Medicoes:
+    """Tempos medidos na execução, compartilhados entre threads e tarefas."""
+    
+    def __init__(self, ativo=None):
+        """
+        Args:
+            ativo: Se False, medir não registra nada. Se None, usa config.MEDIR_ETAPAS
+        """
+        self.ativo = config.MEDIR_ETAPAS if ativo is None else ativo
+        self._trava = threading.Lock()
+        self.reiniciar()
+    
+    def reiniciar(self, guardar_intervalos=False):
+        """
+        Descarta as medições (início de uma execução).
+        
+        Args:
+            guardar_intervalos: Se True, guarda também cada intervalo para exportar_trace
+        """
+        with self._trava:
+            self.guardar_intervalos = guardar_intervalos
+            self._etapas = defaultdict(int)
+            self._navegacoes = defaultdict(Histograma)
+            self.intervalos = []
+    
+    @contextmanager
+    def medir(self, etapa, **etiquetas):
+        """
+        Mede o bloco como um intervalo da etapa (também dentro de funções assíncronas).
+        
+        Args:
+            etapa: Nome da etapa ('login', 'lista', 'navegacao', 'campos', 'pos_processamento', 'excel'...)
+            **etiquetas: Etiquetas do intervalo, como up, familia e codigo
+        """
+        if not self.ativo:
+            yield
+            return
+        
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter_ns() - inicio
+            with self._trava:
+                self._etapas[etapa] += duracao
+                if etapa == 'navegacao':
+                    self._navegacoes[etiquetas.get('familia', 'padrao')].registrar(duracao)
+                if self.guardar_intervalos:
+                    self.intervalos.append((etapa, inicio, duracao, os.getpid(), _fluxo(), etiquetas))
+    
+    def estado(self):
+        """Retorna as medições desta execução para somar em outro processo."""
+        with self._trava:
+            return {
+                'etapas': dict(self._etapas),
+                'navegacoes': dict(self._navegacoes),
+                'intervalos': list(self.intervalos)
+            }
+    
+    def somar(self, estado):
+        """Acrescenta as medições de outro processo (retornadas por estado) às desta execução."""
+        with self._trava:
+            for etapa, duracao in estado['etapas'].items():
+                self._etapas[etapa] += duracao
+            for familia, histograma in estado['navegacoes'].items():
+                self._navegacoes[familia].somar(histograma)
+            if self.guardar_intervalos:
+                self.intervalos.extend(estado['intervalos'])
+    
+    def latencias(self):
+        """
+        Latência das navegações por família de URL.
+        
+        Returns:
+            dict: {familia: {'quantidade', 'total', 'p50', 'p95', 'p99'}} com os tempos em segundos
+        """
+        with self._trava:
+            navegacoes = dict(self._navegacoes)
+        
+        resultado = {}
+        for familia, histograma in navegacoes.items():
+            resultado[familia] = {'quantidade': histograma.quantidade, 'total': histograma.total / 1e9}
+            for p in PERCENTIS:
+                resultado[familia][f'p{p}'] = histograma.percentil(p) / 1e9
+        return resultado
+    
+    def tempo_etapas(self):
+        """Tempo somado de cada etapa, em segundos (etapas paralelas somam mais que o tempo da execução)."""
+        with self._trava:
+            return {etapa: duracao / 1e9 for etapa, duracao in self._etapas.items()}
+    
+    def resumo(self):
+        """Retorna um texto com o tempo das etapas e os percentis das navegações por família de URL."""
+        if not self._etapas:
+            return "Medições: nenhuma etapa medida"
+        
+        etapas = ', '.join(f"{etapa}: {total:.1f} s" for etapa, total in sorted(self.tempo_etapas().items(), key=lambda item: -item[1]))
+        linhas = [f"Medições (tempo somado por etapa): {etapas}"]
+        
+        latencias = sorted(self.latencias().items(), key=lambda item: -item[1]['total'])
+        for familia, medidas in latencias:
+            percentis = ' '.join(f"p{p} {medidas[f'p{p}'] * 1000:.0f} ms" for p in PERCENTIS)
+            linhas.append(f"  {familia}: {medidas['quantidade']} navegações, {percentis}, total {medidas['total']:.1f} s")
+        return '\n'.join(linhas)
+    
+    def exportar_trace(self, caminho):
+        """
+        Grava os intervalos no formato JSON do Chrome trace (eventos completos 'X').
+        
+        Cada fluxo de execução vira uma linha (tid) do processo em que foi medido.
+        Só há intervalos quando a execução foi reiniciada com guardar_intervalos.
+        
+        Args:
+            caminho: Caminho do arquivo .json
+        
+        Returns:
+            str: O caminho gravado
+        """
+        with self._trava:
+            intervalos = list(self.intervalos)
+        
+        inicio_execucao = min((inicio for _, inicio, _, _, _, _ in intervalos), default=0)
+        linhas = {}
+        eventos = []
+        for etapa, inicio, duracao, pid, fluxo, etiquetas in intervalos:
+            tid = linhas.setdefault((pid, fluxo), len(linhas) + 1)
+            eventos.append({
+                'name': etapa if 'familia' not in etiquetas else f"{etapa} {etiquetas['familia']}",
+                'cat': etapa,
+                'ph': 'X',
+                'ts': (inicio - inicio_execucao) / 1000,
+                'dur': duracao / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {chave: str(valor) for chave, valor in etiquetas.items()},
+            })
+        for (pid, _), tid in linhas.items():
+            eventos.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': f"fluxo {tid}"}})
+        
+        if os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arquivo)
+        return caminho
+
+# Medições compartilhadas pela execução (motores, threads e tarefas)
+_MEDICOES = Medicoes()
+
+def obter_medicoes():
+    """Retorna as medições da execução atual."""
+    return _MEDICOES
@@ -0,0 +1,184 @@
+"""
+Tratamentos finais vetorizados dos dados extraídos.
+
+Equivalentes em operações de string e data do pandas de formatar_data,
+calcular_idade e tratar_sentenca_dias (listar_presos_up), aplicados uma única
+vez sobre o DataFrame consolidado. Os textos resultantes são idênticos aos das
+funções originais; a coluna IDADE passa a ser inteira (Int64) e
+tipar_colunas devolve uma cópia com as datas em datetime64.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Mesmos padrões de formatar_data, compilados uma única vez pelo pandas
+PADRAO_DIA_MES_ANO = r'(\d{1,2})[/-](\d{1,2})[/-](\d{4}|\d{2})'
+PADRAO_ANO_MES_DIA = r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})'
+
+# Formatos aceitos por calcular_idade ('%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d' e
+# '%Y-%m-%d'), com os mesmos intervalos de dia e mês do strptime
+_DIA = r'(?P<dia>3[01]|[12][0-9]|0[1-9]|[1-9]| [1-9])'
+_MES = r'(?P<mes>1[0-2]|0[1-9]|[1-9])'
+_ANO = r'(?P<ano>[0-9]{4})'
+FORMATOS_NASCIMENTO = [
+    rf'^{_DIA}(?P<sep>[/-]){_MES}(?P=sep){_ANO}$',
+    rf'^{_ANO}(?P<sep>[/-]){_MES}(?P=sep){_DIA}$',
+]
+
+# Colunas de data exportadas como texto dd/mm/aaaa
+COLUNAS_DATA = ['DATA NASC.', 'DATA PRISÃO']
+
+def _textos_validos(serie):
+    """Máscara dos valores que são strings não vazias (os demais não são tratados)."""
+    if serie.dtype != object and not isinstance(serie.dtype, pd.StringDtype):
+        return pd.Series(False, index=serie.index)
+    return serie.str.len().gt(0).fillna(False).astype(bool)
+
+def _por_valores_distintos(funcao):
+    """
+    Faz funcao(serie) trabalhar apenas sobre os valores distintos da coluna.
+    
+    Datas e sentenças se repetem muito entre os presos; o resultado de cada
+    valor distinto é expandido de volta para as linhas pelos códigos do
+    pd.factorize. Valores nulos são mantidos como estão.
+    """
+    def aplicar(serie, *args):
+        codigos, distintos = pd.factorize(serie)
+        if len(distintos) == len(serie):
+            return funcao(serie, *args)
+        
+        resultado = funcao(pd.Series(distintos, dtype=serie.dtype), *args)
+        expandido = resultado.array.take(codigos, allow_fill=True)
+        if resultado.dtype == object:
+            # Nulos (-1 no factorize) voltam com o valor original (None ou NaN)
+            expandido[codigos == -1] = serie.to_numpy(dtype=object)[codigos == -1]
+        return pd.Series(expandido, index=serie.index, name=serie.name)
+    
+    aplicar.__doc__ = funcao.__doc__
+    aplicar.__name__ = funcao.__name__
+    return aplicar
+
+def _substituir(serie, mascara, valores):
+    """Devolve uma cópia de serie (como object) com valores nas posições da máscara."""
+    resultado = serie.astype(object)
+    resultado[mascara] = valores[mascara]
+    return resultado
+
+@_por_valores_distintos
+def formatar_datas(serie):
+    """
+    Formata uma coluna de datas para dd/mm/aaaa.
+    
+    Args:
+        serie: Series com as datas em qualquer formato
+    
+    Returns:
+        Series com o mesmo resultado de formatar_data aplicada a cada valor
+    """
+    validos = _textos_validos(serie)
+    if not validos.any():
+        return serie
+    
+    texto = serie.where(validos).str.strip()
+    
+    # dd/mm/aaaa ou d/m/aa (ano com 2 dígitos vira 20aa)
+    dma = texto.str.extract(PADRAO_DIA_MES_ANO)
+    ano = dma[2].where(dma[2].str.len() != 2, '20' + dma[2])
+    formatado = dma[0].str.zfill(2) + '/' + dma[1].str.zfill(2) + '/' + ano
+    
+    # aaaa/mm/dd, usado apenas quando o primeiro padrão não é encontrado
+    amd = texto.str.extract(PADRAO_ANO_MES_DIA)
+    formatado = formatado.fillna(amd[2].str.zfill(2) + '/' + amd[1].str.zfill(2) + '/' + amd[0])
+    
+    # Formato não reconhecido: texto original sem espaços extras
+    return _substituir(serie, validos, formatado.fillna(texto))
+
+def _partes_nascimento(serie):
+    """
+    Separa dia, mês e ano das datas nos formatos aceitos por calcular_idade.
+    
+    Returns:
+        DataFrame com as colunas inteiras dia, mes e ano (<NA> se o formato não for aceito)
+    """
+    validos = _textos_validos(serie)
+    partes = pd.DataFrame(index=serie.index, columns=['dia', 'mes', 'ano'], dtype='Int64')
+    if not validos.any():
+        return partes
+    
+    texto = serie.where(validos)
+    for padrao in FORMATOS_NASCIMENTO:
+        encontrados = texto.str.extract(padrao)[['dia', 'mes', 'ano']]
+        encontrados = encontrados.apply(lambda coluna: pd.to_numeric(coluna).astype('Int64'))
+        partes = partes.fillna(encontrados)
+    
+    # Datas inexistentes (31/02, 29/02 fora de ano bissexto, ano 0000) são recusadas
+    ano = partes['ano'].fillna(2000).to_numpy(dtype=np.int64)
+    mes = partes['mes'].fillna(1).to_numpy(dtype=np.int64)
+    bissexto = (ano % 4 == 0) & ((ano % 100 != 0) | (ano % 400 == 0))
+    dias_no_mes = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[mes - 1] + ((mes == 2) & bissexto)
+    invalidas = (partes['dia'] > dias_no_mes) | (partes['ano'] < 1)
+    return partes.mask(invalidas.fillna(False).astype(bool))
+
+@_por_valores_distintos
+def calcular_idades(serie, hoje=None):
+    """
+    Calcula a idade a partir de uma coluna de datas de nascimento.
+    
+    Args:
+        serie: Series com as datas de nascimento (já formatadas)
+        hoje: Data de referência; se None, usa a data atual
+    
+    Returns:
+        Series Int64 com as idades, <NA> onde calcular_idade devolveria ""
+    """
+    hoje = hoje or datetime.now()
+    partes = _partes_nascimento(serie)
+    antes_do_aniversario = (partes['mes'] > hoje.month) | ((partes['mes'] == hoje.month) & (partes['dia'] > hoje.day))
+    return (hoje.year - partes['ano'] - antes_do_aniversario.astype('Int64')).rename(serie.name)
+
+@_por_valores_distintos
+def tratar_sentencas(serie):
+    """Remove ' DIAS' da coluna de sentença, como tratar_sentenca_dias."""
+    validos = _textos_validos(serie)
+    if not validos.any():
+        return serie
+    
+    tratado = serie.where(validos).str.replace(' DIAS', '', regex=False).str.strip()
+    return _substituir(serie, validos, tratado)
+
+def normalizar_dados(df, hoje=None):
+    """
+    Aplica os tratamentos finais ao DataFrame de uma só vez.
+    
+    Args:
+        df: DataFrame com os dados brutos (alterado no lugar)
+        hoje: Data de referência para o cálculo da idade; se None, usa a data atual
+    
+    Returns:
+        O próprio DataFrame, com datas formatadas, IDADE em Int64 e sentença sem ' DIAS'
+    """
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns:
+            df[coluna] = formatar_datas(df[coluna])
+    
+    if 'DATA NASC.' in df.columns:
+        df['IDADE'] = calcular_idades(df['DATA NASC.'], hoje)
+    
+    if 'SENTENÇA DIAS' in df.columns:
+        df['SENTENÇA DIAS'] = tratar_sentencas(df['SENTENÇA DIAS'])
+    
+    return df
+
+def tipar_colunas(df):
+    """
+    Retorna uma cópia do DataFrame com as colunas de data em datetime64.
+    
+    Datas que não estão no formato dd/mm/aaaa (ou são inexistentes) viram NaT.
+    Útil para formatos de saída tipados; o Excel continua recebendo os textos.
+    """
+    tipado = df.copy()
+    for coluna in COLUNAS_DATA:
+        if coluna in tipado.columns:
+            tipado[coluna] = pd.to_datetime(tipado[coluna], format='%d/%m/%Y', errors='coerce')
+    return tipado
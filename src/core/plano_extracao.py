@@ -0,0 +1,117 @@
+"""
+Planos de extração compilados por URL.
+
+Cada plano reúne todos os localizadores de uma URL de config.LOCALIZADORES,
+junto com a regra de primeiro/último elemento, e os avalia no navegador com
+uma única chamada a page.evaluate, em vez de uma ida e volta por campo.
+Quando a URL tem rótulos em config.ROTULOS, a mesma chamada também devolve os
+pares (rótulo, valor) da página e os seletores posicionais viram fallback.
+"""
+from src.utils import config
+from src.core.extrator_rotulos import SCRIPT_PARES_ROTULOS, IndiceRotulos
+
+# Função executada no navegador: recebe o plano e devolve {coluna: textContent}.
+# Colunas sem elementos recebem '' e seletores inválidos recebem null.
+SCRIPT_PLANO = """
+(plano) => {
+    const resultado = {};
+    for (const [coluna, seletor, ultimo] of plano) {
+        let elementos;
+        try {
+            elementos = document.querySelectorAll(seletor);
+        } catch (erro) {
+            resultado[coluna] = null;
+            continue;
+        }
+        if (elementos.length === 0) {
+            resultado[coluna] = '';
+            continue;
+        }
+        const alvo = ultimo ? elementos[elementos.length - 1] : elementos[0];
+        resultado[coluna] = alvo.textContent || '';
+    }
+    return resultado;
+}
+"""
+
+# Variante que também devolve os pares (rótulo, valor) da página
+SCRIPT_PLANO_ROTULOS = """
+(plano) => ({
+    pares: (%s)(),
+    posicionais: (%s)(plano)
+})
+""" % (SCRIPT_PARES_ROTULOS.strip(), SCRIPT_PLANO.strip())
+
+# Planos já compilados, indexados pela chave da URL
+_PLANOS = {}
+
+class PlanoExtracao:
+    """Conjunto de localizadores de uma URL avaliados em uma única ida ao navegador."""
+    
+    __slots__ = ('chave_url', 'itens', 'rotulos', 'script')
+    
+    def __init__(self, chave_url):
+        self.chave_url = chave_url
+        ultimo = chave_url in config.LOCALIZADORES_ULTIMO_ELEMENTO
+        self.itens = [
+            [coluna, seletor, ultimo]
+            for coluna, seletor in config.LOCALIZADORES[chave_url].items()
+        ]
+        self.rotulos = config.ROTULOS.get(chave_url) if config.EXTRACAO_POR_ROTULOS else None
+        self.script = SCRIPT_PLANO_ROTULOS if self.rotulos else SCRIPT_PLANO
+    
+    def tratar_resultado(self, brutos):
+        """
+        Converte o retorno do navegador no dicionário de campos.
+        
+        O strip é feito aqui, e não no navegador, para manter exatamente o mesmo
+        tratamento de texto da extração campo a campo.
+        
+        Returns:
+            tuple: (dict {coluna: texto}, lista de colunas com seletor inválido)
+        """
+        indice = None
+        if self.rotulos:
+            indice = IndiceRotulos(brutos['pares'])
+            brutos = brutos['posicionais']
+        
+        campos = {}
+        invalidos = []
+        for coluna, _, ultimo in self.itens:
+            if indice is not None:
+                valor = indice.resolver(self.rotulos.get(coluna), ultimo)
+                if valor is not None:
+                    campos[coluna] = valor
+                    continue
+            
+            # Fallback posicional
+            texto = brutos.get(coluna)
+            if texto is None:
+                invalidos.append(coluna)
+            else:
+                campos[coluna] = texto.strip()
+        return campos, invalidos
+    
+    def executar(self, page):
+        """Avalia o plano na página atual (API síncrona do Playwright)."""
+        return self.tratar_resultado(page.evaluate(self.script, self.itens))
+    
+    async def executar_async(self, page):
+        """Avalia o plano na página atual (API assíncrona do Playwright)."""
+        return self.tratar_resultado(await page.evaluate(self.script, self.itens))
+
+def obter_plano(chave_url):
+    """
+    Retorna o plano compilado de uma URL, criando-o na primeira chamada.
+    
+    Args:
+        chave_url: Chave da URL no dicionário config.LOCALIZADORES
+    
+    Returns:
+        PlanoExtracao: Plano com todos os localizadores da URL
+    """
+    plano = _PLANOS.get(chave_url)
+    if plano is None:
+        plano = PlanoExtracao(chave_url)
+        _PLANOS[chave_url] = plano
+    return plano
@@ -0,0 +1,282 @@
+"""
+Política de recursos de rede das páginas abertas no navegador.
+
+Os dados das páginas do Canaimé vêm no HTML gerado pelo servidor, então a
+maior parte dos recursos carregados pelas páginas não é necessária para a
+extração. Para cada família de URL (config.POLITICA_RECURSOS) a política
+define os tipos de recurso bloqueados, os tipos servidos de um cache local
+em disco (mantido entre execuções) e o evento aguardado na navegação:
+'domcontentloaded', 'load' ou 'seletor' (DOM carregado e um seletor de
+config.LOCALIZADORES presente). Recursos de hosts fora de
+config.HOSTS_PERMITIDOS são sempre bloqueados.
+
+A rota não intercepta todas as requisições: cada uma custaria uma ida e volta
+entre o navegador e o Python. Só as URLs de hosts de terceiros e as com a
+extensão (config.EXTENSOES_RECURSOS) de um tipo bloqueado ou servido do cache
+são encaminhadas à política; o filtro é uma expressão regular avaliada pelo
+próprio Playwright.
+
+As requisições evitadas e os bytes servidos pelo cache local são contados e
+apresentados no resumo da execução. Os recursos bloqueados são abortados antes
+da resposta, então o tamanho deles não é conhecido nem estimado.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from playwright.sync_api import TimeoutError as TimeoutPlaywright
+
+from src.utils import config
+from src.utils.logger import Logger
+
+logger = Logger.get_logger('politica_recursos')
+
+def familia_url(url):
+    """
+    Retorna a família de uma URL do Canaimé.
+    
+    Returns:
+        str: 'URL_UNIDADE', uma chave de config.URL_PARA_CHAVE ou 'padrao'
+    """
+    if url.startswith(config.URL_UNIDADE):
+        return 'URL_UNIDADE'
+    for url_base, chave_url in config.URL_PARA_CHAVE.items():
+        if url.startswith(url_base):
+            return chave_url
+    return 'padrao'
+
+def padrao_rotas():
+    """
+    Expressão regular das URLs encaminhadas à política.
+    
+    Returns:
+        re.Pattern: URLs de hosts fora de config.HOSTS_PERMITIDOS ou com a extensão de
+                    um tipo bloqueado ou servido do cache em alguma família
+    """
+    tipos = set()
+    for regras in config.POLITICA_RECURSOS.values():
+        tipos.update(regras.get('bloquear', []))
+        tipos.update(regras.get('cache', []))
+    extensoes = sorted({extensao for tipo in tipos for extensao in config.EXTENSOES_RECURSOS.get(tipo, [])})
+    
+    hosts = '|'.join(re.escape(host) for host in config.HOSTS_PERMITIDOS)
+    alternativas = [rf"^[a-z]+://(?!(?:[^/?#]*\.)?(?:{hosts})(?::\d+)?(?:[/?#]|$))"]
+    if extensoes:
+        alternativas.append(rf"\.(?:{'|'.join(extensoes)})(?:[?#]|$)")
+    return re.compile('|'.join(alternativas), re.IGNORECASE)
+
+def regras_familia(familia):
+    """Regras de config.POLITICA_RECURSOS da família, completadas pelas regras 'padrao'."""
+    return {**config.POLITICA_RECURSOS['padrao'], **config.POLITICA_RECURSOS.get(familia, {})}
+
+def seletor_pronto(familia):
+    """Seletor cuja presença indica que a página da família está pronta para a extração."""
+    if familia == 'URL_UNIDADE':
+        return config.SELETORES_LISTA_PRESOS['containers_informacoes']
+    localizadores = config.LOCALIZADORES.get(familia)
+    return next(iter(localizadores.values())) if localizadores else None
+
+def opcoes_navegacao(url):
+    """
+    Evento aguardado pelo page.goto e seletor de prontidão de uma URL.
+    
+    Returns:
+        tuple: (valor de wait_until, seletor a aguardar ou None)
+    """
+    familia = familia_url(url)
+    esperar = regras_familia(familia)['esperar']
+    if esperar == 'seletor':
+        return 'domcontentloaded', seletor_pronto(familia)
+    return esperar, None
+
+def navegar(page, url):
+    """
+    Navega com o evento de carregamento da política e aguarda o seletor de prontidão.
+    
+    Uma página sem o seletor (preso sem o campo) não é erro: a espera termina
+    em config.TIMEOUT_SELETOR_PRONTO e a extração segue normalmente.
+    """
+    wait_until, seletor = opcoes_navegacao(url)
+    resposta = page.goto(url, wait_until=wait_until)
+    if seletor:
+        try:
+            page.wait_for_selector(seletor, state='attached', timeout=config.TIMEOUT_SELETOR_PRONTO)
+        except TimeoutPlaywright:
+            pass
+    return resposta
+
+async def navegar_async(page, url):
+    """Versão assíncrona de navegar."""
+    wait_until, seletor = opcoes_navegacao(url)
+    resposta = await page.goto(url, wait_until=wait_until)
+    if seletor:
+        try:
+            await page.wait_for_selector(seletor, state='attached', timeout=config.TIMEOUT_SELETOR_PRONTO)
+        except TimeoutPlaywright:
+            pass
+    return resposta
+
+class PoliticaRecursos:
+    """Rotas do contexto do navegador que bloqueiam ou servem do disco os recursos das páginas."""
+    
+    def __init__(self, diretorio_cache=None, validade_cache=None):
+        """
+        Args:
+            diretorio_cache: Pasta do cache de recursos estáticos. Se None, usa config.DIRETORIO_CACHE_ESTATICOS
+            validade_cache: Validade dos arquivos em segundos. Se None, usa config.VALIDADE_CACHE_ESTATICOS
+        """
+        self.diretorio_cache = diretorio_cache or config.DIRETORIO_CACHE_ESTATICOS
+        self.validade_cache = validade_cache if validade_cache is not None else config.VALIDADE_CACHE_ESTATICOS
+        self._trava = threading.Lock()
+        self.reiniciar()
+    
+    def aplicar(self, contexto):
+        """Registra a política em um contexto (BrowserContext) síncrono do Playwright."""
+        contexto.route(padrao_rotas(), self.tratar)
+    
+    async def aplicar_async(self, contexto):
+        """Registra a política em um contexto (BrowserContext) assíncrono do Playwright."""
+        await contexto.route(padrao_rotas(), self.tratar_async)
+    
+    def _decidir(self, request):
+        """
+        Decide o destino de uma requisição.
+        
+        Returns:
+            tuple: ('seguir' | 'bloquear' | 'cache', caminho do arquivo no cache ou None)
+        """
+        tipo = request.resource_type
+        host = urlsplit(request.url).hostname or ''
+        
+        if not any(host == permitido or host.endswith('.' + permitido) for permitido in config.HOSTS_PERMITIDOS):
+            with self._trava:
+                self.estatisticas['terceiros'] += 1
+                self.estatisticas['bloqueadas'][tipo] += 1
+            return 'bloquear', None
+        
+        # O próprio documento nunca é bloqueado
+        if tipo == 'document':
+            return 'seguir', None
+        
+        try:
+            familia = familia_url(request.frame.url)
+        except Exception:
+            familia = 'padrao'
+        regras = regras_familia(familia)
+        
+        if tipo in regras['bloquear']:
+            with self._trava:
+                self.estatisticas['bloqueadas'][tipo] += 1
+            return 'bloquear', None
+        if tipo in regras['cache'] and request.method == 'GET':
+            return 'cache', os.path.join(self.diretorio_cache, hashlib.sha256(request.url.encode('utf-8')).hexdigest())
+        return 'seguir', None
+    
+    def _ler_cache(self, caminho):
+        """Retorna (corpo, content-type) do recurso em cache, ou None se ausente ou vencido."""
+        try:
+            if time.time() - os.path.getmtime(caminho) > self.validade_cache:
+                return None
+            with open(caminho, 'rb') as arquivo:
+                tipo_conteudo, _, corpo = arquivo.read().partition(b'\n')
+        except OSError:
+            return None
+        
+        with self._trava:
+            self.estatisticas['requisicoes_cache'] += 1
+            self.estatisticas['bytes_cache'] += len(corpo)
+        return corpo, tipo_conteudo.decode('utf-8')
+    
+    def _gravar_cache(self, caminho, corpo, tipo_conteudo):
+        """Grava o recurso no cache (arquivo temporário + os.replace, seguro entre processos)."""
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.diretorio_cache, exist_ok=True)
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(tipo_conteudo.encode('utf-8') + b'\n' + corpo)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            logger.warning("Não foi possível gravar o recurso no cache local: %s", e)
+    
+    def tratar(self, route):
+        """Handler das rotas na API síncrona."""
+        destino, caminho = self._decidir(route.request)
+        if destino == 'bloquear':
+            route.abort()
+            return
+        if destino == 'seguir':
+            route.continue_()
+            return
+        
+        em_cache = self._ler_cache(caminho)
+        if em_cache is not None:
+            route.fulfill(status=200, body=em_cache[0], content_type=em_cache[1])
+            return
+        
+        resposta = route.fetch()
+        if resposta.ok:
+            self._gravar_cache(caminho, resposta.body(), resposta.headers.get('content-type', ''))
+        route.fulfill(response=resposta)
+    
+    async def tratar_async(self, route):
+        """Handler das rotas na API assíncrona."""
+        destino, caminho = self._decidir(route.request)
+        if destino == 'bloquear':
+            await route.abort()
+            return
+        if destino == 'seguir':
+            await route.continue_()
+            return
+        
+        em_cache = self._ler_cache(caminho)
+        if em_cache is not None:
+            await route.fulfill(status=200, body=em_cache[0], content_type=em_cache[1])
+            return
+        
+        resposta = await route.fetch()
+        if resposta.ok:
+            self._gravar_cache(caminho, await resposta.body(), resposta.headers.get('content-type', ''))
+        await route.fulfill(response=resposta)
+    
+    def reiniciar(self):
+        """Zera as estatísticas (início de uma execução)."""
+        with self._trava:
+            self.estatisticas = {
+                'bloqueadas': Counter(),
+                'terceiros': 0,
+                'requisicoes_cache': 0,
+                'bytes_cache': 0,
+            }
+    
+    def somar(self, estatisticas):
+        """Acrescenta as estatísticas de outro processo às desta execução."""
+        with self._trava:
+            for chave, valor in estatisticas.items():
+                self.estatisticas[chave] += valor
+    
+    def resumo(self):
+        """
+        Retorna um texto com as requisições evitadas e os bytes servidos pelo cache local.
+        
+        Só os bytes do cache são medidos: os recursos bloqueados são abortados antes da resposta.
+        """
+        estatisticas = self.estatisticas
+        bloqueadas = sum(estatisticas['bloqueadas'].values())
+        por_tipo = ', '.join(f"{tipo}: {total}" for tipo, total in estatisticas['bloqueadas'].most_common())
+        megabytes = estatisticas['bytes_cache'] / (1024 * 1024)
+        return (
+            f"Recursos: {bloqueadas} requisições bloqueadas ({por_tipo or 'nenhuma'}; "
+            f"{estatisticas['terceiros']} de terceiros), {estatisticas['requisicoes_cache']} servidas "
+            f"do cache local ({megabytes:.1f} MB não baixados; tamanho dos bloqueados não medido)"
+        )
+
+# Política compartilhada pela execução (motores, threads e tarefas)
+_POLITICA = PoliticaRecursos()
+
+def obter_politica_recursos():
+    """Retorna a política de recursos da execução atual."""
+    return _POLITICA
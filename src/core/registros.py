@@ -0,0 +1,82 @@
+"""
+Armazenamento compacto dos registros de presos durante a extração.
+
+Cada preso é uma lista de valores na ordem de config.COLUNAS, indexada pelo
+CÓDIGO, de modo que gravar um campo extraído custa O(1). O DataFrame da
+unidade só é criado ao final, em um único passo.
+"""
+import pandas as pd
+
+from src.utils import config
+
+# Posição de cada coluna na lista de valores do registro
+POSICAO_COLUNA = {coluna: i for i, coluna in enumerate(config.COLUNAS)}
+
+# Valor das colunas ainda não extraídas, o mesmo que pd.DataFrame usa para chaves ausentes
+VAZIO = float('nan')
+
+class RegistrosUnidade:
+    """Registros dos presos de uma unidade, indexados pelo CÓDIGO."""
+    
+    __slots__ = ('up', '_linhas', '_por_codigo')
+    
+    def __init__(self, up, registros=None):
+        """
+        Args:
+            up: Código da unidade prisional
+            registros: Lista opcional de dicionários {coluna: valor} para adicionar
+        """
+        self.up = up
+        self._linhas = []
+        self._por_codigo = {}
+        for registro in registros or []:
+            self.adicionar(registro)
+    
+    def __len__(self):
+        return len(self._linhas)
+    
+    def adicionar(self, registro):
+        """Adiciona um preso a partir de um dicionário {coluna: valor}."""
+        linha = [VAZIO] * len(config.COLUNAS)
+        for coluna, valor in registro.items():
+            linha[POSICAO_COLUNA[coluna]] = valor
+        self._linhas.append(linha)
+        # Uma lista por código: códigos repetidos na lista recebem os mesmos detalhes
+        self._por_codigo.setdefault(registro.get('CÓDIGO'), []).append(linha)
+    
+    def codigos(self):
+        """Retorna os códigos dos presos na ordem da lista da unidade."""
+        posicao = POSICAO_COLUNA['CÓDIGO']
+        return [linha[posicao] for linha in self._linhas]
+    
+    def definir(self, codigo, coluna, valor):
+        """Grava o valor de uma coluna para o preso com o código informado."""
+        posicao = POSICAO_COLUNA[coluna]
+        for linha in self._por_codigo.get(codigo, ()):
+            linha[posicao] = valor
+    
+    def atualizar(self, codigo, campos):
+        """Grava vários campos {coluna: valor} para o preso com o código informado."""
+        linhas = self._por_codigo.get(codigo, ())
+        for coluna, valor in campos.items():
+            posicao = POSICAO_COLUNA[coluna]
+            for linha in linhas:
+                linha[posicao] = valor
+    
+    def registro(self, codigo):
+        """Retorna o dicionário {coluna: valor} do preso com o código informado, ou None."""
+        linhas = self._por_codigo.get(codigo)
+        if not linhas:
+            return None
+        return dict(zip(config.COLUNAS, linhas[0]))
+    
+    def obter(self, codigo, coluna, padrao=None):
+        """Retorna o valor de uma coluna do preso, ou padrao se o código não existir."""
+        linhas = self._por_codigo.get(codigo)
+        if not linhas:
+            return padrao
+        return linhas[0][POSICAO_COLUNA[coluna]]
+    
+    def para_dataframe(self):
+        """Converte os registros em um DataFrame com as colunas de config.COLUNAS."""
+        return pd.DataFrame(self._linhas, columns=config.COLUNAS)
@@ -0,0 +1,89 @@
+"""
+Provedores da sessão autenticada usada pela extração.
+
+Um provedor é um gerenciador de contexto com obter_pagina(headless) e
+fechar(), a mesma interface do Login do login-canaime. O provedor usado é
+escolhido por config.PROVEDOR_SESSAO (variável de ambiente
+PAMC_PROVEDOR_SESSAO):
+
+- 'canaime': login no Canaimé pelo login-canaime (padrão)
+- 'local': navegador sem login, para o servidor local de testes
+  (tests/servidor_canaime.py) apontado por PAMC_URL_CANAIME
+
+Outros provedores podem ser registrados com registrar_provedor.
+"""
+from playwright.sync_api import sync_playwright
+
+from src.utils import config
+
+class SessaoLocal:
+    """Navegador sem login, para servidores que não exigem autenticação."""
+    
+    def __init__(self):
+        self._playwright = None
+        self._navegador = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.fechar()
+    
+    def obter_pagina(self, headless=True):
+        """
+        Abre o Chromium e retorna uma página em um contexto novo.
+        
+        Args:
+            headless: Se False, exibe o navegador
+        """
+        self._playwright = sync_playwright().start()
+        self._navegador = self._playwright.chromium.launch(headless=headless)
+        contexto = self._navegador.new_context()
+        contexto.set_default_timeout(config.TIMEOUT)
+        return contexto.new_page()
+    
+    def fechar(self):
+        """Fecha o navegador (pode ser chamado mais de uma vez)."""
+        if self._navegador is not None:
+            self._navegador.close()
+            self._navegador = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+def _sessao_canaime():
+    # Importado só quando usado: o modo local não depende do login-canaime
+    from login_canaime import Login
+    return Login()
+
+# Fábricas dos provedores de sessão, indexadas pelo nome
+PROVEDORES_SESSAO = {
+    'canaime': _sessao_canaime,
+    'local': SessaoLocal,
+}
+
+def registrar_provedor(nome, fabrica):
+    """
+    Registra um provedor de sessão.
+    
+    Args:
+        nome: Nome usado em config.PROVEDOR_SESSAO
+        fabrica: Função sem argumentos que retorna o provedor (gerenciador de
+                 contexto com obter_pagina(headless) e fechar())
+    """
+    PROVEDORES_SESSAO[nome] = fabrica
+
+def criar_sessao(nome=None):
+    """
+    Cria o provedor de sessão configurado.
+    
+    Args:
+        nome: Nome do provedor. Se None, usa config.PROVEDOR_SESSAO
+    
+    Raises:
+        ValueError: Se o provedor não estiver registrado
+    """
+    nome = nome or config.PROVEDOR_SESSAO
+    if nome not in PROVEDORES_SESSAO:
+        raise ValueError(f"Provedor de sessão desconhecido: {nome} (disponíveis: {', '.join(PROVEDORES_SESSAO)})")
+    return PROVEDORES_SESSAO[nome]()
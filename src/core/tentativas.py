@@ -0,0 +1,267 @@
+"""
+Política de novas tentativas das operações de rede.
+
+Cada erro é classificado (timeout, navegação, seletor, sessão expirada ou
+outro) e só timeouts e erros de navegação são tentados de novo, com espera
+exponencial e jitter (um valor aleatório entre zero e a espera da
+tentativa). Seletores inválidos e sessão expirada não melhoram com novas
+tentativas e são relançados de imediato.
+
+Um disjuntor acompanha o resultado das últimas operações: quando a taxa de
+falhas passa do limite, todas as operações da execução (de todas as threads
+e tarefas) aguardam uma pausa antes de continuar, em vez de continuar
+sobrecarregando o Canaimé. As tentativas, falhas por classe e o tempo de
+espera de cada execução são reunidos em estatísticas com um resumo.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from playwright.sync_api import Error as ErroPlaywright, TimeoutError as TimeoutPlaywright
+
+from src.utils import config
+from src.utils.logger import Logger
+
+logger = Logger.get_logger('tentativas')
+
+# Classes de erro
+TIMEOUT = 'timeout'
+NAVEGACAO = 'navegacao'
+SELETOR = 'seletor'
+SESSAO = 'sessao'
+OUTRO = 'outro'
+
+# Classes em que uma nova tentativa pode dar certo
+CLASSES_RETENTAVEIS = {TIMEOUT, NAVEGACAO}
+
+# Trechos das mensagens do Playwright que indicam seletor inválido ou ambíguo.
+# Esperas por um seletor que estouram o prazo são TimeoutError e contam como
+# timeout (a página pode só ter demorado a carregar)
+TRECHOS_ERRO_SELETOR = (
+    'is not a valid selector',
+    'strict mode violation',
+    'SyntaxError',
+)
+
+class SessaoExpiradaError(Exception):
+    """A página pedida redirecionou para a tela de login: a sessão autenticada expirou."""
+
+def verificar_sessao(url):
+    """
+    Verifica se a URL final de uma navegação é a tela de login.
+    
+    Raises:
+        SessaoExpiradaError: Se a URL contém config.TRECHO_URL_LOGIN
+    """
+    if url and config.TRECHO_URL_LOGIN in url:
+        raise SessaoExpiradaError(f"Sessão expirada (redirecionado para {url})")
+
+def classificar_erro(erro):
+    """
+    Classifica um erro de uma operação de rede.
+    
+    Returns:
+        str: TIMEOUT, NAVEGACAO, SELETOR, SESSAO ou OUTRO
+    """
+    if isinstance(erro, SessaoExpiradaError):
+        return SESSAO
+    if isinstance(erro, (TimeoutPlaywright, requests.Timeout, TimeoutError)):
+        return TIMEOUT
+    if isinstance(erro, ErroPlaywright):
+        mensagem = str(erro)
+        return SELETOR if any(trecho in mensagem for trecho in TRECHOS_ERRO_SELETOR) else NAVEGACAO
+    if isinstance(erro, requests.HTTPError):
+        status = erro.response.status_code if erro.response is not None else None
+        # Erros do servidor e excesso de requisições passam; os demais 4xx não
+        return NAVEGACAO if status is None or status >= 500 or status == 429 else OUTRO
+    if isinstance(erro, (requests.RequestException, ConnectionError)):
+        return NAVEGACAO
+    return OUTRO
+
+class Disjuntor:
+    """
+    Disjuntor de falhas compartilhado pela execução.
+    
+    Abre quando, entre as últimas operações (pelo menos `minimo`), a fração de
+    falhas chega a `limite`. Aberto, as operações aguardam `pausa` segundos;
+    depois a janela recomeça vazia.
+    """
+    
+    def __init__(self, janela=None, limite=None, minimo=None, pausa=None):
+        self.janela = janela or config.JANELA_DISJUNTOR
+        self.limite = limite or config.LIMITE_FALHAS_DISJUNTOR
+        self.minimo = minimo or config.MINIMO_OPERACOES_DISJUNTOR
+        self.pausa = pausa if pausa is not None else config.PAUSA_DISJUNTOR
+        self._resultados = deque(maxlen=self.janela)
+        self._aberto_ate = 0.0
+        self._trava = threading.Lock()
+    
+    def registrar(self, sucesso):
+        """
+        Registra o resultado de uma operação.
+        
+        Returns:
+            bool: True se esta falha abriu o disjuntor
+        """
+        with self._trava:
+            self._resultados.append(sucesso)
+            if sucesso or len(self._resultados) < self.minimo:
+                return False
+            
+            falhas = self._resultados.count(False) / len(self._resultados)
+            if falhas < self.limite:
+                return False
+            
+            self._aberto_ate = time.monotonic() + self.pausa
+            self._resultados.clear()
+            return True
+    
+    def espera(self):
+        """Segundos até o disjuntor liberar as operações (0 se fechado)."""
+        return max(0.0, self._aberto_ate - time.monotonic())
+    
+    def reiniciar(self):
+        """Fecha o disjuntor e esvazia a janela."""
+        with self._trava:
+            self._resultados.clear()
+            self._aberto_ate = 0.0
+
+class PoliticaTentativas:
+    """Novas tentativas com espera exponencial e jitter, protegidas por um disjuntor."""
+    
+    def __init__(self, max_tentativas=None, espera_base=None, espera_maxima=None, disjuntor=None):
+        """
+        Args:
+            max_tentativas: Tentativas por operação. Se None, usa config.MAX_TENTATIVAS
+            espera_base: Espera da primeira nova tentativa em segundos. Se None, usa config.ESPERA_BASE_TENTATIVAS
+            espera_maxima: Limite da espera em segundos. Se None, usa config.ESPERA_MAXIMA_TENTATIVAS
+            disjuntor: Disjuntor usado. Se None, cria um com as opções de config
+        """
+        self.max_tentativas = max_tentativas or config.MAX_TENTATIVAS
+        self.espera_base = espera_base if espera_base is not None else config.ESPERA_BASE_TENTATIVAS
+        self.espera_maxima = espera_maxima if espera_maxima is not None else config.ESPERA_MAXIMA_TENTATIVAS
+        self.disjuntor = disjuntor or Disjuntor()
+        self._trava = threading.Lock()
+        self.reiniciar()
+    
+    def reiniciar(self):
+        """Zera as estatísticas e fecha o disjuntor (início de uma execução)."""
+        with self._trava:
+            self.estatisticas = {
+                'operacoes': 0,
+                'novas_tentativas': 0,
+                'espera_tentativas': 0.0,
+                'pausas_disjuntor': 0,
+                'espera_disjuntor': 0.0,
+                'falhas': {classe: 0 for classe in (TIMEOUT, NAVEGACAO, SELETOR, SESSAO, OUTRO)},
+            }
+        self.disjuntor.reiniciar()
+    
+    def somar(self, estatisticas):
+        """Acrescenta as estatísticas de outro processo às desta execução."""
+        with self._trava:
+            for chave, valor in estatisticas.items():
+                if chave == 'falhas':
+                    for classe, quantidade in valor.items():
+                        self.estatisticas['falhas'][classe] += quantidade
+                else:
+                    self.estatisticas[chave] += valor
+    
+    def calcular_espera(self, tentativa):
+        """Espera antes da nova tentativa: aleatória entre 0 e base * 2^tentativa (limitada)."""
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+    
+    def _falhou(self, erro, tentativa):
+        """
+        Registra a falha de uma tentativa.
+        
+        Returns:
+            float: Segundos a aguardar antes da nova tentativa, ou None se o erro deve ser relançado
+        """
+        classe = classificar_erro(erro)
+        with self._trava:
+            self.estatisticas['falhas'][classe] += 1
+        
+        if classe in CLASSES_RETENTAVEIS and self.disjuntor.registrar(False):
+            with self._trava:
+                self.estatisticas['pausas_disjuntor'] += 1
+                self.estatisticas['espera_disjuntor'] += self.disjuntor.pausa
+            logger.warning("Muitas falhas de rede seguidas: extração pausada por %.0f segundos", self.disjuntor.pausa)
+        
+        if classe not in CLASSES_RETENTAVEIS or tentativa >= self.max_tentativas - 1:
+            logger.error("Falha (%s) após %d tentativa(s): %s", classe, tentativa + 1, erro, extra={'classe_erro': classe})
+            return None
+        
+        espera = self.calcular_espera(tentativa)
+        with self._trava:
+            self.estatisticas['novas_tentativas'] += 1
+            self.estatisticas['espera_tentativas'] += espera
+        logger.warning("Erro (%s) na tentativa %d/%d: %s", classe, tentativa + 1, self.max_tentativas, erro,
+                       extra={'classe_erro': classe})
+        logger.info("Tentando novamente em %.1f segundos...", espera)
+        return espera
+    
+    def _concluiu(self):
+        self.disjuntor.registrar(True)
+    
+    def executar(self, func, *args, **kwargs):
+        """
+        Executa func(*args, **kwargs) com a política de novas tentativas.
+        
+        Returns:
+            O resultado da função, relançando a exceção quando não há nova tentativa
+        """
+        with self._trava:
+            self.estatisticas['operacoes'] += 1
+        
+        for tentativa in range(self.max_tentativas):
+            time.sleep(self.disjuntor.espera())
+            try:
+                resultado = func(*args, **kwargs)
+            except Exception as e:
+                espera = self._falhou(e, tentativa)
+                if espera is None:
+                    raise
+                time.sleep(espera)
+            else:
+                self._concluiu()
+                return resultado
+    
+    async def executar_async(self, func, *args, **kwargs):
+        """Versão assíncrona de executar, para funções assíncronas."""
+        with self._trava:
+            self.estatisticas['operacoes'] += 1
+        
+        for tentativa in range(self.max_tentativas):
+            await asyncio.sleep(self.disjuntor.espera())
+            try:
+                resultado = await func(*args, **kwargs)
+            except Exception as e:
+                espera = self._falhou(e, tentativa)
+                if espera is None:
+                    raise
+                await asyncio.sleep(espera)
+            else:
+                self._concluiu()
+                return resultado
+    
+    def resumo(self):
+        """Retorna um texto com as novas tentativas, falhas por classe e o tempo de espera."""
+        estatisticas = self.estatisticas
+        falhas = ', '.join(f"{classe}: {quantidade}" for classe, quantidade in estatisticas['falhas'].items() if quantidade)
+        return (
+            f"Tentativas: {estatisticas['operacoes']} operações, {estatisticas['novas_tentativas']} novas tentativas "
+            f"({estatisticas['espera_tentativas']:.1f} s de espera), "
+            f"{estatisticas['pausas_disjuntor']} pausas do disjuntor ({estatisticas['espera_disjuntor']:.0f} s); "
+            f"falhas: {falhas or 'nenhuma'}"
+        )
+
+# Política compartilhada pela execução (módulos, threads e tarefas)
+_POLITICA = PoliticaTentativas()
+
+def obter_politica():
+    """Retorna a política de novas tentativas da execução atual."""
+    return _POLITICA
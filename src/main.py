@@ -1,91 +1,289 @@
 import os
 import sys
-import traceback
-from src.ui.interface_selecao import criar_interface
+import argparse
 from src.core.listar_presos_up import listar_presos_up
-from login_canaime import Login
-from src.utils.updater import check_and_update
+from src.core.extracao_async import listar_presos_up_paralelo
+from src.core.extracao_http import listar_presos_up_http
+from src.core.extracao_processos import listar_presos_up_processos
+from src.core.cache_paginas import CachePaginas
+from src.core.delta import carregar_base_anterior
+from src.core.diario import DiarioExecucao
+from src.core.tentativas import obter_politica, SessaoExpiradaError
+from src.core.politica_recursos import obter_politica_recursos
+from src.core.medicao import obter_medicoes
+from src.core.sessao import criar_sessao
+from src.utils import config
+from src.utils.logger import Logger
+
+logger = Logger.get_logger('main')
+
+# Situações de uma execução devolvidas por iniciar_extracao
+CONCLUIDA = 'concluida'
+INTERROMPIDA = 'interrompida'
+SESSAO_EXPIRADA = 'sessao_expirada'
+ERRO = 'erro'
 
 def iniciar_extracao(unidades_selecionadas, opcoes, interface):
     """
     Função principal que inicia a extração de dados usando Playwright.
     
+    Não depende do Tkinter: a interface pode ser a janela ou a saída da linha
+    de comando (src.cli). Sem 'caminho_saida' nas opções, o motor pergunta
+    onde salvar o Excel.
+    
     Args:
         unidades_selecionadas: Lista de códigos das unidades selecionadas
         opcoes: Dicionário com opções de configuração
-        interface: Objeto da interface gráfica para atualização do progresso
+        interface: Objeto com atualizar_progresso e verificar_cancelamento
+    
+    Returns:
+        dict: 'situacao' (CONCLUIDA, INTERROMPIDA, SESSAO_EXPIRADA ou ERRO), 'resultado'
+              (dicionário devolvido pelo motor, ou None) e 'id_execucao' (diário da execução)
     """
     # Atualiza interface
     interface.atualizar_progresso("Iniciando navegador...", 0)
     
+    # Diário da execução: retoma uma execução interrompida ou inicia um novo
+    diario = None
+    retomar = opcoes.get('retomar')
+    if retomar:
+        try:
+            diario = DiarioExecucao.abrir(retomar) if isinstance(retomar, str) else DiarioExecucao.ultimo_interrompido()
+        except OSError as e:
+            interface.atualizar_progresso(f"Não foi possível abrir o diário da execução {retomar}: {e}", 0)
+            return {'situacao': ERRO, 'resultado': None, 'id_execucao': None}
+        
+        if diario is None:
+            interface.atualizar_progresso("Nenhuma execução interrompida encontrada. Iniciando uma nova execução.", 0)
+        else:
+            # Mesmas unidades e opções de dados da execução interrompida
+            unidades_selecionadas = diario.unidades
+            opcoes = {**opcoes, **diario.opcoes}
+            interface.atualizar_progresso(f"Retomando a execução {diario.id_execucao}: {', '.join(unidades_selecionadas)}", 0)
+    if diario is None:
+        try:
+            diario = DiarioExecucao.criar(unidades_selecionadas, opcoes)
+        except OSError as e:
+            interface.atualizar_progresso(f"Não foi possível criar o diário da execução: {e}", 0)
+            return {'situacao': ERRO, 'resultado': None, 'id_execucao': None}
+    
     # Obtém as opções de modo de teste
     modo_teste = opcoes.get('modo_teste', False)
     limite_teste = opcoes.get('limite_teste', 10)
     mostrar_navegador = opcoes.get('mostrar_navegador', False)
+    paginas_paralelas = opcoes.get('paginas_paralelas', 1)
+    modo_extracao = opcoes.get('modo_extracao', 'navegador')
+    forcar_atualizacao_cache = opcoes.get('forcar_atualizacao_cache', False)
+    arquivo_base_delta = opcoes.get('arquivo_base_delta')
+    formatos_exportacao = opcoes.get('formatos_exportacao', [])
+    caminho_saida = opcoes.get('caminho_saida')
     
     # Registra o início do processamento
     if modo_teste:
         interface.atualizar_progresso(f"MODO TESTE ativado - máximo de {limite_teste} presos por unidade", 2)
     
+    # Estatísticas de novas tentativas e disjuntor zerados para esta execução
+    politica_tentativas = obter_politica()
+    politica_tentativas.reiniciar()
+    politica_recursos = obter_politica_recursos()
+    politica_recursos.reiniciar()
+    # Os intervalos completos (que crescem com o número de presos) só são guardados para o trace
+    trace = opcoes.get('trace')
+    medicoes = obter_medicoes()
+    medicoes.reiniciar(guardar_intervalos=bool(trace))
+    
+    situacao = ERRO
+    resultado = None
+    cache = None
+    
     try:
-        with Login() as login:
+        # Cache das páginas de detalhes entre execuções (dentro do try: uma falha ao
+        # abrir o banco ainda fecha e finaliza o diário)
+        if config.USAR_CACHE_PAGINAS:
+            cache = CachePaginas(forcar_atualizacao=forcar_atualizacao_cache)
+        
+        # Modo delta: detalhes dos presos sem alteração vêm do Excel anterior
+        base_anterior = None
+        if arquivo_base_delta:
+            interface.atualizar_progresso("Carregando Excel da execução anterior...", 1)
+            base_anterior = carregar_base_anterior(arquivo_base_delta)
+        
+        with criar_sessao() as login:
             
             # Cria uma página
-            page = login.obter_pagina(headless= not mostrar_navegador)
+            with medicoes.medir('login'):
+                page = login.obter_pagina(headless= not mostrar_navegador)
             
-            # Configurar a página para não baixar imagens (otimização)
-            page.route("**/*.{png,jpg,jpeg,gif,webp,svg}", lambda route: route.abort())
+            # Bloquear os recursos que a extração não usa e servir os estáticos do disco
+            politica_recursos.aplicar(page.context)
             
             # Login no sistema (implementar conforme necessário)
             interface.atualizar_progresso("Realizando login no sistema...", 5)
-
+            
             
             # Chama a função principal com a interface para mostrar progresso
-            resultado = listar_presos_up(
-                page, 
-                interface=interface,
-                unidades_selecionadas=unidades_selecionadas,
-                modo_teste=modo_teste,
-                limite_teste=limite_teste
-            )
+            if modo_extracao in ('http', 'paridade'):
+                # Modo sem navegador: páginas baixadas por HTTP com os cookies da sessão
+                interface.atualizar_progresso(f"Extração HTTP com {paginas_paralelas} conexões simultâneas", 5)
+                resultado = listar_presos_up_http(
+                    page,
+                    caminho_saida=caminho_saida,
+                    interface=interface,
+                    unidades_selecionadas=unidades_selecionadas,
+                    modo_teste=modo_teste,
+                    limite_teste=limite_teste,
+                    num_conexoes=paginas_paralelas,
+                    amostra_paridade=config.AMOSTRA_PARIDADE if modo_extracao == 'paridade' else 0,
+                    cache=cache,
+                    base_anterior=base_anterior,
+                    diario=diario,
+                    formatos_exportacao=formatos_exportacao
+                )
+            elif modo_extracao == 'processos':
+                # Unidades distribuídas entre processos, cada um com o seu navegador
+                # Sem um valor acima do padrão, o motor usa config.NUM_PROCESSOS_UNIDADES
+                num_processos = paginas_paralelas if paginas_paralelas > config.NUM_PAGINAS_PARALELAS else None
+                interface.atualizar_progresso(
+                    f"Extração com até {min(num_processos or config.NUM_PROCESSOS_UNIDADES, config.MAX_PROCESSOS_UNIDADES)} "
+                    "processos (um navegador por unidade)", 5)
+                resultado = listar_presos_up_processos(
+                    page,
+                    caminho_saida=caminho_saida,
+                    interface=interface,
+                    unidades_selecionadas=unidades_selecionadas,
+                    modo_teste=modo_teste,
+                    limite_teste=limite_teste,
+                    num_processos=num_processos,
+                    headless=not mostrar_navegador,
+                    cache=cache,
+                    base_anterior=base_anterior,
+                    diario=diario,
+                    formatos_exportacao=formatos_exportacao
+                )
+            elif paginas_paralelas > 1:
+                # Motor assíncrono: várias páginas compartilhando a sessão autenticada
+                interface.atualizar_progresso(f"Extração paralela com {paginas_paralelas} páginas simultâneas", 5)
+                resultado = listar_presos_up_paralelo(
+                    page,
+                    caminho_saida=caminho_saida,
+                    interface=interface,
+                    unidades_selecionadas=unidades_selecionadas,
+                    modo_teste=modo_teste,
+                    limite_teste=limite_teste,
+                    num_paginas=paginas_paralelas,
+                    headless=not mostrar_navegador,
+                    cache=cache,
+                    base_anterior=base_anterior,
+                    diario=diario,
+                    formatos_exportacao=formatos_exportacao
+                )
+            else:
+                resultado = listar_presos_up(
+                    page, 
+                    caminho_saida=caminho_saida,
+                    interface=interface,
+                    unidades_selecionadas=unidades_selecionadas,
+                    modo_teste=modo_teste,
+                    limite_teste=limite_teste,
+                    cache=cache,
+                    base_anterior=base_anterior,
+                    diario=diario,
+                    formatos_exportacao=formatos_exportacao
+                )
             
             # Fecha o navegador
             login.fechar()
             
+            if cache is not None:
+                logger.info(cache.resumo())
+            logger.info(politica_tentativas.resumo())
+            logger.info(politica_recursos.resumo())
+            logger.info(medicoes.resumo())
+            
             # Verifica o resultado
             if resultado:
                 caminho_excel = resultado['caminho_excel']
+                diario.finalizar(caminho_excel)
+                situacao = CONCLUIDA
                 interface.atualizar_progresso(f"Processamento concluído com sucesso! Arquivo salvo em:\n{caminho_excel}", 100)
             else:
+                situacao = INTERROMPIDA
                 interface.atualizar_progresso("Operação cancelada ou finalizada com erro.", 0)
-                
+                interface.atualizar_progresso(f"Os presos já extraídos foram salvos na execução {diario.id_execucao} e podem ser retomados.", None)
+    
+    except SessaoExpiradaError as e:
+        logger.error("%s\n%s", e, politica_tentativas.resumo())
+        situacao = SESSAO_EXPIRADA
+        interface.atualizar_progresso("A sessão do Canaimé expirou durante a extração.", 0)
+        interface.atualizar_progresso(f"Os presos já extraídos foram salvos na execução {diario.id_execucao} e podem ser retomados.", None)
     except Exception as e:
         # Em caso de erro, exibe na interface
-        erro = f"Erro: {str(e)}\n{traceback.format_exc()}"
-        print(erro)
+        logger.exception("Erro: %s", e, extra={'unidades': unidades_selecionadas})
         interface.atualizar_progresso(f"Erro durante o processamento: {str(e)}", 0)
+    finally:
+        if cache is not None:
+            cache.fechar()
+        diario.fechar()
+        
+        # Intervalos medidos no formato Chrome trace (Perfetto), também de execuções interrompidas
+        if trace:
+            caminho_trace = trace if isinstance(trace, str) else os.path.join(config.DIRETORIO_TRACES, f"trace_{diario.id_execucao}.json")
+            try:
+                logger.info("Trace das etapas gravado em: %s", medicoes.exportar_trace(caminho_trace))
+            except OSError as e:
+                logger.warning("Não foi possível gravar o trace das etapas: %s", e)
+    
+    return {'situacao': situacao, 'resultado': resultado, 'id_execucao': diario.id_execucao}
 
-def main():
+def main(argv=None):
     """Função principal do programa."""
+    parser = argparse.ArgumentParser(description=f"{config.APP_NAME} - extração de dados dos presos")
+    parser.add_argument('--retomar', nargs='?', const=True, metavar='ID_EXECUCAO',
+                        help="Retoma a última execução interrompida (ou a execução informada)")
+    parser.add_argument('--trace', nargs='?', const=True, metavar='ARQUIVO',
+                        help="Grava o tempo das etapas em um arquivo Chrome trace (Perfetto) ao final de cada execução")
+    args = parser.parse_args(argv)
+    
+    # Interface e atualizador importados só aqui: src.cli usa iniciar_extracao sem o Tkinter
+    from src.ui.interface_selecao import criar_interface
+    from src.utils.updater import UpdaterService
+    
     try:
-        # Verificar por atualizações
-        print("Verificando atualizações...")
-        check_and_update()
-        
         # Cria e configura a interface
         interface = criar_interface()
         
+        # Verificar por atualizações em segundo plano, depois que a janela for exibida:
+        # uma versão nova aparece como aviso na interface, sem bloquear a extração
+        updater = UpdaterService()
+        def avisar_atualizacao(release_info):
+            interface.notificar_atualizacao(
+                release_info['version'],
+                release_info['data'].get('body') or '',
+                lambda: updater.download_and_install(release_info)
+            )
+        interface.after_idle(updater.check_in_background, avisar_atualizacao)
+        
+        # Retomada pedida na linha de comando: opção já marcada na interface (a janela
+        # de emergência, aberta quando a interface falha, não tem a opção)
+        if args.retomar and hasattr(interface, 'retomar_var'):
+            interface.retomar_var.set(True)
+        
+        def processar(unidades, opcoes):
+            # Execução específica informada na linha de comando
+            if opcoes.get('retomar') and isinstance(args.retomar, str):
+                opcoes = {**opcoes, 'retomar': args.retomar}
+            if args.trace:
+                opcoes = {**opcoes, 'trace': args.trace}
+            iniciar_extracao(unidades, opcoes, interface)
+        
         # Define o callback de processamento
-        interface.definir_callback_processamento(
-            lambda unidades, opcoes: iniciar_extracao(unidades, opcoes, interface)
-        )
+        interface.definir_callback_processamento(processar)
         
         # Inicia o loop da interface
         interface.mainloop()
-        
+    
     except Exception as e:
-        print(f"Erro fatal: {e}")
-        traceback.print_exc()
+        logger.exception("Erro fatal: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,8 +1,10 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
 import time
+import atexit
 import traceback
+import os
 import sys
 from src.utils import config
 from typing import List, Callable
@@ -27,34 +29,105 @@ CORES = {
 altura = 900
 largura = 800
 
-
 class RedirectText:
-    """Classe para redirecionar a saída do console para o widget Text."""
+    """
+    Substitui o sys.stdout: as mensagens vão para o widget Text e para o arquivo de log.
+    
+    write apenas enfileira o texto e pode ser chamado de qualquer thread. A fila
+    é esvaziada em lotes pelo loop do Tk (after), com uma única inserção no
+    widget por ciclo, e o widget mantém só as últimas max_linhas linhas; o log
+    completo da sessão fica no arquivo.
+    """
     
-    def __init__(self, text_widget: tk.Text):
+    def __init__(self, text_widget: tk.Text, caminho_arquivo=None, max_linhas=None, intervalo_ms=None):
+        """
+        Args:
+            text_widget: Widget Text do log
+            caminho_arquivo: Arquivo do log completo. Se None, um arquivo por sessão em config.DIRETORIO_LOGS
+            max_linhas: Linhas mantidas no widget. Se None, usa config.MAX_LINHAS_LOG
+            intervalo_ms: Intervalo entre os lotes. Se None, usa config.INTERVALO_LOG_MS
+        """
         self.text_widget = text_widget
-        self.queue = queue.Queue()
-        self.updating = True
-        threading.Thread(target=self._update_widget, daemon=True).start()
-
+        self.queue = queue.SimpleQueue()
+        self.max_linhas = max_linhas or config.MAX_LINHAS_LOG
+        self.intervalo_ms = intervalo_ms or config.INTERVALO_LOG_MS
+        self.caminho_arquivo = caminho_arquivo or os.path.join(
+            config.DIRETORIO_LOGS, f"pamc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        )
+        self.arquivo = None
+        
+        # Mensagens ainda na fila ao encerrar o programa vão para o arquivo
+        atexit.register(self.fechar)
+        self.text_widget.after(self.intervalo_ms, self._drenar)
+    
     def write(self, string: str):
         self.queue.put(string)
+        return len(string)
     
     def flush(self):
         pass
-
-    def _update_widget(self):
-        """Atualiza o widget Text com as mensagens da fila."""
-        while self.updating:
-            try:
-                while True:  # Processa todas as mensagens disponíveis
-                    string = self.queue.get_nowait()
-                    self.text_widget.insert(tk.END, string)
-                    self.text_widget.see(tk.END)
-                    self.text_widget.update_idletasks()
-            except queue.Empty:
-                time.sleep(0.1)
-                continue
+    
+    def _coletar(self):
+        """Retira da fila todo o texto disponível."""
+        partes = []
+        try:
+            while True:
+                partes.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return ''.join(partes)
+    
+    def _gravar_arquivo(self, texto):
+        if self.caminho_arquivo is None:
+            return
+        try:
+            if self.arquivo is None:
+                os.makedirs(os.path.dirname(self.caminho_arquivo), exist_ok=True)
+                self.arquivo = open(self.caminho_arquivo, 'a', encoding='utf-8')
+            self.arquivo.write(texto)
+            self.arquivo.flush()
+        except OSError as e:
+            # Sem arquivo o log continua só no widget
+            self.caminho_arquivo = None
+            self.queue.put(f"Não foi possível gravar o arquivo de log: {e}\n")
+    
+    def _inserir(self, texto):
+        """Insere o lote no widget e descarta as linhas mais antigas além de max_linhas."""
+        linhas = texto.split('\n')
+        if len(linhas) > self.max_linhas:
+            texto = '\n'.join(linhas[-self.max_linhas:])
+        
+        # Só acompanha o final se o usuário não rolou o log para cima
+        no_final = self.text_widget.yview()[1] >= 1.0
+        self.text_widget.insert(tk.END, texto)
+        
+        excedente = int(self.text_widget.index('end-1c').split('.')[0]) - self.max_linhas
+        if excedente > 0:
+            self.text_widget.delete('1.0', f'{excedente + 1}.0')
+        if no_final:
+            self.text_widget.see(tk.END)
+    
+    def _drenar(self):
+        """Executado no loop do Tk: grava e exibe o lote de mensagens e agenda o próximo."""
+        texto = self._coletar()
+        try:
+            if texto:
+                self._gravar_arquivo(texto)
+                self._inserir(texto)
+            self.text_widget.after(self.intervalo_ms, self._drenar)
+        except tk.TclError:
+            # Janela fechada
+            self.fechar()
+    
+    def fechar(self):
+        """Grava o que restou na fila e fecha o arquivo de log."""
+        texto = self._coletar()
+        if texto:
+            self._gravar_arquivo(texto)
+        if self.arquivo:
+            self.arquivo.close()
+            self.arquivo = None
+            self.caminho_arquivo = None
 
 class SeletorUnidades(tk.Tk):
     # Definir tamanho padrão da janela
@@ -88,17 +161,29 @@ class SeletorUnidades(tk.Tk):
         # Configurar estilos
         self.configurar_estilos()
         
+        # Progresso mais recente informado pela extração, aplicado aos widgets
+        # a cada config.INTERVALO_PROGRESSO_MS (ver atualizar_progresso)
+        self._trava_progresso = threading.Lock()
+        self._progresso_pendente = None
+        
+        # Chamadas de outras threads executadas pelo loop do Tk (ver executar_no_loop)
+        self._chamadas_pendentes = queue.SimpleQueue()
+        self.aviso_atualizacao = None
+        
         # Criar layout principal
         self.criar_layout()
         
         # Callback para processar seleção
         self.callback_processar = None
-
+        
+        self.after(config.INTERVALO_PROGRESSO_MS, self._aplicar_progresso)
+    
     def criar_layout(self):
         """Cria o layout principal da aplicação."""
         # Frame principal com padding
         main_frame = ttk.Frame(self, padding="20", style='Main.TFrame')
         main_frame.pack(fill=tk.BOTH, expand=True)
+        self.main_frame = main_frame
         
         # Cabeçalho com logo e título
         self.criar_cabecalho(main_frame)
@@ -106,6 +191,7 @@ class SeletorUnidades(tk.Tk):
         # Área de conteúdo principal
         content_frame = ttk.Frame(main_frame, style='Content.TFrame')
         content_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 20))
+        self.content_frame = content_frame
         
         # Painel esquerdo: seleção de unidades
         self.criar_painel_selecao(content_frame)
@@ -174,12 +260,12 @@ class SeletorUnidades(tk.Tk):
             command=self.limpar_selecao,
             style='Action.TButton'
         ).pack(side=tk.LEFT)
-
+        
         # Debugging - mostrar unidades disponíveis
         print("Unidades prisionais disponíveis:")
         for unidade in config.UNIDADES_PRISIONAIS:
             print(f" - {unidade}: {config.DESCRICOES_UNIDADES.get(unidade, '')}")
-
+        
         # Frame para as checkboxes com scrollbar
         checkbox_container = ttk.Frame(selection_frame)
         checkbox_container.pack(fill=tk.BOTH, expand=True)
@@ -211,6 +297,13 @@ class SeletorUnidades(tk.Tk):
         self.modo_teste_var = tk.BooleanVar(value=False)
         self.limite_teste_var = tk.IntVar(value=5)
         self.mostrar_navegador_var = tk.BooleanVar(value=False)
+        self.paginas_paralelas_var = tk.IntVar(value=config.NUM_PAGINAS_PARALELAS)
+        self.modo_extracao_var = tk.StringVar(value=config.MODOS_EXTRACAO['navegador'])
+        self.forcar_atualizacao_cache_var = tk.BooleanVar(value=False)
+        self.modo_delta_var = tk.BooleanVar(value=False)
+        self.arquivo_base_delta_var = tk.StringVar(value="")
+        self.retomar_var = tk.BooleanVar(value=False)
+        self.formatos_exportacao_vars = {formato: tk.BooleanVar(value=False) for formato in config.FORMATOS_EXPORTACAO}
         
         # Modo de teste com descrição
         modo_frame = ttk.Frame(options_frame)
@@ -270,8 +363,156 @@ class SeletorUnidades(tk.Tk):
             style='Detail.TLabel'
         ).pack(anchor=tk.W, padx=(17, 0))
         
-        # Inicialmente desabilitar as opções de limite
+        # Modo de extração (navegador ou HTTP)
+        modo_extracao_frame = ttk.Frame(options_frame)
+        modo_extracao_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        ttk.Label(
+            modo_extracao_frame,
+            text="Modo de extração:"
+        ).pack(side=tk.LEFT)
+        
+        self.cb_modo_extracao = ttk.Combobox(
+            modo_extracao_frame,
+            textvariable=self.modo_extracao_var,
+            values=list(config.MODOS_EXTRACAO.values()),
+            state='readonly',
+            width=32
+        )
+        self.cb_modo_extracao.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Número de páginas simultâneas na extração de detalhes
+        paralelo_frame = ttk.Frame(options_frame)
+        paralelo_frame.pack(fill=tk.X, pady=(10, 5))
+        
+        paginas_frame = ttk.Frame(paralelo_frame)
+        paginas_frame.pack(anchor=tk.W)
+        
+        ttk.Label(
+            paginas_frame,
+            text="Páginas simultâneas:"
+        ).pack(side=tk.LEFT)
+        
+        self.sb_paginas_paralelas = ttk.Spinbox(
+            paginas_frame,
+            from_=1,
+            to=config.MAX_PAGINAS_PARALELAS,
+            width=4,
+            textvariable=self.paginas_paralelas_var,
+            state='readonly'
+        )
+        self.sb_paginas_paralelas.pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(
+            paralelo_frame,
+            text="Com mais de uma página (conexão no modo HTTP, processo\nno modo por unidade), os detalhes são extraídos em paralelo",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        ).pack(anchor=tk.W, padx=(17, 0))
+        
+        # Cache das páginas de detalhes
+        cache_frame = ttk.Frame(options_frame)
+        cache_frame.pack(fill=tk.X, pady=(10, 5))
+        
+        self.cb_forcar_atualizacao_cache = ttk.Checkbutton(
+            cache_frame,
+            text="Ignorar páginas em cache (baixar tudo de novo)",
+            variable=self.forcar_atualizacao_cache_var
+        )
+        self.cb_forcar_atualizacao_cache.pack(anchor=tk.W)
+        
+        ttk.Label(
+            cache_frame,
+            text="As páginas baixadas são reaproveitadas nas próximas\nexecuções enquanto estiverem dentro da validade",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        ).pack(anchor=tk.W, padx=(17, 0))
+        
+        # Modo delta a partir do Excel de uma execução anterior
+        delta_frame = ttk.Frame(options_frame)
+        delta_frame.pack(fill=tk.X, pady=(10, 5))
+        
+        self.cb_modo_delta = ttk.Checkbutton(
+            delta_frame,
+            text="Atualizar apenas presos novos ou alterados",
+            variable=self.modo_delta_var,
+            command=self.atualizar_opcoes_delta
+        )
+        self.cb_modo_delta.pack(anchor=tk.W)
+        
+        arquivo_delta_frame = ttk.Frame(delta_frame)
+        arquivo_delta_frame.pack(fill=tk.X, padx=(17, 0), pady=(3, 0))
+        
+        self.btn_arquivo_delta = ttk.Button(
+            arquivo_delta_frame,
+            text="Excel anterior...",
+            command=self.escolher_arquivo_delta,
+            style='Small.TButton'
+        )
+        self.btn_arquivo_delta.pack(side=tk.LEFT)
+        
+        self.lbl_arquivo_delta = ttk.Label(
+            arquivo_delta_frame,
+            text="Nenhum arquivo selecionado",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        )
+        self.lbl_arquivo_delta.pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(
+            delta_frame,
+            text="Os detalhes dos demais presos são copiados\ndo Excel gerado na execução anterior",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        ).pack(anchor=tk.W, padx=(17, 0))
+        
+        # Formatos gravados além do Excel
+        formatos_frame = ttk.Frame(options_frame)
+        formatos_frame.pack(fill=tk.X, pady=(10, 5))
+        
+        linha_formatos_frame = ttk.Frame(formatos_frame)
+        linha_formatos_frame.pack(anchor=tk.W)
+        
+        ttk.Label(
+            linha_formatos_frame,
+            text="Gravar também:"
+        ).pack(side=tk.LEFT)
+        
+        for formato, descricao in config.FORMATOS_EXPORTACAO.items():
+            ttk.Checkbutton(
+                linha_formatos_frame,
+                text=descricao,
+                variable=self.formatos_exportacao_vars[formato]
+            ).pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(
+            formatos_frame,
+            text="Arquivos com o mesmo nome do Excel e todas as unidades\nem uma única tabela (coluna UP), para análises",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        ).pack(anchor=tk.W, padx=(17, 0))
+        
+        # Retomar execução interrompida
+        retomar_frame = ttk.Frame(options_frame)
+        retomar_frame.pack(fill=tk.X, pady=(10, 5))
+        
+        self.cb_retomar = ttk.Checkbutton(
+            retomar_frame,
+            text="Retomar a última execução interrompida",
+            variable=self.retomar_var
+        )
+        self.cb_retomar.pack(anchor=tk.W)
+        
+        ttk.Label(
+            retomar_frame,
+            text="Usa as unidades e opções da execução interrompida\ne não extrai de novo os presos já concluídos",
+            foreground=CORES['texto_secundario'],
+            style='Detail.TLabel'
+        ).pack(anchor=tk.W, padx=(17, 0))
+        
+        # Inicialmente desabilitar as opções de limite e do modo delta
         self.atualizar_opcoes_teste()
+        self.atualizar_opcoes_delta()
         
         # Botões de ação
         action_frame = ttk.LabelFrame(
@@ -392,7 +633,7 @@ class SeletorUnidades(tk.Tk):
         # Limpar checkboxes existentes
         for child in self.checkbox_frame.winfo_children():
             child.destroy()
-            
+        
         # Verificar se há unidades configuradas
         unidades = getattr(config, 'UNIDADES_PRISIONAIS', [])
         
@@ -405,9 +646,9 @@ class SeletorUnidades(tk.Tk):
             ).pack(padx=10, pady=10)
             print("ERRO: Nenhuma unidade prisional configurada!")
             return
-            
+        
         print(f"Criando {len(unidades)} checkboxes para unidades prisionais...")
-            
+        
         # Exibir todas as unidades na mesma ordem que estão definidas no config
         for i, unidade in enumerate(unidades):
             # Frame para cada unidade
@@ -482,8 +723,9 @@ class SeletorUnidades(tk.Tk):
             # Desabilitar botão de cancelar
             self.btn_cancelar.config(state=tk.DISABLED)
             
-            # Atualizar estado das opções de teste conforme o checkbox principal
+            # Atualizar estado das opções de teste e do modo delta conforme os checkboxes
             self.atualizar_opcoes_teste()
+            self.atualizar_opcoes_delta()
     
     def desabilitar_widgets_recursivo(self, widget, tipos):
         """Desabilita recursivamente widgets de determinados tipos."""
@@ -512,7 +754,8 @@ class SeletorUnidades(tk.Tk):
     def iniciar_processamento(self):
         """Inicia o processamento em uma thread separada."""
         selecionadas = self.obter_unidades_selecionadas()
-        if not selecionadas:
+        # Ao retomar, as unidades vêm da execução interrompida
+        if not selecionadas and not self.retomar_var.get():
             messagebox.showwarning(
                 "Aviso", 
                 "Nenhuma unidade selecionada!\n\nSelecione pelo menos uma unidade para iniciar o processamento.",
@@ -522,13 +765,21 @@ class SeletorUnidades(tk.Tk):
         
         if self.processando:
             return
-            
+        
         # Resetar flag de cancelamento
         self.cancelar = False
         
         # Obter opções de teste
         opcoes_teste = self.obter_opcoes_teste()
         
+        if self.modo_delta_var.get() and not opcoes_teste['arquivo_base_delta']:
+            messagebox.showwarning(
+                "Aviso",
+                "Modo delta ativo sem arquivo!\n\nEscolha o Excel gerado na execução anterior.",
+                parent=self
+            )
+            return
+        
         # Atualizar estado da interface
         self.processando = True
         self.atualizar_estado_botoes(True)
@@ -592,7 +843,7 @@ class SeletorUnidades(tk.Tk):
     def limpar_log(self):
         """Limpa a área de log."""
         self.log_text.delete(1.0, tk.END)
-
+    
     def centralizar_janela(self):
         """Centraliza a janela na tela e garante que esteja totalmente visível."""
         try:
@@ -609,7 +860,7 @@ class SeletorUnidades(tk.Tk):
             
             if altura > altura_tela:
                 altura = int(altura_tela * 0.9)
-                
+            
             # Atualiza a variável tamanho para refletir as dimensões ajustadas
             self.tamanho = f"{largura}x{altura}"
             
@@ -629,7 +880,7 @@ class SeletorUnidades(tk.Tk):
         except Exception as e:
             print(f"Erro ao centralizar janela: {str(e)}")
             self.geometry(f"{largura}x{altura}+10+10")
-
+    
     def atualizar_opcoes_teste(self):
         """Atualiza o estado das opções de teste com base no checkbox de modo de teste."""
         if self.modo_teste_var.get():
@@ -643,51 +894,173 @@ class SeletorUnidades(tk.Tk):
             self.rb_limite_5.configure(state=tk.DISABLED)
             self.rb_limite_10.configure(state=tk.DISABLED)
     
+    def atualizar_opcoes_delta(self):
+        """Habilita a escolha do Excel anterior apenas com o modo delta ativo."""
+        estado = tk.NORMAL if self.modo_delta_var.get() else tk.DISABLED
+        self.btn_arquivo_delta.configure(state=estado)
+    
+    def escolher_arquivo_delta(self):
+        """Abre o diálogo para escolher o Excel da execução anterior."""
+        caminho = filedialog.askopenfilename(
+            title="Escolher Excel da execução anterior",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
+        )
+        if caminho:
+            self.arquivo_base_delta_var.set(caminho)
+            self.lbl_arquivo_delta.configure(text=os.path.basename(caminho))
+    
     def obter_opcoes_teste(self):
         """Retorna as opções de teste selecionadas."""
         return {
             'modo_teste': self.modo_teste_var.get(),
             'limite_teste': self.limite_teste_var.get(),
-            'mostrar_navegador': self.mostrar_navegador_var.get()
+            'mostrar_navegador': self.mostrar_navegador_var.get(),
+            'paginas_paralelas': self.paginas_paralelas_var.get(),
+            'modo_extracao': self.obter_modo_extracao(),
+            'forcar_atualizacao_cache': self.forcar_atualizacao_cache_var.get(),
+            'arquivo_base_delta': self.arquivo_base_delta_var.get() if self.modo_delta_var.get() else None,
+            'retomar': self.retomar_var.get(),
+            'formatos_exportacao': [formato for formato, var in self.formatos_exportacao_vars.items() if var.get()]
         }
-
+    
+    def obter_modo_extracao(self):
+        """Retorna a chave de config.MODOS_EXTRACAO correspondente ao modo selecionado."""
+        descricao = self.modo_extracao_var.get()
+        for modo, texto in config.MODOS_EXTRACAO.items():
+            if texto == descricao:
+                return modo
+        return 'navegador'
+    
     def atualizar_progresso(self, mensagem, percentual=None):
-        """Atualiza a barra de progresso e a mensagem associada."""
-        # Atualizar na thread principal (evitar conflitos de thread)
-        def _update():
-            # Atualizar mensagem
+        """
+        Informa o progresso (chamado de qualquer thread, quantas vezes for preciso).
+        
+        Só o estado mais recente é guardado: a mensagem e o último percentual
+        informado são aplicados aos widgets pelo loop do Tk a cada
+        config.INTERVALO_PROGRESSO_MS. As mensagens de andamento
+        (config.PREFIXOS_PROGRESSO_SEM_LOG) e as sem percentual só atualizam o
+        status; as demais também vão para o log.
+        
+        Args:
+            mensagem: Texto do status
+            percentual: 0 reinicia a barra, negativo a deixa indeterminada, None mantém o valor atual
+        """
+        with self._trava_progresso:
+            if self._progresso_pendente is None or percentual is not None:
+                self._progresso_pendente = (mensagem, percentual)
+            else:
+                self._progresso_pendente = (mensagem, self._progresso_pendente[1])
+        
+        if percentual is not None and not (isinstance(mensagem, str) and mensagem.startswith(config.PREFIXOS_PROGRESSO_SEM_LOG)):
+            print(mensagem)
+    
+    def executar_no_loop(self, funcao, *args):
+        """
+        Agenda uma chamada para o loop do Tk (pode ser usado de qualquer thread).
+        
+        A chamada é feita no próximo ciclo de _aplicar_progresso, no máximo
+        config.INTERVALO_PROGRESSO_MS depois.
+        """
+        self._chamadas_pendentes.put((funcao, args))
+    
+    def _aplicar_progresso(self):
+        """Executado no loop do Tk: aplica o progresso pendente e agenda o próximo ciclo."""
+        with self._trava_progresso:
+            pendente, self._progresso_pendente = self._progresso_pendente, None
+        
+        while True:
+            try:
+                funcao, args = self._chamadas_pendentes.get_nowait()
+            except queue.Empty:
+                break
+            funcao(*args)
+        
+        if pendente is not None:
+            mensagem, percentual = pendente
             self.progresso_label.config(text=mensagem)
             
-            # Atualizar percentual se fornecido
             if percentual is not None:
                 # Se for zero, resetar barra
                 if percentual == 0:
+                    self.progress_bar.stop()
+                    self.progress_bar.config(mode='determinate')
                     self.progress_var.set(0)
                     self.percentual_label.config(text="0%")
-                    self.progress_bar.config(mode='determinate')
                 # Se for negativo, usar modo indeterminado
                 elif percentual < 0:
-                    self.progress_bar.config(mode='indeterminate')
-                    self.progress_bar.start(50)
+                    if str(self.progress_bar.cget('mode')) != 'indeterminate':
+                        self.progress_bar.config(mode='indeterminate')
+                        self.progress_bar.start(50)
                     self.percentual_label.config(text="")
                 else:
                     # Modo determinado com valor definido
-                    self.progress_bar.config(mode='determinate')
-                    self.progress_bar.stop()
+                    if str(self.progress_bar.cget('mode')) != 'determinate':
+                        self.progress_bar.stop()
+                        self.progress_bar.config(mode='determinate')
                     self.progress_var.set(percentual)
                     self.percentual_label.config(text=f"{int(percentual)}%")
-            
-            # Atualizar UI
-            self.update_idletasks()
         
-        # Agendar atualização na thread principal
-        self.after(0, _update)
+        self.after(config.INTERVALO_PROGRESSO_MS, self._aplicar_progresso)
+    
+    def notificar_atualizacao(self, versao, notas, atualizar):
+        """
+        Avisa, sem bloquear a janela, que há uma nova versão (pode ser chamado de qualquer thread).
         
-        # Também adicionar mensagem ao log, se for informativa
-        if percentual is not None and (percentual == 0 or percentual == 100 or 
-                                  (isinstance(mensagem, str) and not mensagem.startswith("Extraindo dados:"))):
-            print(mensagem)
-
+        O aviso aparece abaixo do cabeçalho com os botões "Atualizar agora" e
+        "Depois"; a extração continua disponível enquanto ele estiver aberto.
+        
+        Args:
+            versao: Versão disponível
+            notas: Notas da release (a primeira linha é exibida no aviso)
+            atualizar: Função sem argumentos que baixa e inicia a instalação, executada
+                       fora do loop do Tk; retorna True se o instalador foi iniciado
+        """
+        self.executar_no_loop(self._exibir_aviso_atualizacao, versao, notas, atualizar)
+    
+    def _exibir_aviso_atualizacao(self, versao, notas, atualizar):
+        if self.aviso_atualizacao is not None:
+            self.aviso_atualizacao.destroy()
+        
+        aviso = ttk.Frame(self.main_frame, padding=10, style='Update.TFrame')
+        aviso.pack(fill=tk.X, pady=(0, 10), before=self.content_frame)
+        self.aviso_atualizacao = aviso
+        
+        resumo = next((linha.strip() for linha in (notas or '').splitlines() if linha.strip()), '')
+        texto = f"Nova versão disponível: {versao}" + (f" - {resumo}" if resumo else "")
+        mensagem_label = ttk.Label(aviso, text=texto, style='Update.TLabel', wraplength=500)
+        mensagem_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        def fechar():
+            aviso.destroy()
+            self.aviso_atualizacao = None
+        
+        def atualizar_agora():
+            if self.processando:
+                messagebox.showinfo("Atualização", "Aguarde o fim da extração para atualizar.")
+                return
+            btn_atualizar.config(state=tk.DISABLED)
+            btn_depois.config(state=tk.DISABLED)
+            mensagem_label.config(text=f"Baixando a versão {versao}...")
+            
+            def baixar():
+                instalado = atualizar()
+                self.executar_no_loop(concluir, instalado)
+            threading.Thread(target=baixar, name="download-atualizacao", daemon=True).start()
+        
+        def concluir(instalado):
+            if instalado:
+                # O instalador substitui a aplicação em execução
+                self.destroy()
+                return
+            mensagem_label.config(text=f"Não foi possível atualizar para a versão {versao}. Veja o log para detalhes.")
+            btn_atualizar.config(state=tk.NORMAL)
+            btn_depois.config(state=tk.NORMAL)
+        
+        btn_depois = ttk.Button(aviso, text="Depois", command=fechar, style='Small.TButton')
+        btn_depois.pack(side=tk.RIGHT)
+        btn_atualizar = ttk.Button(aviso, text="Atualizar agora", command=atualizar_agora, style='Small.TButton')
+        btn_atualizar.pack(side=tk.RIGHT, padx=(10, 5))
+    
     def configurar_estilos(self):
         """Configura os estilos personalizados para os widgets."""
         estilo = ttk.Style()
@@ -705,6 +1078,8 @@ class SeletorUnidades(tk.Tk):
         estilo.configure('Header.TFrame', background=CORES['fundo'])
         estilo.configure('Progress.TFrame', background=CORES['fundo'])
         estilo.configure('CheckboxArea.TFrame', background=CORES['fundo'])
+        estilo.configure('Update.TFrame', background=CORES['destaque'])
+        estilo.configure('Update.TLabel', background=CORES['destaque'], foreground=CORES['texto'])
         
         # Botões
         estilo.configure('TButton', 
@@ -888,13 +1263,16 @@ def criar_interface() -> SeletorUnidades:
             # Métodos necessários para compatibilidade
             def definir_callback_processamento(self, callback):
                 print("Interface em modo de emergência - processamento desativado")
-                
+            
             def atualizar_progresso(self, mensagem, percentual=None):
                 print(f"Progresso (emergência): {mensagem}")
-                
+            
             def verificar_cancelamento(self):
                 return False
-                
+            
+            def notificar_atualizacao(self, versao, notas, atualizar):
+                print(f"Nova versão disponível: {versao}")
+        
         return InterfaceEmergencia(str(e))
 
 if __name__ == "__main__":
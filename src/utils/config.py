@@ -1,20 +1,30 @@
 # Configurações do Sistema
 import os
+import sys
+from urllib.parse import urlsplit
 
 # Configurações de Atualização
 APP_NAME = "PAMC-ADM"
 APP_VERSION = "v1.0.0"
 GITHUB_REPO = "A-Assuncao/PAMC-ADM"  # Formato: "dono/repositório"
 
+# Endereço do Canaimé. PAMC_URL_CANAIME aponta a extração para outro servidor
+# (por exemplo o servidor local de testes em tests/servidor_canaime.py)
+URL_BASE_CANAIME = os.environ.get('PAMC_URL_CANAIME', 'https://canaime.com.br').rstrip('/')
+
+# Sessão autenticada usada pela extração (src.core.sessao): 'canaime' faz o login
+# pelo login-canaime; 'local' abre o navegador sem login (servidor local de testes)
+PROVEDOR_SESSAO = os.environ.get('PAMC_PROVEDOR_SESSAO', 'canaime')
+
 # URLs do sistema
-URL_LISTA_PRESOS = 'https://canaime.com.br/sgp2rr/areas/impressoes/UND_ChamadaFOTOS_todos2.php?id_und_prisional='
-URL_INFORMES = 'https://canaime.com.br/sgp2rr/areas/unidades/Informes_LER.php?id_cad_preso='
-URL_FICHA_PRESO = 'https://canaime.com.br/sgp2rr/areas/unidades/Ficha_Preso_index.php?id_cad_preso='
-URL_CADASTRO = 'https://canaime.com.br/sgp2rr/areas/unidades/cadastro.php?id_cad_preso='
-URL_CERTIDAO_CARCERARIA = 'https://canaime.com.br/sgp2rr/areas/impressoes/UND_CertidaoCarceraria.php?id_cad_preso='
-URL_FICHA_CARCERARIA = 'https://canaime.com.br/sgp2rr/areas/impressoes/UND_FichaCarceraria.php?id_cad_preso='
-INICIO_URL_FOTOS = 'https://canaime.com.br/sgp2rr/fotos/presos/'
-URL_UNIDADE = 'https://canaime.com.br/sgp2rr/areas/impressoes/UND_ChamadaFOTOS_todos2.php?id_und_prisional='
+URL_LISTA_PRESOS = f'{URL_BASE_CANAIME}/sgp2rr/areas/impressoes/UND_ChamadaFOTOS_todos2.php?id_und_prisional='
+URL_INFORMES = f'{URL_BASE_CANAIME}/sgp2rr/areas/unidades/Informes_LER.php?id_cad_preso='
+URL_FICHA_PRESO = f'{URL_BASE_CANAIME}/sgp2rr/areas/unidades/Ficha_Preso_index.php?id_cad_preso='
+URL_CADASTRO = f'{URL_BASE_CANAIME}/sgp2rr/areas/unidades/cadastro.php?id_cad_preso='
+URL_CERTIDAO_CARCERARIA = f'{URL_BASE_CANAIME}/sgp2rr/areas/impressoes/UND_CertidaoCarceraria.php?id_cad_preso='
+URL_FICHA_CARCERARIA = f'{URL_BASE_CANAIME}/sgp2rr/areas/impressoes/UND_FichaCarceraria.php?id_cad_preso='
+INICIO_URL_FOTOS = f'{URL_BASE_CANAIME}/sgp2rr/fotos/presos/'
+URL_UNIDADE = f'{URL_BASE_CANAIME}/sgp2rr/areas/impressoes/UND_ChamadaFOTOS_todos2.php?id_und_prisional='
 
 # Lista de unidades prisionais disponíveis
 UNIDADES_PRISIONAIS = ['PAMC', 'CPBV', 'CPFBV', 'CPP', 'CABV', 'UPRRO', 'CME', 'DICAP']
@@ -34,10 +44,110 @@ DESCRICOES_UNIDADES = {
 # Diretórios
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+def _diretorio_dados():
+    """
+    Pasta dos arquivos que precisam durar entre execuções (caches, diários, logs).
+    
+    No executável do PyInstaller, BASE_DIR fica na pasta temporária de extração
+    (_MEIPASS), apagada ao fechar o programa; usa-se então a pasta de dados do
+    usuário (%LOCALAPPDATA%\\PAMC-ADM no Windows). Rodando do código-fonte, a raiz
+    do projeto. A variável de ambiente PAMC_DIRETORIO_DADOS substitui ambas.
+    """
+    if os.environ.get('PAMC_DIRETORIO_DADOS'):
+        return os.path.abspath(os.environ['PAMC_DIRETORIO_DADOS'])
+    if getattr(sys, 'frozen', False):
+        base = (os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_DATA_HOME')
+                or os.path.join(os.path.expanduser('~'), '.local', 'share'))
+        return os.path.join(base, APP_NAME)
+    return os.path.abspath(os.path.join(BASE_DIR, '..'))
+
+DIRETORIO_DADOS = _diretorio_dados()
 
 # Timeout para requisições em milissegundos
 TIMEOUT = 0
 
+# Novas tentativas das operações de rede (src.core.tentativas): só timeouts e
+# erros de navegação são tentados de novo, com espera exponencial e jitter
+MAX_TENTATIVAS = 3
+ESPERA_BASE_TENTATIVAS = 1.0
+ESPERA_MAXIMA_TENTATIVAS = 30.0
+# Disjuntor: com pelo menos MINIMO_OPERACOES_DISJUNTOR resultados entre os últimos
+# JANELA_DISJUNTOR e a fração de falhas em LIMITE_FALHAS_DISJUNTOR, a extração
+# pausa por PAUSA_DISJUNTOR segundos
+JANELA_DISJUNTOR = 20
+MINIMO_OPERACOES_DISJUNTOR = 10
+LIMITE_FALHAS_DISJUNTOR = 0.5
+PAUSA_DISJUNTOR = 60
+# Trecho da URL da tela de login: navegar para ela indica sessão expirada
+TRECHO_URL_LOGIN = 'sgp2rr/login/'
+
+# Política de recursos das páginas no navegador (src.core.politica_recursos).
+# Para cada família de URL ('URL_UNIDADE', chaves de URL_PARA_CHAVE ou 'padrao'):
+# tipos de recurso (resource_type do Playwright) bloqueados, tipos servidos do
+# cache local em disco e evento aguardado na navegação ('domcontentloaded',
+# 'load' ou 'seletor'). As famílias sem entrada própria usam 'padrao'.
+POLITICA_RECURSOS = {
+    'padrao': {
+        'bloquear': ['image', 'media', 'font', 'stylesheet'],
+        'cache': ['script'],
+        'esperar': 'domcontentloaded',
+    },
+}
+# Hosts dos quais as páginas podem carregar recursos; os de terceiros são bloqueados
+HOSTS_PERMITIDOS = [urlsplit(URL_BASE_CANAIME).hostname]
+# Extensões de URL de cada tipo de recurso. Só as requisições de hosts de
+# terceiros e as com a extensão de um tipo bloqueado ou servido do cache passam
+# pela política em Python; as demais (documentos, XHR) seguem direto no
+# navegador, sem a ida e volta até o processo Python em cada requisição
+EXTENSOES_RECURSOS = {
+    'image': ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'ico', 'svg', 'webp'],
+    'media': ['mp3', 'mp4', 'ogg', 'wav', 'webm'],
+    'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+    'stylesheet': ['css'],
+    'script': ['js'],
+}
+# Espera máxima pelo seletor de prontidão (modo 'seletor'), em milissegundos
+TIMEOUT_SELETOR_PRONTO = 5000
+# Cache local dos recursos estáticos servidos às páginas
+DIRETORIO_CACHE_ESTATICOS = os.path.join(DIRETORIO_DADOS, 'cache', 'estaticos')
+VALIDADE_CACHE_ESTATICOS = 7 * 24 * 3600
+
+# Medição do tempo das etapas da extração (src.core.medicao): resumo com os
+# percentis por família de URL ao final (histogramas de tamanho fixo) e, com
+# --trace, arquivo Chrome trace com cada intervalo
+MEDIR_ETAPAS = True
+DIRETORIO_TRACES = os.path.join(DIRETORIO_DADOS, 'output', 'traces')
+
+# Verificação de atualizações (src.utils.updater), feita em segundo plano depois
+# que a janela abre. A última resposta de releases/latest fica em
+# ARQUIVO_CACHE_RELEASE e é reaproveitada por VALIDADE_CACHE_RELEASE segundos;
+# depois disso a consulta é condicional (If-None-Match) e a resposta 304 do
+# GitHub não conta no limite de requisições
+ARQUIVO_CACHE_RELEASE = os.path.join(DIRETORIO_DADOS, 'cache', 'ultima_release.json')
+VALIDADE_CACHE_RELEASE = 6 * 3600
+TIMEOUT_VERIFICACAO_ATUALIZACAO = 10
+
+# Download das atualizações (src.utils.download): arquivo .part retomável com
+# HTTP Range, dividido em CONEXOES_DOWNLOAD_ATUALIZACAO faixas simultâneas a
+# partir de TAMANHO_MINIMO_FAIXAS_MB. Cada leitura começa com
+# BLOCO_INICIAL_DOWNLOAD_KB e se ajusta à velocidade do link até
+# BLOCO_MAXIMO_DOWNLOAD_KB. Sem o SHA-256 publicado na release (campo digest
+# do asset ou arquivo .sha256/SHA256SUMS) a atualização só é instalada se
+# EXIGIR_HASH_ATUALIZACAO for False
+CONEXOES_DOWNLOAD_ATUALIZACAO = 4
+TAMANHO_MINIMO_FAIXAS_MB = 8
+BLOCO_INICIAL_DOWNLOAD_KB = 64
+BLOCO_MAXIMO_DOWNLOAD_KB = 4096
+TENTATIVAS_DOWNLOAD_ATUALIZACAO = 5
+TIMEOUT_DOWNLOAD_ATUALIZACAO = 30
+EXIGIR_HASH_ATUALIZACAO = True
+
+# Atualização por patch binário (bsdiff, pacote bsdiff4 incluído no executável): a release
+# pode publicar, com o nome de MODELO_PATCH_ATUALIZACAO, a diferença entre o
+# executável da versão anterior e o da nova. O resultado do patch é conferido
+# com o SHA-256 do executável completo, baixado se o patch faltar ou falhar
+MODELO_PATCH_ATUALIZACAO = "{app}_{versao_atual}_{versao_nova}.bsdiff"
+
 # Ordem das colunas no arquivo final
 COLUNAS = [
     # 1. Identificação e Localização na Instituição
@@ -145,10 +255,65 @@ LOCALIZADORES = {
         'PROCESSO': 'tr:nth-child(30) .titulobk',
         'REU': 'tr:nth-child(31) .titulobk~ .titulobk',
         'REGIME': 'tr:nth-child(28) .titulobk~ .titulobk',
+        # Problema conhecido: mesmo seletor de ARTIGO, então a coluna recebe o artigo.
+        # O benchmark (tests/benchmark_extracao.py) informa essa divergência à parte
         'SENTENÇA DIAS': 'tr:nth-child(25) .titulobk~ .titulobk',
     }
 }
 
+# Rótulos exibidos nas páginas de detalhes para cada coluna (texto que antecede o
+# valor na mesma linha da tabela). Uma tupla lista rótulos alternativos, sempre
+# comparados com o rótulo inteiro: palavras soltas como 'COR' ou 'SENTENÇA'
+# casariam com outros campos. Colunas sem rótulo, ou cujo rótulo não for
+# encontrado, usam o seletor de LOCALIZADORES.
+ROTULOS = {
+    'URL_FICHA_PRESO': {
+        'VULGO': 'VULGO',
+    },
+    'URL_CADASTRO': {
+        'SEXO': 'SEXO',
+        'DATA NASC.': ('DATA NASC.', 'DATA DE NASCIMENTO'),
+        'RG': ('RG', 'IDENTIDADE'),
+        'PAI': 'PAI',
+        'ENDEREÇO': 'ENDEREÇO',
+        'CIDADE': 'CIDADE',
+        'ESTADO': ('ESTADO', 'UF'),
+        'PAÍS': 'PAÍS',
+    },
+    'URL_INFORMES': {
+        'ALTURA': 'ALTURA',
+        'COR / ETNIA': ('COR / ETNIA', 'COR/ETNIA', 'COR DA PELE'),
+        'QTD FILHOS': ('QTD FILHOS', 'QTD. FILHOS'),
+        'ESCOLARIDADE': ('ESCOLARIDADE', 'GRAU DE INSTRUÇÃO'),
+        'PROFISSÃO': 'PROFISSÃO',
+        'RELIGIÃO': 'RELIGIÃO',
+        'MODUS OPERANDI': 'MODUS OPERANDI',
+    },
+    'URL_CERTIDAO_CARCERARIA': {
+        'CONDUTA': 'CONDUTA',
+    },
+    'URL_FICHA_CARCERARIA': {
+        'ESTADO CIVIL': 'ESTADO CIVIL',
+        'DATA PRISÃO': ('DATA PRISÃO', 'DATA DA PRISÃO'),
+        'DOM. CRIMINAL': ('DOM. CRIMINAL', 'DOMICÍLIO CRIMINAL'),
+        'CONDENADO?': ('CONDENADO?', 'CONDENADO'),
+        'CRIME': 'CRIME',
+        'ARTIGO': 'ARTIGO',
+        'PROCESSO': ('PROCESSO', 'Nº PROCESSO'),
+        'REU': ('RÉU', 'REU'),
+        'REGIME': 'REGIME',
+        'SENTENÇA DIAS': ('SENTENÇA DIAS', 'PENA EM DIAS'),
+    },
+}
+
+# Se True, resolve as colunas pelos rótulos de ROTULOS (com fallback posicional).
+# Desligado até uma execução no modo 'paridade' nas páginas reais do Canaimé
+# confirmar que os rótulos dão os mesmos valores de LOCALIZADORES
+EXTRACAO_POR_ROTULOS = False
+
+# URLs cujos localizadores devem usar o último elemento encontrado (as demais usam o primeiro)
+LOCALIZADORES_ULTIMO_ELEMENTO = ['URL_CERTIDAO_CARCERARIA']
+
 LISTA_URLS_INFO_PRESO = [
     URL_FICHA_PRESO,
     URL_INFORMES,
@@ -157,6 +322,108 @@ LISTA_URLS_INFO_PRESO = [
     URL_CADASTRO
 ]
 
+# Mapeamento das URLs de detalhes para as chaves do dicionário LOCALIZADORES
+URL_PARA_CHAVE = {
+    URL_FICHA_PRESO: 'URL_FICHA_PRESO',
+    URL_CADASTRO: 'URL_CADASTRO',
+    URL_INFORMES: 'URL_INFORMES',
+    URL_CERTIDAO_CARCERARIA: 'URL_CERTIDAO_CARCERARIA',
+    URL_FICHA_CARCERARIA: 'URL_FICHA_CARCERARIA'
+}
+
+# Número padrão de páginas abertas simultaneamente pelo motor assíncrono. Com 1
+# a extração usa o motor sequencial: a concorrência contra o Canaimé é escolhida
+# na interface (ou com --connections) até o motor assíncrono ser validado no
+# servidor real
+NUM_PAGINAS_PARALELAS = 1
+# Limite de páginas simultâneas aceito pela interface
+MAX_PAGINAS_PARALELAS = 12
+
+# Modos de extração disponíveis na interface
+MODOS_EXTRACAO = {
+    'navegador': 'Navegador (Playwright)',
+    'http': 'HTTP sem navegador',
+    'paridade': 'HTTP com verificação de paridade',
+    'processos': 'Navegador por unidade (processos)',
+}
+
+# Número de processos (um navegador cada) no modo de extração por unidade. Com
+# páginas simultâneas no padrão (NUM_PAGINAS_PARALELAS) vale este número; um
+# valor maior na interface ou em --connections o substitui. Cada processo abre
+# um Chromium inteiro (centenas de MB), por isso o total fica limitado a um teto
+# fixo em vez de acompanhar o número de núcleos
+NUM_PROCESSOS_UNIDADES = 2
+MAX_PROCESSOS_UNIDADES = 4
+
+# Timeout das requisições do modo HTTP em segundos
+TIMEOUT_HTTP = 30
+# Número padrão de conexões simultâneas no modo HTTP
+NUM_CONEXOES_HTTP = 8
+# Quantidade de presos por unidade comparados com o navegador no modo de paridade
+AMOSTRA_PARIDADE = 5
+
+# Cache em disco das páginas de detalhes dos presos
+USAR_CACHE_PAGINAS = True
+CAMINHO_CACHE_PAGINAS = os.path.join(DIRETORIO_DADOS, 'cache', 'paginas.sqlite3')
+# Tamanho máximo das páginas comprimidas no cache em MB
+TAMANHO_MAXIMO_CACHE_MB = 512
+# Nível de compressão zstandard (quando instalado; sem ele é usado zlib)
+NIVEL_COMPRESSAO_CACHE = 10
+# Validade das páginas em cache, em segundos, para cada família de URL
+TTL_CACHE_PAGINAS = {
+    'URL_FICHA_PRESO': 7 * 24 * 3600,
+    'URL_CADASTRO': 7 * 24 * 3600,
+    'URL_INFORMES': 3 * 24 * 3600,
+    'URL_FICHA_CARCERARIA': 12 * 3600,
+    'URL_CERTIDAO_CARCERARIA': 12 * 3600,
+}
+
+# Colunas da lista da unidade comparadas no modo delta: se alguma mudar desde a
+# execução anterior, as páginas de detalhes do preso são visitadas de novo
+COLUNAS_COMPARACAO_DELTA = ['UP', 'NOME', 'MÃE', 'CPF', 'ALA', 'CELA']
+
+# Pasta dos diários de execução usados para retomar extrações interrompidas
+DIRETORIO_DIARIOS = os.path.join(DIRETORIO_DADOS, 'checkpoints')
+# Se False, o diário é apagado quando o Excel da execução é gravado
+MANTER_DIARIOS_CONCLUIDOS = False
+
+# Linhas copiadas do DataFrame por vez na gravação do Excel (memória da exportação)
+LINHAS_POR_BLOCO_EXPORTACAO = 2000
+
+# Formatos adicionais gravados ao lado do Excel, escolhidos na interface
+FORMATOS_EXPORTACAO = {
+    'parquet': 'Parquet',
+    'csv': 'CSV',
+    'sqlite': 'SQLite',
+}
+# Colunas com poucos valores distintos gravadas como categoria (dicionário no Parquet)
+COLUNAS_CATEGORICAS_EXPORTACAO = [
+    'UP', 'ALA', 'CELA', 'SEXO', 'COR / ETNIA', 'CIDADE', 'ESTADO', 'PAÍS',
+    'ESTADO CIVIL', 'ESCOLARIDADE', 'RELIGIÃO', 'CONDUTA', 'CONDENADO?', 'REU', 'REGIME',
+]
+
+# Log da interface: a fila de mensagens é esvaziada a cada INTERVALO_LOG_MS pelo
+# loop do Tk e o widget mantém só as últimas MAX_LINHAS_LOG linhas; o log
+# completo de cada sessão é gravado em DIRETORIO_LOGS
+INTERVALO_LOG_MS = 100
+MAX_LINHAS_LOG = 5000
+DIRETORIO_LOGS = os.path.join(DIRETORIO_DADOS, 'logs')
+
+# Log estruturado (src.utils.logger): uma linha JSON por mensagem em
+# ARQUIVO_LOG_JSON, com rotação ao atingir TAMANHO_MAXIMO_LOG_MB. Mensagens
+# abaixo de NIVEL_LOG (variável de ambiente PAMC_NIVEL_LOG) são descartadas
+# antes de formatadas; use DEBUG para registrar cada preso processado
+NIVEL_LOG = os.environ.get('PAMC_NIVEL_LOG', 'INFO').upper()
+ARQUIVO_LOG_JSON = os.path.join(DIRETORIO_LOGS, 'pamc.jsonl')
+TAMANHO_MAXIMO_LOG_MB = 10
+ARQUIVOS_LOG_ANTERIORES = 5
+
+# Progresso da interface: as chamadas da extração só guardam o estado mais
+# recente, aplicado aos widgets a cada INTERVALO_PROGRESSO_MS (10 por segundo).
+# Mensagens com estes prefixos atualizam o status sem ir para o log
+INTERVALO_PROGRESSO_MS = 100
+PREFIXOS_PROGRESSO_SEM_LOG = ('Extraindo dados:', 'Extraindo detalhes:')
+
 
 
 # Requisitos para o sistema de atualização
@@ -0,0 +1,360 @@
+"""
+Download retomável dos arquivos de atualização.
+
+O arquivo é gravado em <destino>.part e só recebe o nome final depois que o
+SHA-256 confere. O andamento de cada faixa de bytes fica em <destino>.part.json:
+um download interrompido (queda do link, aplicação fechada) continua de onde
+parou com requisições HTTP Range, validadas pelo ETag com If-Range.
+
+Arquivos grandes são divididos em faixas baixadas por conexões simultâneas,
+quando o servidor aceita Range. O tamanho de cada leitura acompanha a
+velocidade do link e o SHA-256 é calculado durante o download, sobre o trecho
+inicial contínuo já gravado (as faixas seguintes entram à medida que a
+anterior termina).
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from urllib3.exceptions import HTTPError as ErroTransferencia
+
+from src.utils import config
+from src.utils.logger import Logger
+
+logger = Logger.get_logger('download')
+
+# Duração buscada para cada leitura: o bloco dobra nos links rápidos e cai pela metade nos lentos
+DURACAO_ALVO_LEITURA = 0.5
+
+# Intervalo mínimo entre gravações do andamento em <destino>.part.json
+INTERVALO_ESTADO = 1.0
+
+TAMANHO_LEITURA_DISCO = 1024 * 1024
+
+PADRAO_SHA256 = re.compile(r'^[0-9a-fA-F]{64}$')
+
+class FalhaDownloadError(Exception):
+    """Download não concluído depois de todas as tentativas."""
+
+class HashDivergenteError(FalhaDownloadError):
+    """O arquivo baixado não tem o SHA-256 publicado."""
+
+class _ReiniciarDownload(Exception):
+    """O servidor ignorou o Range (ou o arquivo mudou): o .part é descartado."""
+
+def calcular_sha256(caminho):
+    """Retorna o SHA-256 (hexadecimal) de um arquivo em disco."""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_LEITURA_DISCO), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+def ler_sha256_publicado(texto, nome_arquivo):
+    """
+    Procura o hash de um arquivo no formato do sha256sum.
+    
+    Args:
+        texto: Conteúdo de um arquivo .sha256 (só o hash ou "hash  nome") ou SHA256SUMS
+        nome_arquivo: Nome do arquivo procurado nas linhas com nome
+    
+    Returns:
+        str or None: Hash em minúsculas ou None se não encontrado
+    """
+    linhas = [linha.split() for linha in texto.splitlines() if linha.strip()]
+    for partes in linhas:
+        if not PADRAO_SHA256.match(partes[0]):
+            continue
+        nome = partes[-1].lstrip('*') if len(partes) > 1 else None
+        if nome == nome_arquivo or (nome is None and len(linhas) == 1):
+            return partes[0].lower()
+    return None
+
+class _HashProgressivo:
+    """SHA-256 calculado em ordem sobre o trecho inicial contínuo do arquivo."""
+    
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.sha256 = hashlib.sha256()
+        self.posicao = 0
+    
+    def atualizar(self, inicio, dados, fronteira):
+        """
+        Acrescenta um bloco recém-gravado e avança até a fronteira.
+        
+        Args:
+            inicio: Posição do bloco no arquivo
+            dados: Bytes do bloco (usados direto quando continuam o hash)
+            fronteira: Fim do trecho inicial já gravado por completo
+        """
+        if inicio == self.posicao:
+            self.sha256.update(dados)
+            self.posicao += len(dados)
+        self.avancar(fronteira)
+    
+    def avancar(self, fronteira):
+        """Lê do disco o que falta até a fronteira (faixas terminadas fora de ordem e retomadas)."""
+        if fronteira <= self.posicao:
+            return
+        with open(self.caminho, 'rb') as arquivo:
+            arquivo.seek(self.posicao)
+            while self.posicao < fronteira:
+                dados = arquivo.read(min(TAMANHO_LEITURA_DISCO, fronteira - self.posicao))
+                if not dados:
+                    break
+                self.sha256.update(dados)
+                self.posicao += len(dados)
+
+class _Download:
+    """Estado de um download: faixas, arquivo .part e hash."""
+    
+    def __init__(self, url, destino, tamanho, identificador, conexoes):
+        self.url = url
+        self.destino = destino
+        self.parcial = destino + '.part'
+        self.caminho_estado = self.parcial + '.json'
+        self.tamanho = tamanho
+        self.identificador = identificador
+        self.conexoes = conexoes
+        self.etag = None
+        self.faixas = []
+        self.hash = _HashProgressivo(self.parcial)
+        self._trava = threading.Lock()
+        self._estado_gravado_em = 0
+    
+    # Andamento em disco
+    
+    def retomar(self):
+        """Carrega o andamento de um download anterior do mesmo arquivo. Retorna True se houver."""
+        try:
+            with open(self.caminho_estado, encoding='utf-8') as arquivo:
+                estado = json.load(arquivo)
+        except (OSError, ValueError):
+            return False
+        if (estado.get('url') != self.url or estado.get('identificador') != self.identificador
+                or (self.tamanho is not None and estado.get('tamanho') != self.tamanho)
+                or not os.path.exists(self.parcial)):
+            return False
+        self.tamanho = estado.get('tamanho')
+        self.etag = estado.get('etag')
+        self.faixas = estado['faixas']
+        return True
+    
+    def _gravar_estado(self, forcar=False):
+        # Chamado com self._trava
+        agora = time.monotonic()
+        if not forcar and agora - self._estado_gravado_em < INTERVALO_ESTADO:
+            return
+        self._estado_gravado_em = agora
+        temporario = self.caminho_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'url': self.url,
+                'identificador': self.identificador,
+                'tamanho': self.tamanho,
+                'etag': self.etag,
+                'faixas': self.faixas,
+            }, arquivo)
+        os.replace(temporario, self.caminho_estado)
+    
+    def descartar(self):
+        """Remove o .part e o andamento."""
+        for caminho in (self.parcial, self.caminho_estado):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+        self.faixas = []
+        self.hash = _HashProgressivo(self.parcial)
+    
+    # Preparação
+    
+    def iniciar(self):
+        """Consulta o servidor (HEAD), divide o arquivo em faixas e cria o .part."""
+        aceita_faixas = False
+        try:
+            resposta = requests.head(self.url, allow_redirects=True, timeout=config.TIMEOUT_DOWNLOAD_ATUALIZACAO,
+                                     headers={'Accept-Encoding': 'identity'})
+            if resposta.ok:
+                aceita_faixas = resposta.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                self.etag = resposta.headers.get('ETag')
+                if self.tamanho is None and resposta.headers.get('Content-Length', '').isdigit():
+                    self.tamanho = int(resposta.headers['Content-Length'])
+        except requests.RequestException as e:
+            logger.debug("HEAD de %s sem resposta: %s", self.url, e)
+        
+        conexoes = 1
+        if aceita_faixas and self.tamanho and self.tamanho >= config.TAMANHO_MINIMO_FAIXAS_MB * 1024 * 1024:
+            conexoes = max(1, self.conexoes)
+        
+        if self.tamanho is None:
+            self.faixas = [{'inicio': 0, 'fim': None, 'baixado': 0}]
+        else:
+            limites = [self.tamanho * i // conexoes for i in range(conexoes + 1)]
+            self.faixas = [{'inicio': inicio, 'fim': fim, 'baixado': 0} for inicio, fim in zip(limites, limites[1:])]
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.parcial)), exist_ok=True)
+        with open(self.parcial, 'wb') as arquivo:
+            if self.tamanho:
+                arquivo.truncate(self.tamanho)
+        with self._trava:
+            self._gravar_estado(forcar=True)
+    
+    # Transferência
+    
+    def fronteira(self):
+        """Fim do trecho inicial do arquivo já gravado por completo."""
+        for faixa in self.faixas:
+            atual = faixa['inicio'] + faixa['baixado']
+            if faixa['fim'] is None or atual < faixa['fim']:
+                return atual
+        return self.faixas[-1]['fim']
+    
+    def baixados(self):
+        return sum(faixa['baixado'] for faixa in self.faixas)
+    
+    def baixar_faixa(self, faixa):
+        """Baixa uma faixa com novas tentativas, cada uma continuando de onde a anterior parou."""
+        tentativas = max(1, config.TENTATIVAS_DOWNLOAD_ATUALIZACAO)
+        for tentativa in range(1, tentativas + 1):
+            try:
+                self._transferir(faixa)
+                return
+            except (requests.RequestException, ErroTransferencia, OSError, FalhaDownloadError) as e:
+                if tentativa == tentativas:
+                    raise FalhaDownloadError(f"Download interrompido depois de {tentativas} tentativas: {e}") from e
+                espera = min(2 ** tentativa, 30)
+                logger.warning("Falha no download (tentativa %d de %d): %s. Nova tentativa em %d s",
+                               tentativa, tentativas, e, espera)
+                time.sleep(espera)
+    
+    def _transferir(self, faixa):
+        inicio = faixa['inicio'] + faixa['baixado']
+        fim = faixa['fim']
+        if fim is not None and inicio >= fim:
+            return
+        
+        cabecalhos = {'Accept-Encoding': 'identity'}
+        parcial = inicio > 0 or (fim is not None and fim != self.tamanho)
+        if parcial:
+            cabecalhos['Range'] = f"bytes={inicio}-{'' if fim is None else fim - 1}"
+            if self.etag:
+                cabecalhos['If-Range'] = self.etag
+        
+        with requests.get(self.url, headers=cabecalhos, stream=True,
+                          timeout=config.TIMEOUT_DOWNLOAD_ATUALIZACAO) as resposta:
+            if parcial and resposta.status_code == 200:
+                raise _ReiniciarDownload("o servidor não retomou o download (sem suporte a Range ou arquivo alterado)")
+            resposta.raise_for_status()
+            if self.etag is None:
+                self.etag = resposta.headers.get('ETag')
+            
+            bloco = config.BLOCO_INICIAL_DOWNLOAD_KB * 1024
+            bloco_maximo = max(bloco, config.BLOCO_MAXIMO_DOWNLOAD_KB * 1024)
+            with open(self.parcial, 'r+b', buffering=0) as arquivo:
+                arquivo.seek(inicio)
+                while fim is None or inicio < fim:
+                    comeco = time.monotonic()
+                    dados = resposta.raw.read(bloco if fim is None else min(bloco, fim - inicio))
+                    if not dados:
+                        break
+                    duracao = time.monotonic() - comeco
+                    
+                    arquivo.write(dados)
+                    with self._trava:
+                        faixa['baixado'] += len(dados)
+                        self.hash.atualizar(inicio, dados, self.fronteira())
+                        self._gravar_estado()
+                    inicio += len(dados)
+                    
+                    # Bloco adaptativo: leituras rápidas dobram o bloco, lentas o reduzem
+                    if duracao < DURACAO_ALVO_LEITURA / 2 and bloco < bloco_maximo:
+                        bloco = min(bloco * 2, bloco_maximo)
+                    elif duracao > DURACAO_ALVO_LEITURA * 2 and bloco > 16 * 1024:
+                        bloco //= 2
+        
+        if fim is None:
+            with self._trava:
+                faixa['fim'] = inicio
+        elif inicio < fim:
+            raise FalhaDownloadError(f"conexão encerrada com {fim - inicio} bytes restantes na faixa")
+    
+    def executar(self):
+        """Baixa as faixas pendentes (em paralelo quando há mais de uma)."""
+        pendentes = [faixa for faixa in self.faixas if faixa['fim'] is None or faixa['inicio'] + faixa['baixado'] < faixa['fim']]
+        try:
+            if len(pendentes) == 1:
+                self.baixar_faixa(pendentes[0])
+            elif pendentes:
+                with ThreadPoolExecutor(max_workers=len(pendentes), thread_name_prefix='download') as executor:
+                    for futuro in [executor.submit(self.baixar_faixa, faixa) for faixa in pendentes]:
+                        futuro.result()
+        finally:
+            with self._trava:
+                self._gravar_estado(forcar=True)
+
+def baixar_arquivo(url, destino, tamanho=None, sha256=None, identificador=None, conexoes=None):
+    """
+    Baixa um arquivo, retomando um download anterior interrompido.
+    
+    Args:
+        url: Endereço do arquivo
+        destino: Caminho final; durante o download o arquivo fica em <destino>.part
+        tamanho: Tamanho em bytes, se conhecido (o asset da release informa)
+        sha256: Hash publicado (hexadecimal). Se None, o hash só é calculado
+        identificador: Versão do arquivo (id e data do asset); um .part de outra versão é descartado
+        conexoes: Conexões simultâneas para arquivos grandes. Se None, usa config.CONEXOES_DOWNLOAD_ATUALIZACAO
+    
+    Returns:
+        str: SHA-256 do arquivo baixado
+    
+    Raises:
+        FalhaDownloadError: Download não concluído (o .part fica para a próxima tentativa)
+        HashDivergenteError: Hash diferente do publicado (o .part é descartado)
+    """
+    download = _Download(url, destino, tamanho, identificador,
+                         config.CONEXOES_DOWNLOAD_ATUALIZACAO if conexoes is None else conexoes)
+    comeco = time.monotonic()
+    
+    if download.retomar():
+        download.hash.avancar(download.fronteira())
+        logger.info("Retomando download: %.1f de %.1f MB já baixados",
+                    download.baixados() / 1024 / 1024, (download.tamanho or 0) / 1024 / 1024)
+    else:
+        download.descartar()
+        download.iniciar()
+    ja_baixados = download.baixados()
+    
+    try:
+        download.executar()
+    except _ReiniciarDownload as e:
+        logger.warning("Reiniciando o download do zero: %s", e)
+        download.descartar()
+        download.conexoes = 1
+        download.iniciar()
+        download.executar()
+    
+    total = download.fronteira()
+    if download.tamanho is not None and total != download.tamanho:
+        raise FalhaDownloadError(f"download incompleto: {total} de {download.tamanho} bytes")
+    download.hash.avancar(total)
+    obtido = download.hash.sha256.hexdigest()
+    
+    if sha256 and obtido != sha256.lower():
+        download.descartar()
+        raise HashDivergenteError(f"SHA-256 do arquivo baixado ({obtido}) diferente do publicado ({sha256.lower()})")
+    
+    num_faixas = len(download.faixas)
+    os.replace(download.parcial, destino)
+    download.descartar()
+    
+    duracao = time.monotonic() - comeco
+    transferidos = total - ja_baixados
+    logger.info("Download concluído: %.1f MB em %.1f s (%.0f KB/s, %d faixa(s))",
+                total / 1024 / 1024, duracao, transferidos / 1024 / max(duracao, 1e-6), num_faixas)
+    return obtido
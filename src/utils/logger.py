@@ -0,0 +1,299 @@
+"""
+Log estruturado da aplicação.
+
+As mensagens de todos os módulos passam pelo logger 'pamc'. Quem registra só
+coloca a mensagem em uma fila (QueueHandler), sem esperar por disco nem pela
+interface; uma thread do QueueListener grava cada mensagem como uma linha
+JSON no arquivo rotativo config.ARQUIVO_LOG_JSON e exibe o texto no
+sys.stdout atual (o widget de log da interface, quando aberta).
+
+A unidade e o código do preso entram nas mensagens pelo contexto
+(contexto_log), válido para a thread ou tarefa asyncio atual, ou por
+extra={'up': ..., 'codigo': ...}. Mensagens abaixo de config.NIVEL_LOG são
+descartadas antes de qualquer formatação: no laço dos presos use argumentos
+no estilo %, como logger.debug("Preso processado: %s", codigo).
+
+A configuração é feita na primeira mensagem registrada (ou por configurar).
+Os processos do pool chamam encaminhar_registros para que as mensagens sejam
+gravadas pelo processo principal, com reemitir.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from src.utils import config
+
+# Logger raiz da aplicação; os módulos usam get_logger('modulo') -> 'pamc.modulo'
+NOME_RAIZ = 'pamc'
+
+# Campos de contexto gravados em cada linha JSON
+CAMPOS_CONTEXTO = ('up', 'codigo')
+
+# Atributos de todo LogRecord: os demais vieram de extra= e vão para o JSON
+_ATRIBUTOS_PADRAO = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+_contexto = contextvars.ContextVar('contexto_log', default={})
+
+_trava = threading.Lock()
+_trava_configuracao = threading.Lock()
+_listener = None
+_configurado = False
+
+@contextmanager
+def contexto_log(**campos):
+    """
+    Acrescenta campos (up, codigo...) às mensagens registradas dentro do bloco.
+    
+    O contexto é da thread ou tarefa asyncio atual: tarefas paralelas não
+    misturam os códigos dos presos.
+    
+    Args:
+        **campos: Campos do contexto, como up e codigo
+    """
+    token = _contexto.set({**_contexto.get(), **campos})
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+class _FiltroContexto(logging.Filter):
+    """Copia o contexto atual para a mensagem (na thread de quem registra, antes da fila)."""
+    
+    def filter(self, record):
+        for campo, valor in _contexto.get().items():
+            if not hasattr(record, campo):
+                setattr(record, campo, valor)
+        return True
+
+class _HandlerFila(QueueHandler):
+    """
+    QueueHandler que preserva os campos da mensagem para o formatador JSON.
+    
+    O QueueHandler padrão junta o traceback ao texto; aqui o texto fica só com
+    a mensagem e o traceback vai em exc_text, para virar um campo do JSON.
+    """
+    
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.addFilter(_FiltroContexto())
+    
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+class _HandlerEncaminhamento(_HandlerFila):
+    """Envia as mensagens de um processo do pool ao processo principal como dicionários."""
+    
+    def __init__(self, enviar):
+        super().__init__(None)
+        self.enviar = enviar
+    
+    def enqueue(self, record):
+        self.enviar(record.__dict__)
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por mensagem: ts, nivel, logger, msg, up, codigo, processo, thread e extras."""
+    
+    def format(self, record):
+        linha = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for campo in CAMPOS_CONTEXTO:
+            linha[campo] = getattr(record, campo, None)
+        linha['processo'] = record.process
+        linha['thread'] = record.threadName
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and chave not in linha and not chave.startswith('_'):
+                linha[chave] = valor
+        if record.exc_text:
+            linha['excecao'] = record.exc_text
+        return json.dumps(linha, ensure_ascii=False, default=str)
+
+class FormatadorConsole(logging.Formatter):
+    """
+    Só o texto da mensagem (e o traceback de logger.exception), como os antigos print.
+    
+    Mensagens vindas de outro processo (motor por processos) recebem a
+    unidade como prefixo.
+    """
+    
+    def format(self, record):
+        mensagem = record.getMessage()
+        if record.process != os.getpid() and getattr(record, 'up', None):
+            mensagem = f"[{record.up}] {mensagem}"
+        if record.exc_text:
+            mensagem = f"{mensagem}\n{record.exc_text}"
+        return mensagem
+
+class _HandlerSaidaPadrao(logging.StreamHandler):
+    """Escreve no sys.stdout do momento, que a interface substitui pelo widget de log."""
+    
+    def __init__(self, saida=None):
+        """
+        Args:
+            saida: Stream fixo para as mensagens. Se None, o sys.stdout de cada escrita
+        """
+        self._saida = saida
+        super().__init__()
+        self.setFormatter(FormatadorConsole())
+        # capture_error registra o traceback só no arquivo
+        self.addFilter(lambda record: not getattr(record, '_apenas_arquivo', False))
+    
+    @property
+    def stream(self):
+        return self._saida or sys.stdout
+    
+    @stream.setter
+    def stream(self, valor):
+        pass
+
+class _ConfiguracaoTardia(logging.Handler):
+    """Configura o log na primeira mensagem registrada e a repassa aos handlers definitivos."""
+    
+    def emit(self, record):
+        with _trava_configuracao:
+            if not _configurado:
+                configurar()
+        logging.getLogger(NOME_RAIZ).handle(record)
+
+def _raiz():
+    raiz = logging.getLogger(NOME_RAIZ)
+    raiz.propagate = False
+    return raiz
+
+def _substituir_handlers(*handlers):
+    raiz = _raiz()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    for handler in handlers:
+        raiz.addHandler(handler)
+
+def parar():
+    """Grava as mensagens ainda na fila e encerra a thread do log (chamado ao sair do programa)."""
+    global _listener
+    with _trava:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+def configurar(nivel=None, arquivo=None, console=True, saida=None):
+    """
+    Configura o log do processo; uma nova chamada substitui a configuração anterior.
+    
+    Args:
+        nivel: Nível mínimo ('DEBUG', 'INFO'...). Se None, usa config.NIVEL_LOG
+        arquivo: Arquivo JSON rotativo. Se None, usa config.ARQUIVO_LOG_JSON; se False, não grava arquivo
+        console: Se True, exibe as mensagens no sys.stdout
+        saida: Stream do console no lugar do sys.stdout (a linha de comando usa o
+               sys.stderr e reserva o stdout para o progresso em JSON)
+    """
+    global _listener, _configurado
+    parar()
+    with _trava:
+        handlers = []
+        arquivo = config.ARQUIVO_LOG_JSON if arquivo is None else arquivo
+        if arquivo:
+            try:
+                if os.path.dirname(arquivo):
+                    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+                handler_arquivo = RotatingFileHandler(
+                    arquivo,
+                    maxBytes=int(config.TAMANHO_MAXIMO_LOG_MB * 1024 * 1024),
+                    backupCount=config.ARQUIVOS_LOG_ANTERIORES,
+                    encoding='utf-8',
+                    delay=True
+                )
+                handler_arquivo.setFormatter(FormatadorJSON())
+                handlers.append(handler_arquivo)
+            except OSError as e:
+                # Sem arquivo o log continua no console
+                print(f"Não foi possível abrir o arquivo de log {arquivo}: {e}")
+        if console:
+            handlers.append(_HandlerSaidaPadrao(saida))
+        
+        fila = queue.SimpleQueue()
+        _listener = QueueListener(fila, *handlers, respect_handler_level=True)
+        _listener.start()
+        _substituir_handlers(_HandlerFila(fila))
+        _raiz().setLevel(nivel or config.NIVEL_LOG)
+        
+        if not _configurado:
+            atexit.register(parar)
+        _configurado = True
+
+def encaminhar_registros(enviar, nivel=None):
+    """
+    Configura o log de um processo filho para enviar as mensagens ao processo principal.
+    
+    Args:
+        enviar: Função que recebe o dicionário de cada mensagem (por exemplo, colocando-o
+                em uma fila do Manager); o processo principal o passa a reemitir
+        nivel: Nível mínimo. Se None, usa config.NIVEL_LOG
+    """
+    global _configurado
+    parar()
+    with _trava:
+        _substituir_handlers(_HandlerEncaminhamento(enviar))
+        _raiz().setLevel(nivel or config.NIVEL_LOG)
+        _configurado = True
+
+def reemitir(registro):
+    """Registra no processo atual uma mensagem enviada por encaminhar_registros."""
+    record = logging.makeLogRecord(registro)
+    logger = logging.getLogger(record.name)
+    if logger.isEnabledFor(record.levelno):
+        logger.handle(record)
+
+class Logger:
+    """Acesso ao log da aplicação (interface usada também pelo UpdaterService)."""
+    
+    @staticmethod
+    def get_logger(nome=None):
+        """
+        Retorna o logger de um módulo.
+        
+        Args:
+            nome: Nome do módulo ('listar_presos_up', 'updater'...). Se None, o logger raiz 'pamc'
+        """
+        return logging.getLogger(f"{NOME_RAIZ}.{nome}" if nome else NOME_RAIZ)
+    
+    @staticmethod
+    def capture_error(e, context=None):
+        """
+        Registra a exceção com traceback e contexto no arquivo de log.
+        
+        A mensagem de erro para o usuário continua a cargo de quem chama; o
+        console não recebe o traceback.
+        
+        Args:
+            e: Exceção capturada
+            context: Dicionário opcional com dados do momento do erro
+        """
+        Logger.get_logger().error(
+            "%s: %s", type(e).__name__, e,
+            exc_info=(type(e), e, e.__traceback__),
+            extra={'contexto': context, '_apenas_arquivo': True}
+        )
+
+# Até a primeira mensagem nada é configurado (os processos do pool encaminham
+# as mensagens em vez de abrir o arquivo); o nível já vale desde a importação
+_raiz().addHandler(_ConfiguracaoTardia())
+_raiz().setLevel(config.NIVEL_LOG)
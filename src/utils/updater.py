@@ -30,11 +30,14 @@ Exemplo de uso:
 
 import os
 import sys
+import time
+import threading
 import requests
 import subprocess
 import tkinter as tk
 from tkinter import messagebox
 from packaging import version
+import bsdiff4
 from urllib.parse import urljoin
 from pathlib import Path
 import json
@@ -43,18 +46,8 @@ import json
 from src.utils import config
 
 # Logger para registrar eventos
-try:
-    from src.utils.logger import Logger
-except ImportError:
-    # Logger simples caso o módulo logger não esteja disponível
-    class Logger:
-        @staticmethod
-        def get_logger():
-            return type('', (), {'info': print, 'error': print, 'warning': print, 'debug': print})()
-        
-        @staticmethod
-        def capture_error(e, context=None):
-            print(f"Erro: {str(e)}, Contexto: {context}")
+from src.utils.logger import Logger
+from src.utils.download import baixar_arquivo, calcular_sha256, ler_sha256_publicado, FalhaDownloadError, HashDivergenteError
 
 # Configurações de atualização
 APP_NAME = getattr(config, 'APP_NAME', "PAMC-ADM")
@@ -62,6 +55,14 @@ APP_VERSION = getattr(config, 'APP_VERSION', "v1.0.0")
 UPDATE_URL = getattr(config, 'UPDATE_URL', "")
 VERSION_FILE = getattr(config, 'VERSION_FILE', "latest_version.txt")
 GITHUB_REPO = getattr(config, 'GITHUB_REPO', "A-Assuncao/PAMC-ADM")
+RELEASE_CACHE_FILE = getattr(config, 'ARQUIVO_CACHE_RELEASE', "latest_release.json")
+RELEASE_CACHE_TTL = getattr(config, 'VALIDADE_CACHE_RELEASE', 6 * 3600)
+CHECK_TIMEOUT = getattr(config, 'TIMEOUT_VERIFICACAO_ATUALIZACAO', 10)
+REQUIRE_DIGEST = getattr(config, 'EXIGIR_HASH_ATUALIZACAO', True)
+PATCH_NAME_FORMAT = getattr(config, 'MODELO_PATCH_ATUALIZACAO', "{app}_{versao_atual}_{versao_nova}.bsdiff")
+
+# Assets com os hashes de todos os arquivos da release (formato do sha256sum)
+CHECKSUM_FILES = ("sha256sums", "sha256sums.txt")
 
 class UpdaterService:
     """
@@ -105,61 +106,243 @@ class UpdaterService:
         self.current_version = current_version or APP_VERSION
         self.update_url = update_url or UPDATE_URL
         self.version_file = version_file or VERSION_FILE
-        self.logger = Logger.get_logger()
+        self.logger = Logger.get_logger('updater')
         
-    def get_latest_version(self):
+    def _load_release_cache(self):
+        """
+        Lê a última resposta de releases/latest guardada em disco.
+        
+        Returns:
+            dict or None: {'repo', 'etag', 'checked_at', 'release'} ou None se não houver
+                          cache válido para o repositório configurado
+        """
+        try:
+            with open(RELEASE_CACHE_FILE, encoding='utf-8') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if cache.get("repo") != GITHUB_REPO or not isinstance(cache.get("release"), dict):
+            return None
+        return cache
+    
+    def _save_release_cache(self, cache):
+        """Grava o cache da release (falhas de gravação só são registradas no log)."""
+        temporary_path = f"{RELEASE_CACHE_FILE}.{os.getpid()}.tmp"
+        try:
+            if os.path.dirname(RELEASE_CACHE_FILE):
+                os.makedirs(os.path.dirname(RELEASE_CACHE_FILE), exist_ok=True)
+            with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temporary_path, RELEASE_CACHE_FILE)
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar o cache da release: {str(e)}")
+    
+    def _release_info(self, release_data):
+        """Monta o dicionário {'version', 'data'} devolvido por get_latest_version."""
+        latest_version = release_data.get("tag_name", "").strip()
+        if not latest_version:
+            self.logger.warning("Versão não encontrada na resposta da API do GitHub.")
+            return None
+        return {
+            "version": latest_version,
+            "data": release_data
+        }
+    
+    def get_latest_version(self, use_cache=True):
         """
         Obtém a versão mais recente disponível nas releases do GitHub.
         
-        Este método se conecta à API do GitHub e verifica a release mais recente
-        do repositório configurado.
+        A última resposta fica em cache no disco (RELEASE_CACHE_FILE). Dentro da
+        validade (RELEASE_CACHE_TTL) nenhuma requisição é feita; depois dela a
+        consulta envia If-None-Match com o ETag guardado, e a resposta 304 (que
+        não conta no limite de 60 requisições por hora da API sem autenticação)
+        renova o cache. Se o GitHub estiver inacessível ou o limite tiver sido
+        atingido, a última release conhecida é usada.
+        
+        Args:
+            use_cache (bool, optional): Se False, consulta o GitHub mesmo com o cache válido
+                                        (ainda de forma condicional). Default é True.
         
         Returns:
             dict or None: Dicionário com informações da release mais recente ou None se:
-                         - Ocorrer um erro de conexão com o GitHub
+                         - Ocorrer um erro de conexão com o GitHub sem release em cache
                          - Não houver releases disponíveis
                          - Ocorrer qualquer outra exceção durante o processo
         
         Raises:
             Não lança exceções, captura-as internamente e retorna None.
         """
+        cache = self._load_release_cache()
+        if use_cache and cache is not None and time.time() - cache.get("checked_at", 0) < RELEASE_CACHE_TTL:
+            self.logger.debug("Usando a release em cache (verificada há menos de %.0f s)", RELEASE_CACHE_TTL)
+            return self._release_info(cache["release"])
+        
         try:
             # Construir URL da API do GitHub para a release mais recente
             github_api_url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
             self.logger.debug(f"Verificando versão em: {github_api_url}")
             
-            # Realizar a requisição
+            # Realizar a requisição (condicional quando há uma resposta anterior)
             headers = {"Accept": "application/vnd.github.v3+json"}
-            response = requests.get(github_api_url, headers=headers, timeout=10)
+            if cache is not None and cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            response = requests.get(github_api_url, headers=headers, timeout=CHECK_TIMEOUT)
+            
+            if response.status_code == 304 and cache is not None:
+                self.logger.debug("Release sem alterações desde a última verificação (304)")
+                cache["checked_at"] = time.time()
+                self._save_release_cache(cache)
+                return self._release_info(cache["release"])
+            
+            if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = response.headers.get("X-RateLimit-Reset")
+                reset_time = time.strftime('%H:%M', time.localtime(int(reset))) if reset and reset.isdigit() else "?"
+                raise requests.HTTPError(f"Limite de requisições da API do GitHub atingido (renova às {reset_time})",
+                                         response=response)
             response.raise_for_status()
             
             # Parsear a resposta JSON
             release_data = response.json()
-            latest_version = release_data.get("tag_name", "").strip()
-            
-            if not latest_version:
-                self.logger.warning("Versão não encontrada na resposta da API do GitHub.")
-                return None
-                
-            self.logger.info(f"Versão mais recente encontrada: {latest_version}")
-            return {
-                "version": latest_version,
-                "data": release_data
-            }
+            release_info = self._release_info(release_data)
+            if release_info:
+                self._save_release_cache({
+                    "repo": GITHUB_REPO,
+                    "etag": response.headers.get("ETag"),
+                    "checked_at": time.time(),
+                    "release": release_data
+                })
+                self.logger.info(f"Versão mais recente encontrada: {release_info['version']}")
+            return release_info
         except requests.RequestException as e:
             self.logger.error(f"Erro ao verificar atualizações no GitHub: {str(e)}")
             Logger.capture_error(e, context={"github_repo": GITHUB_REPO})
-            return None
         except (json.JSONDecodeError, KeyError) as e:
             self.logger.error(f"Erro ao processar resposta da API do GitHub: {str(e)}")
             Logger.capture_error(e)
+        
+        if cache is not None:
+            self.logger.info("Usando a última release conhecida (cache)")
+            return self._release_info(cache["release"])
+        return None
+    
+    def find_update(self):
+        """
+        Verifica se há uma versão mais recente que a atual, sem interação com o usuário.
+        
+        Returns:
+            dict or None: Informações da release (como get_latest_version) se ela for mais
+                          recente que current_version, ou None
+        """
+        release_info = self.get_latest_version()
+        if not release_info:
+            self.logger.warning("Não foi possível verificar atualizações.")
+            return None
+        
+        # Obter a versão
+        latest_version = release_info["version"]
+        
+        # Compara versões
+        try:
+            if version.parse(latest_version) <= version.parse(self.current_version):
+                self.logger.info(f"Nenhuma atualização disponível. Versão atual: {self.current_version}")
+                return None
+        except Exception as e:
+            self.logger.error(f"Erro ao comparar versões: {str(e)}")
+            Logger.capture_error(e, context={
+                "latest_version": latest_version, 
+                "current_version": self.current_version
+            })
             return None
+        
+        self.logger.info(f"Nova versão disponível: {latest_version}")
+        return release_info
+    
+    def check_in_background(self, on_update_available):
+        """
+        Verifica por atualizações em uma thread, sem bloquear a inicialização.
+        
+        Args:
+            on_update_available (callable): Chamada com as informações da release quando
+                                            houver uma versão mais recente. É executada na
+                                            thread da verificação: interfaces gráficas devem
+                                            repassá-la ao seu próprio loop.
+        
+        Returns:
+            threading.Thread: A thread (daemon) da verificação, já iniciada.
+        """
+        def check():
+            release_info = self.find_update()
+            if release_info:
+                on_update_available(release_info)
+        
+        thread = threading.Thread(target=check, name="verificacao-atualizacao", daemon=True)
+        thread.start()
+        return thread
+    
+    def download_and_install(self, release_info):
+        """
+        Baixa a atualização e inicia o instalador, sem perguntar nem encerrar a aplicação.
+        
+        Usado quando o usuário já aceitou a atualização (pelo aviso da interface);
+        quem chama decide como encerrar a aplicação em seguida.
+        
+        Args:
+            release_info (dict): Informações da release devolvidas por find_update.
+        
+        Returns:
+            bool: True se o instalador foi iniciado.
+        """
+        update_path = self.download_update(release_info)
+        if not update_path:
+            self.logger.error("Falha ao baixar a atualização.")
+            return False
+        return self.install_update(update_path)
+    
+    def get_published_sha256(self, asset, assets):
+        """
+        Obtém o SHA-256 publicado na release para um asset.
+        
+        Usa o campo digest do asset (preenchido pelo GitHub) e, na falta dele,
+        um asset <nome>.sha256 ou SHA256SUMS no formato do sha256sum.
+        
+        Args:
+            asset (dict): Asset cujo hash é procurado.
+            assets (list): Todos os assets da release.
+            
+        Returns:
+            str or None: Hash em hexadecimal minúsculo ou None se a release não o publicar
+        """
+        algorithm, _, value = (asset.get("digest") or "").partition(":")
+        if algorithm.lower() == "sha256" and value:
+            return value.lower()
+        
+        filename = asset.get("name", "")
+        assets_by_name = {item.get("name", "").lower(): item for item in assets}
+        for checksum_name in (f"{filename}.sha256".lower(), *CHECKSUM_FILES):
+            checksum_asset = assets_by_name.get(checksum_name)
+            if not checksum_asset or not checksum_asset.get("browser_download_url"):
+                continue
+            try:
+                response = requests.get(checksum_asset["browser_download_url"], timeout=CHECK_TIMEOUT)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                self.logger.warning(f"Não foi possível baixar {checksum_asset.get('name')}: {str(e)}")
+                continue
+            published = ler_sha256_publicado(response.text, filename)
+            if published:
+                return published
+        return None
     
     def download_update(self, release_info, target_path=None):
         """
         Baixa o arquivo de atualização a partir das releases do GitHub.
         
-        Busca o asset com extensão .exe na release especificada e o baixa.
+        Busca o asset com extensão .exe na release especificada e o baixa para
+        <target_path>.part com src.utils.download.baixar_arquivo: um download
+        interrompido é retomado (HTTP Range) na próxima chamada, arquivos grandes
+        são baixados em faixas simultâneas e o SHA-256 calculado durante o
+        download é comparado com o publicado na release. O arquivo só recebe o
+        nome final se o hash conferir.
         
         Args:
             release_info (dict): Dicionário com informações da release, incluindo a versão e os dados completos.
@@ -169,7 +352,9 @@ class UpdaterService:
         Returns:
             str or None: Caminho completo do arquivo baixado ou None se:
                          - Não houver assets compatíveis na release
-                         - Ocorrer um erro de conexão com o servidor
+                         - A release não publicar o SHA-256 do asset (com REQUIRE_DIGEST)
+                         - Ocorrer um erro de conexão com o servidor em todas as tentativas
+                         - O SHA-256 do arquivo baixado for diferente do publicado
                          - Não for possível salvar o arquivo no destino
                          - Ocorrer qualquer outra exceção durante o processo
         
@@ -198,26 +383,46 @@ class UpdaterService:
                 self.logger.warning(f"URL de download não encontrado para a release {version_tag}")
                 return None
             
+            # Hash publicado com a release, verificado antes da instalação
+            expected_sha256 = self.get_published_sha256(asset, assets)
+            if not expected_sha256:
+                if REQUIRE_DIGEST:
+                    self.logger.error(f"A release {version_tag} não publica o SHA-256 de {filename}; atualização não instalada.")
+                    return None
+                self.logger.warning(f"A release {version_tag} não publica o SHA-256 de {filename}; integridade não verificada.")
+            
             # Definir caminho de destino se não fornecido
             if target_path is None:
                 target_path = os.path.join(os.getcwd(), filename)
             
-            # Baixar o arquivo
-            self.logger.info(f"Baixando atualização de: {download_url}")
-            response = requests.get(download_url, stream=True, timeout=30)
-            response.raise_for_status()
+            # Arquivo já baixado por uma tentativa anterior
+            if expected_sha256 and os.path.exists(target_path) and calcular_sha256(target_path) == expected_sha256:
+                self.logger.info(f"Atualização já baixada em: {target_path}")
+                return target_path
             
-            # Cria o diretório de destino se não existir
-            os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+            # Patch binário a partir do executável em uso, quando a release o publica
+            if expected_sha256:
+                patched_path = self.download_patch_update(release_info, asset, expected_sha256, target_path)
+                if patched_path:
+                    return patched_path
             
-            # Baixa o arquivo em chunks para não sobrecarregar a memória
-            with open(target_path, 'wb') as out_file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    out_file.write(chunk)
+            # Baixar o arquivo
+            self.logger.info(f"Baixando atualização de: {download_url}")
+            sha256 = baixar_arquivo(
+                download_url,
+                target_path,
+                tamanho=asset.get("size"),
+                sha256=expected_sha256,
+                identificador=f"{asset.get('id')}:{asset.get('updated_at')}"
+            )
             
-            self.logger.info(f"Atualização baixada em: {target_path}")
+            self.logger.info(f"Atualização baixada em: {target_path} (SHA-256 {sha256})")
             return target_path
-        except requests.RequestException as e:
+        except HashDivergenteError as e:
+            self.logger.error(f"Arquivo de atualização corrompido: {str(e)}")
+            Logger.capture_error(e, context={"version": release_info.get("version")})
+            return None
+        except (FalhaDownloadError, requests.RequestException) as e:
             self.logger.error(f"Erro ao baixar atualização: {str(e)}")
             Logger.capture_error(e, context={"version": release_info.get("version")})
             return None
@@ -226,6 +431,83 @@ class UpdaterService:
             Logger.capture_error(e, context={"target_path": target_path})
             return None
     
+    def find_patch_asset(self, release_info):
+        """
+        Procura na release o patch da versão atual para a nova (nome de PATCH_NAME_FORMAT).
+        
+        Args:
+            release_info (dict): Informações da release.
+            
+        Returns:
+            dict or None: Asset do patch ou None se a release não o publicar
+        """
+        patch_name = PATCH_NAME_FORMAT.format(
+            app=self.app_name,
+            versao_atual=self.current_version,
+            versao_nova=release_info["version"]
+        ).lower()
+        assets = release_info["data"].get("assets", [])
+        return next((asset for asset in assets if asset.get("name", "").lower() == patch_name), None)
+    
+    def download_patch_update(self, release_info, full_asset, expected_sha256, target_path):
+        """
+        Monta a nova versão aplicando um patch bsdiff ao executável em uso.
+        
+        Só é usado no executável empacotado (sys.frozen) e se a release publicar
+        o patch da versão atual. O resultado precisa ter o SHA-256 publicado
+        para o executável completo; em qualquer falha quem chama baixa o
+        executável completo.
+        
+        Args:
+            release_info (dict): Informações da release.
+            full_asset (dict): Asset do executável completo.
+            expected_sha256 (str): SHA-256 publicado para o executável completo.
+            target_path (str): Caminho onde salvar o executável novo.
+            
+        Returns:
+            str or None: target_path se o patch foi aplicado e conferido, None caso contrário
+        """
+        if not getattr(sys, 'frozen', False):
+            self.logger.debug("Aplicação fora do executável empacotado: atualização pelo executável completo")
+            return None
+        
+        patch_asset = self.find_patch_asset(release_info)
+        if not patch_asset or not patch_asset.get("browser_download_url"):
+            self.logger.info(f"Release {release_info['version']} sem patch a partir da versão {self.current_version}")
+            return None
+        
+        patch_path = f"{target_path}.bsdiff"
+        patched_path = f"{target_path}.patched"
+        try:
+            self.logger.info(f"Baixando patch de atualização: {patch_asset['name']}")
+            baixar_arquivo(
+                patch_asset["browser_download_url"],
+                patch_path,
+                tamanho=patch_asset.get("size"),
+                sha256=self.get_published_sha256(patch_asset, release_info["data"].get("assets", [])),
+                identificador=f"{patch_asset.get('id')}:{patch_asset.get('updated_at')}"
+            )
+            
+            bsdiff4.file_patch(sys.executable, patched_path, patch_path)
+            if calcular_sha256(patched_path) != expected_sha256:
+                self.logger.warning("O patch não reproduziu o executável publicado (SHA-256 diferente)")
+                return None
+            
+            os.replace(patched_path, target_path)
+            full_size = full_asset.get("size")
+            if full_size:
+                self.logger.info(f"Atualização aplicada por patch: {os.path.getsize(patch_path) / 1024 / 1024:.2f} MB "
+                                 f"baixados em vez de {full_size / 1024 / 1024:.1f} MB")
+            return target_path
+        except Exception as e:
+            self.logger.warning(f"Falha na atualização por patch, baixando o executável completo: {str(e)}")
+            Logger.capture_error(e, context={"patch": patch_asset.get("name")})
+            return None
+        finally:
+            for path in (patch_path, patched_path):
+                if os.path.exists(path):
+                    os.remove(path)
+    
     def prompt_user_for_update(self, release_info):
         """
         Pergunta ao usuário se deseja atualizar.
@@ -331,29 +613,10 @@ class UpdaterService:
             auto_install for True e a instalação for bem-sucedida.
         """
         # Verifica se há uma nova versão disponível
-        release_info = self.get_latest_version()
+        release_info = self.find_update()
         if not release_info:
-            self.logger.warning("Não foi possível verificar atualizações.")
             return False
         
-        # Obter a versão
-        latest_version = release_info["version"]
-        
-        # Compara versões
-        try:
-            if version.parse(latest_version) <= version.parse(self.current_version):
-                self.logger.info(f"Nenhuma atualização disponível. Versão atual: {self.current_version}")
-                return False
-        except Exception as e:
-            self.logger.error(f"Erro ao comparar versões: {str(e)}")
-            Logger.capture_error(e, context={
-                "latest_version": latest_version, 
-                "current_version": self.current_version
-            })
-            return False
-        
-        self.logger.info(f"Nova versão disponível: {latest_version}")
-        
         # Se modo silencioso, não pergunta ao usuário
         if not silent:
             user_wants_update = self.prompt_user_for_update(release_info)
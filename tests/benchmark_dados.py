@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark das estruturas de dados da extração com registros sintéticos.
+
+Mede tempo e pico de memória de cada etapa na forma antiga e na atual:
+
+- Montagem dos DataFrames: pd.concat a cada preso e a cada unidade, com
+  cópia, contra registros acumulados e DataFrames criados uma única vez
+- Campos de detalhe: gravação por máscara booleana contra RegistrosUnidade
+- Tratamentos finais: apply linha a linha em cada unidade e no consolidado
+  contra a normalização vetorizada
+- Excel: ExcelWriter com uma cópia por unidade contra a gravação linha a
+  linha em constant_memory
+
+Uso:
+    python tests/benchmark_dados.py
+    python tests/benchmark_dados.py --tamanhos 10000 50000 --sem-antes
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+# Adicionar diretório raiz ao path para permitir importações relativas
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import config
+from src.core.listar_presos_up import (
+    consolidar_unidades,
+    formatar_data,
+    calcular_idade,
+    tratar_sentenca_dias,
+)
+from src.core.normalizacao import normalizar_dados
+from src.core.exportacao import exportar_excel
+from src.core.registros import RegistrosUnidade
+
+# Colunas preenchidas pelas páginas de detalhes
+COLUNAS_DETALHE = [coluna for coluna in config.COLUNAS if coluna not in ('UP', 'CÓDIGO', 'NOME')]
+
+def gerar_registros(total):
+    """
+    Gera registros sintéticos de presos distribuídos entre as unidades.
+    
+    Args:
+        total: Número total de registros
+    
+    Returns:
+        dict: Dicionário {unidade: lista de registros}
+    """
+    unidades = config.UNIDADES_PRISIONAIS
+    registros = {up: [] for up in unidades}
+    
+    for i in range(total):
+        up = unidades[i % len(unidades)]
+        registro = {coluna: f"{coluna} {i}" for coluna in config.COLUNAS}
+        registro.update({
+            'UP': up,
+            'CÓDIGO': str(100000 + i),
+            'ALA': f"ALA {i % 7}",
+            'CELA': str(i % 40),
+            'DATA NASC.': f"{1 + i % 28}/{1 + i % 12}/{1960 + i % 40}",
+            'DATA PRISÃO': f"{2000 + i % 24}-{1 + i % 12}-{1 + i % 28}",
+            'SENTENÇA DIAS': f"{i % 5000} DIAS",
+        })
+        registros[up].append(registro)
+    
+    return registros
+
+def montar_antes(registros):
+    """Montagem original: concat por preso, cópia e concat por unidade."""
+    dfs_unidades = {}
+    df_consolidado = pd.DataFrame(columns=config.COLUNAS)
+    
+    for up, lista in registros.items():
+        df_presos = pd.DataFrame(columns=config.COLUNAS)
+        for registro in lista:
+            df_presos = pd.concat([df_presos, pd.DataFrame([registro])], ignore_index=True)
+        dfs_unidades[up] = df_presos.copy()
+        df_consolidado = pd.concat([df_consolidado, df_presos], ignore_index=True)
+    
+    return df_consolidado, dfs_unidades
+
+def montar_depois(registros):
+    """Montagem atual: cada DataFrame criado uma única vez."""
+    dfs_unidades = {up: pd.DataFrame(lista, columns=config.COLUNAS) for up, lista in registros.items()}
+    return consolidar_unidades(dfs_unidades), dfs_unidades
+
+def campos_detalhe(codigo):
+    """Campos sintéticos que as páginas de detalhes devolveriam para um preso."""
+    return {coluna: f"{coluna} {codigo}" for coluna in COLUNAS_DETALHE}
+
+def preencher_antes(registros):
+    """Gravação original: uma máscara booleana por campo e por preso."""
+    for lista in registros.values():
+        df_presos = pd.DataFrame(lista, columns=['UP', 'CÓDIGO', 'NOME'])
+        df_presos = df_presos.reindex(columns=config.COLUNAS).astype(object)
+        for codigo in df_presos['CÓDIGO']:
+            for localizador, texto in campos_detalhe(codigo).items():
+                df_presos.loc[df_presos['CÓDIGO'] == codigo, localizador] = texto
+
+def preencher_depois(registros):
+    """Gravação atual: registros indexados pelo código e DataFrame ao final."""
+    for up, lista in registros.items():
+        presos = RegistrosUnidade(up, [{coluna: registro[coluna] for coluna in ('UP', 'CÓDIGO', 'NOME')} for registro in lista])
+        for codigo in presos.codigos():
+            presos.atualizar(codigo, campos_detalhe(codigo))
+        presos.para_dataframe()
+
+def tratar_antes(registros):
+    """Tratamentos originais: apply linha a linha em cada unidade e de novo no consolidado."""
+    dfs_unidades = {up: pd.DataFrame(lista, columns=config.COLUNAS) for up, lista in registros.items()}
+    for df in [*dfs_unidades.values(), consolidar_unidades(dfs_unidades)]:
+        df['DATA NASC.'] = df['DATA NASC.'].apply(formatar_data)
+        df['DATA PRISÃO'] = df['DATA PRISÃO'].apply(formatar_data)
+        df['IDADE'] = df['DATA NASC.'].apply(calcular_idade)
+        df['SENTENÇA DIAS'] = df['SENTENÇA DIAS'].apply(tratar_sentenca_dias)
+
+def tratar_depois(registros):
+    """Tratamentos atuais: normalização vetorizada uma única vez sobre o consolidado."""
+    dfs_unidades = {up: pd.DataFrame(lista, columns=config.COLUNAS) for up, lista in registros.items()}
+    normalizar_dados(consolidar_unidades(dfs_unidades))
+
+def consolidado_tratado(registros):
+    """DataFrame consolidado e tratado, como recebido pela exportação."""
+    dfs_unidades = {up: pd.DataFrame(lista, columns=config.COLUNAS) for up, lista in registros.items()}
+    return normalizar_dados(consolidar_unidades(dfs_unidades)), list(dfs_unidades)
+
+def exportar_antes(dados, caminho):
+    """Exportação original: to_excel do consolidado e de uma cópia sem UP por unidade."""
+    df_consolidado, unidades = dados
+    with pd.ExcelWriter(caminho, engine='xlsxwriter') as writer:
+        df_consolidado.to_excel(writer, sheet_name='Consolidado', index=False)
+        for up in unidades:
+            df = df_consolidado[df_consolidado['UP'] == up]
+            df.drop(columns=['UP']).to_excel(writer, sheet_name=up, index=False)
+
+def exportar_depois(dados, caminho):
+    """Exportação atual: linhas gravadas uma a uma em constant_memory."""
+    df_consolidado, unidades = dados
+    exportar_excel(caminho, df_consolidado, unidades)
+
+def medir(funcao, *args):
+    """
+    Mede o tempo de execução e o pico de memória alocada de uma função.
+    
+    O tempo é medido em uma execução sem tracemalloc, para não ser distorcido
+    pelo rastreamento de alocações.
+    
+    Returns:
+        tuple: (segundos, pico de memória em MB)
+    """
+    inicio = time.perf_counter()
+    funcao(*args)
+    segundos = time.perf_counter() - inicio
+    
+    tracemalloc.start()
+    funcao(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return segundos, pico / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das estruturas de dados da extração")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10000, 50000],
+                        help="Quantidades de registros sintéticos (padrão: 10000 50000)")
+    parser.add_argument('--sem-antes', action='store_true',
+                        help="Não mede a montagem original (quadrática, lenta em 50 mil registros)")
+    args = parser.parse_args()
+    
+    print(f"{'Registros':>10} | {'Montagem':<14} | {'Tempo (s)':>10} | {'Pico (MB)':>10}")
+    print("-" * 54)
+    
+    for total in args.tamanhos:
+        registros = gerar_registros(total)
+        dados = consolidado_tratado(registros)
+        caminho = os.path.join(tempfile.mkdtemp(), 'benchmark.xlsx')
+        
+        etapas = [('depois', montar_depois), ('campos depois', preencher_depois), ('tratam. depois', tratar_depois)]
+        if not args.sem_antes:
+            etapas = [('antes', montar_antes), etapas[0], ('campos antes', preencher_antes), etapas[1],
+                      ('tratam. antes', tratar_antes), etapas[2]]
+        
+        for nome, funcao in etapas:
+            segundos, pico = medir(funcao, registros)
+            print(f"{total:>10} | {nome:<14} | {segundos:>10.2f} | {pico:>10.1f}")
+        
+        exportacoes = [('excel depois', exportar_depois)]
+        if not args.sem_antes:
+            exportacoes.insert(0, ('excel antes', exportar_antes))
+        
+        for nome, funcao in exportacoes:
+            segundos, pico = medir(funcao, dados, caminho)
+            print(f"{total:>10} | {nome:<14} | {segundos:>10.2f} | {pico:>10.1f}")
+        os.remove(caminho)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de ponta a ponta da extração contra o servidor local do Canaimé.
+
+Para cada tamanho, sobe o servidor de tests/servidor_canaime.py com N presos
+e executa o motor escolhido em um processo separado (para que o pico de
+memória seja só daquela execução), com a sessão local (sem login) e o
+Excel gravado em uma pasta temporária. Reporta presos por segundo,
+navegações por segundo (intervalos 'navegacao' de src.core.medicao), o pico
+de memória (RSS) do processo Python e do maior processo filho (navegador) e
+as divergências entre uma amostra extraída e os dados gerados pelo servidor
+(as de colunas com problema conhecido, como SENTENÇA DIAS, em uma coluna à
+parte, com a causa listada ao final).
+
+Uso:
+    python tests/benchmark_extracao.py
+    python tests/benchmark_extracao.py --tamanhos 100 1000 --motor http --conexoes 8 --latencia 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# Adicionar diretório raiz ao path para permitir importações relativas
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor_canaime import ServidorCanaime, dados_preso
+
+MOTORES = ['navegador', 'paralelo', 'http', 'processos']
+
+# Colunas extraídas tal como o servidor as gera (as demais passam pelos tratamentos finais)
+COLUNAS_CONFERIDAS = ['NOME', 'MÃE', 'CPF', 'ALA', 'CELA', 'VULGO', 'SEXO', 'RG', 'PAI', 'CIDADE', 'ALTURA',
+                      'ESCOLARIDADE', 'RELIGIÃO', 'CONDUTA', 'ESTADO CIVIL', 'CRIME', 'ARTIGO', 'PROCESSO', 'REGIME',
+                      'SENTENÇA DIAS']
+
+# Colunas com divergência já conhecida e a causa: conferidas e contadas à parte
+DIVERGENCIAS_CONHECIDAS = {
+    'SENTENÇA DIAS': "config.LOCALIZADORES usa para a coluna o mesmo seletor de ARTIGO "
+                     "(tr:nth-child(25) .titulobk~ .titulobk), então o valor extraído é o artigo",
+}
+
+class _InterfaceBenchmark:
+    """Interface sem janela: sem diálogos, sem cancelamento."""
+    
+    def atualizar_progresso(self, mensagem, percentual=None):
+        pass
+    
+    def verificar_cancelamento(self):
+        return False
+
+def pico_memoria_mb():
+    """
+    Pico de memória residente deste processo e do maior processo filho já encerrado.
+    
+    Returns:
+        tuple: (MB do processo, MB do maior filho), ou (None, None) sem o módulo resource (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    
+    # ru_maxrss em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor)
+
+def conferir_amostra(df, tamanho=50):
+    """
+    Conta os campos de uma amostra de presos que diferem dos dados gerados pelo servidor.
+    
+    Returns:
+        tuple: (divergências, divergências das colunas de DIVERGENCIAS_CONHECIDAS)
+    """
+    linhas = df.sample(min(tamanho, len(df)), random_state=0) if len(df) else df
+    divergencias = conhecidas = 0
+    for _, linha in linhas.iterrows():
+        esperado = dados_preso(linha['CÓDIGO'])
+        # Os tratamentos finais removem o sufixo ' DIAS' da sentença
+        esperado['SENTENÇA DIAS'] = esperado['SENTENÇA DIAS'].replace(' DIAS', '')
+        for coluna in COLUNAS_CONFERIDAS:
+            if str(linha[coluna]) != esperado[coluna]:
+                if coluna in DIVERGENCIAS_CONHECIDAS:
+                    conhecidas += 1
+                else:
+                    divergencias += 1
+    return divergencias, conhecidas
+
+def executar(total_presos, motor, conexoes):
+    """
+    Executa uma extração completa (processo filho) e retorna as medidas.
+    
+    Usa PAMC_URL_CANAIME e PAMC_PROVEDOR_SESSAO definidos pelo processo principal.
+    """
+    from src.core.sessao import criar_sessao
+    from src.core.medicao import obter_medicoes
+    from src.core.politica_recursos import obter_politica_recursos
+    from src.core.listar_presos_up import listar_presos_up
+    from src.core.extracao_async import listar_presos_up_paralelo
+    from src.core.extracao_http import listar_presos_up_http
+    from src.core.extracao_processos import listar_presos_up_processos
+    from src.utils.logger import configurar
+    
+    # Log só no console (exibido com --log), sem misturar o benchmark ao log da aplicação
+    configurar(arquivo=False)
+    
+    funcoes = {
+        'navegador': (listar_presos_up, {}),
+        'paralelo': (listar_presos_up_paralelo, {'num_paginas': conexoes}),
+        'http': (listar_presos_up_http, {'num_conexoes': conexoes}),
+        'processos': (listar_presos_up_processos, {'num_processos': conexoes}),
+    }
+    funcao, opcoes = funcoes[motor]
+    
+    with tempfile.TemporaryDirectory() as pasta, criar_sessao() as sessao:
+        page = sessao.obter_pagina(headless=True)
+        obter_politica_recursos().aplicar(page.context)
+        
+        inicio = time.perf_counter()
+        resultado = funcao(page, caminho_saida=os.path.join(pasta, 'presos.xlsx'), interface=_InterfaceBenchmark(), **opcoes)
+        segundos = time.perf_counter() - inicio
+        sessao.fechar()
+    
+    pico_python, pico_filhos = pico_memoria_mb()
+    divergencias, conhecidas = conferir_amostra(resultado['consolidado'])
+    navegacoes = sum(medidas['quantidade'] for medidas in obter_medicoes().latencias().values())
+    return {
+        'presos': len(resultado['consolidado']),
+        'segundos': segundos,
+        'navegacoes': navegacoes,
+        'pico_python_mb': pico_python,
+        'pico_filhos_mb': pico_filhos,
+        'divergencias': divergencias,
+        'divergencias_conhecidas': conhecidas,
+    }
+
+def medir(total_presos, args):
+    """Sobe o servidor com total_presos e executa a extração em um processo filho."""
+    with ServidorCanaime(total_presos, latencia=args.latencia / 1000, variacao_latencia=args.variacao / 1000,
+                         taxa_erros=args.taxa_erros) as servidor:
+        ambiente = {**os.environ, 'PAMC_URL_CANAIME': servidor.url_base, 'PAMC_PROVEDOR_SESSAO': 'local'}
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo_resultado = os.path.join(pasta, 'resultado.json')
+            comando = [sys.executable, os.path.abspath(__file__), '--executar', str(total_presos),
+                       '--motor', args.motor, '--conexoes', str(args.conexoes), '--resultado', arquivo_resultado]
+            saida = None if args.log else subprocess.DEVNULL
+            subprocess.run(comando, env=ambiente, stdout=saida, stderr=subprocess.STDOUT if saida else None, check=True)
+            with open(arquivo_resultado, encoding='utf-8') as arquivo:
+                return json.load(arquivo), dict(servidor.estatisticas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta da extração contra o servidor local")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Quantidades de presos (padrão: 100 1000 10000)")
+    parser.add_argument('--motor', choices=MOTORES, default='navegador', help="Motor de extração (padrão: navegador)")
+    parser.add_argument('--conexoes', type=int, default=4,
+                        help="Páginas, conexões ou processos simultâneos dos motores paralelos (padrão: 4)")
+    parser.add_argument('--latencia', type=float, default=0, help="Atraso fixo por página do servidor em ms")
+    parser.add_argument('--variacao', type=float, default=0, help="Atraso aleatório adicional por página em ms")
+    parser.add_argument('--taxa-erros', type=float, default=0, help="Fração das páginas respondidas com HTTP 503")
+    parser.add_argument('--log', action='store_true', help="Exibe o log da extração")
+    parser.add_argument('--executar', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--resultado', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.executar is not None:
+        medidas = executar(args.executar, args.motor, args.conexoes)
+        with open(args.resultado, 'w', encoding='utf-8') as arquivo:
+            json.dump(medidas, arquivo)
+        return
+    
+    print(f"Motor: {args.motor} | conexões: {args.conexoes} | latência: {args.latencia:.0f} ms "
+          f"(+{args.variacao:.0f}) | erros: {args.taxa_erros:.0%}")
+    print(f"{'Presos':>8} | {'Tempo (s)':>9} | {'Presos/s':>8} | {'Naveg./s':>8} | "
+          f"{'RSS Python (MB)':>15} | {'RSS filho (MB)':>14} | {'Erros 503':>9} | {'Diverg.':>7} | {'Conhecidas':>10}")
+    print("-" * 115)
+    
+    for total in args.tamanhos:
+        medidas, servidor = medir(total, args)
+        segundos = medidas['segundos']
+        rss_python = f"{medidas['pico_python_mb']:.0f}" if medidas['pico_python_mb'] is not None else '-'
+        rss_filhos = f"{medidas['pico_filhos_mb']:.0f}" if medidas['pico_filhos_mb'] is not None else '-'
+        print(f"{medidas['presos']:>8} | {segundos:>9.1f} | {medidas['presos'] / segundos:>8.1f} | "
+              f"{medidas['navegacoes'] / segundos:>8.1f} | {rss_python:>15} | {rss_filhos:>14} | "
+              f"{servidor['erros_injetados']:>9} | {medidas['divergencias']:>7} | {medidas['divergencias_conhecidas']:>10}")
+    
+    print("\nDivergências conhecidas (coluna 'Conhecidas'):")
+    for coluna, causa in DIVERGENCIAS_CONHECIDAS.items():
+        print(f"  {coluna}: {causa}")
+
+if __name__ == "__main__":
+    main()
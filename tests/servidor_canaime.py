@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Servidor local que imita as páginas do Canaimé usadas pela extração.
+
+Gera, para N presos sintéticos distribuídos entre as unidades de
+config.UNIDADES_PRISIONAIS, a página da unidade (lista com fotos) e as cinco
+páginas de detalhes com o HTML esperado por config.SELETORES_LISTA_PRESOS,
+config.LOCALIZADORES e config.ROTULOS: cada campo fica na linha da tabela
+usada pelo seletor posicional e precedido pelo seu rótulo. Os dados de cada
+preso são determinísticos (dados_preso), então a extração pode ser conferida
+com o que o servidor gerou.
+
+Opções para testes de desempenho e de falhas: latência fixa e variável por
+requisição, fração de requisições respondidas com HTTP 503 e redirecionamento
+para a tela de login após um número de páginas (sessão expirada).
+
+Uso:
+    python tests/servidor_canaime.py --presos 1000 --porta 8765 --latencia 50
+    
+    # Em outro terminal, extração contra o servidor local, sem login
+    PAMC_URL_CANAIME=http://127.0.0.1:8765 PAMC_PROVEDOR_SESSAO=local python run.py
+"""
+
+import os
+import sys
+import time
+import html
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Adicionar diretório raiz ao path para permitir importações relativas
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import config
+
+# Caminhos das páginas (iguais para qualquer PAMC_URL_CANAIME)
+CAMINHO_UNIDADE = urlsplit(config.URL_UNIDADE).path
+CAMINHOS_DETALHES = {urlsplit(url).path: chave for url, chave in config.URL_PARA_CHAVE.items()}
+CAMINHO_LOGIN = '/' + config.TRECHO_URL_LOGIN
+CAMINHO_FOTOS = urlsplit(config.INICIO_URL_FOTOS).path
+
+# Recursos estáticos referenciados pelas páginas (exercitam a política de recursos)
+ESTATICOS = {
+    '/sgp2rr/css/estilo.css': ('text/css', b'.titulobk { font-weight: bold; }\n'),
+    '/sgp2rr/js/funcoes.js': ('text/javascript', b'function imprimir() { window.print(); }\n'),
+}
+
+CODIGO_INICIAL = 100000
+
+NOMES_MASCULINOS = ['JOSE', 'JOAO', 'ANTONIO', 'FRANCISCO', 'CARLOS', 'PAULO', 'PEDRO', 'LUCAS', 'MARCOS', 'RAIMUNDO']
+NOMES_FEMININOS = ['MARIA', 'ANA', 'FRANCISCA', 'ANTONIA', 'ADRIANA', 'JULIANA', 'MARCIA', 'FERNANDA']
+SOBRENOMES = ['DA SILVA', 'DOS SANTOS', 'PEREIRA', 'ALVES', 'FERREIRA', 'RODRIGUES', 'LIMA', 'GOMES',
+              'COSTA', 'RIBEIRO', 'MARTINS', 'CARVALHO', 'ALMEIDA', 'LOPES', 'SOUSA', 'MAKUXI', 'WAPIXANA']
+CIDADES = [('BOA VISTA', 'RR'), ('RORAINÓPOLIS', 'RR'), ('CARACARAÍ', 'RR'), ('MANAUS', 'AM'), ('BELÉM', 'PA')]
+CRIMES = [('ROUBO', 'ART. 157'), ('FURTO', 'ART. 155'), ('TRÁFICO DE DROGAS', 'ART. 33'),
+          ('HOMICÍDIO', 'ART. 121'), ('RECEPTAÇÃO', 'ART. 180')]
+LANCAMENTOS = ['INCLUSÃO NA UNIDADE', 'TRANSFERÊNCIA DE ALA', 'AUDIÊNCIA REALIZADA', 'ATENDIMENTO JURÍDICO']
+
+def _data(rng, ano_inicial, ano_final):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(ano_inicial, ano_final)}"
+
+def _nome(rng, nomes):
+    return f"{rng.choice(nomes)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+def dados_preso(codigo):
+    """
+    Dados sintéticos de um preso, sempre os mesmos para o mesmo código.
+    
+    Args:
+        codigo: Código (id_cad_preso) do preso
+    
+    Returns:
+        dict: Valores de cada coluna como aparecem nas páginas (SENTENÇA DIAS com o sufixo ' DIAS')
+    """
+    rng = random.Random(int(codigo))
+    cidade, estado = rng.choice(CIDADES)
+    crime, artigo = rng.choice(CRIMES)
+    sexo = rng.choice(['MASCULINO', 'FEMININO'])
+    condenado = rng.random() < 0.6
+    lancamentos = [(_data(rng, 2018, 2024), rng.choice(LANCAMENTOS)) for _ in range(rng.randint(1, 4))]
+    
+    return {
+        'CÓDIGO': str(codigo),
+        'NOME': _nome(rng, NOMES_MASCULINOS if sexo == 'MASCULINO' else NOMES_FEMININOS),
+        'MÃE': _nome(rng, NOMES_FEMININOS),
+        'PAI': _nome(rng, NOMES_MASCULINOS),
+        'CPF': f"{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}.{rng.randint(0, 999):03d}-{rng.randint(0, 99):02d}",
+        'ALA': f"ALA {rng.choice('ABCDE')}",
+        'CELA': str(rng.randint(1, 40)),
+        'VULGO': rng.choice(['', 'NEGO', 'GALEGO', 'BAIXINHO', 'MAGRÃO']),
+        'SEXO': sexo,
+        'DATA NASC.': _data(rng, 1960, 2004),
+        'RG': str(rng.randint(100000, 999999)),
+        'ENDEREÇO': f"RUA {rng.randint(1, 90)}, Nº {rng.randint(1, 2000)}",
+        'CIDADE': cidade,
+        'ESTADO': estado,
+        'PAÍS': 'BRASIL',
+        'ALTURA': f"1,{rng.randint(50, 95)}",
+        'COR / ETNIA': rng.choice(['PARDA', 'BRANCA', 'PRETA', 'INDÍGENA']),
+        'QTD FILHOS': str(rng.randint(0, 6)),
+        'ESCOLARIDADE': rng.choice(['FUNDAMENTAL INCOMPLETO', 'FUNDAMENTAL COMPLETO', 'MÉDIO COMPLETO']),
+        'PROFISSÃO': rng.choice(['PEDREIRO', 'AUTÔNOMO', 'AGRICULTOR', 'MOTORISTA', 'DESEMPREGADO']),
+        'RELIGIÃO': rng.choice(['CATÓLICA', 'EVANGÉLICA', 'SEM RELIGIÃO']),
+        'MODUS OPERANDI': rng.choice(['ARMA DE FOGO', 'ARMA BRANCA', 'SEM ARMA']),
+        'ESTADO CIVIL': rng.choice(['SOLTEIRO', 'CASADO', 'UNIÃO ESTÁVEL']),
+        'DATA PRISÃO': _data(rng, 2010, 2024),
+        'DOM. CRIMINAL': cidade,
+        'CONDENADO?': 'SIM' if condenado else 'NÃO',
+        'CRIME': crime,
+        'ARTIGO': artigo,
+        'PROCESSO': f"0{rng.randint(800000, 899999)}-{rng.randint(10, 99)}.{rng.randint(2010, 2024)}.8.23.0010",
+        'REU': rng.choice(['PRIMÁRIO', 'REINCIDENTE']),
+        'REGIME': rng.choice(['FECHADO', 'SEMIABERTO']) if condenado else 'PROVISÓRIO',
+        'SENTENÇA DIAS': f"{rng.randint(180, 9000) if condenado else 0} DIAS",
+        'CONDUTA': rng.choice(['BOA', 'ÓTIMA', 'REGULAR', 'MÁ']),
+        'DATA ÚLTIMO LANÇAMENTO': lancamentos[-1][0],
+        'ÚLTIMO LANÇAMENTO': lancamentos[-1][1],
+        '_LANCAMENTOS': lancamentos,
+    }
+
+def _par(rotulo, valor):
+    """Células de um campo: rótulo seguido do valor em .titulobk."""
+    return f'<td>{html.escape(rotulo)}:</td><td class="titulobk">{html.escape(valor)}</td>'
+
+def _tabela(linhas, total_linhas):
+    """Tabela com as células de cada linha (1-based, como o tr:nth-child) e as demais vazias."""
+    return '<table>' + ''.join(f"<tr>{linhas.get(i, '<td>&nbsp;</td>')}</tr>" for i in range(1, total_linhas + 1)) + '</table>'
+
+def _pagina(titulo, corpo):
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{html.escape(titulo)}</title>'
+        '<link rel="stylesheet" href="/sgp2rr/css/estilo.css"><script src="/sgp2rr/js/funcoes.js"></script>'
+        f'</head><body>{corpo}</body></html>'
+    )
+
+def pagina_unidade(up, codigos):
+    """Página da unidade: um bloco com foto e container .titulobkSingCAPS por preso."""
+    blocos = []
+    for codigo in codigos:
+        d = dados_preso(codigo)
+        texto = '\n'.join([f"Nº{codigo}", d['NOME'], f"M E: {d['MÃE']}", f"CPF: {d['CPF']}", f"ALA: {d['ALA']} / {d['CELA']}"])
+        blocos.append(
+            f'<table><tr><td><img src="../../fotos/presos/{codigo}.jpg"></td>'
+            f'<td><div class="titulobkSingCAPS">{html.escape(texto)}</div></td></tr></table>'
+        )
+    return _pagina(f"Chamada com fotos - {up}", ''.join(blocos))
+
+def pagina_detalhes(chave_url, codigo):
+    """Página de detalhes da família chave_url (chave de config.LOCALIZADORES) para um preso."""
+    d = dados_preso(codigo)
+    
+    if chave_url == 'URL_FICHA_PRESO':
+        corpo = _tabela({1: _par('NOME', d['NOME']), 4: _par('VULGO', d['VULGO'])}, 8)
+    
+    elif chave_url == 'URL_CADASTRO':
+        corpo = _tabela({
+            1: _par('NOME', d['NOME']),
+            4: _par('PAI', d['PAI']),
+            5: _par('SEXO', d['SEXO']) + _par('DATA NASC.', d['DATA NASC.']),
+            8: _par('CIDADE', d['CIDADE']),
+            9: _par('ESTADO', d['ESTADO']),
+            10: _par('PAÍS', d['PAÍS']),
+            13: _par('RG', d['RG']) + _par('ÓRGÃO EXPEDIDOR', 'SSP/RR'),
+            24: _par('ENDEREÇO', d['ENDEREÇO']),
+        }, 26)
+    
+    elif chave_url == 'URL_INFORMES':
+        filhos = html.escape(d['QTD FILHOS'])
+        corpo = _tabela({
+            4: _par('ESCOLARIDADE', d['ESCOLARIDADE']),
+            # Três valores seguidos (seletor '.titulobk~ .titulobk+ .titulobk')
+            6: f'<td>QTD FILHOS:</td><td class="titulobk">{filhos}</td><td class="titulobk"></td><td class="titulobk">{filhos}</td>',
+            8: _par('RELIGIÃO', d['RELIGIÃO']),
+            11: _par('PROFISSÃO', d['PROFISSÃO']),
+            16: _par('COR / ETNIA', d['COR / ETNIA']),
+            19: f'<td class="tituloVerde">ALTURA: <span class="titulobk">{html.escape(d["ALTURA"])}</span></td>',
+            25: _par('MODUS OPERANDI', d['MODUS OPERANDI']),
+        }, 26)
+    
+    elif chave_url == 'URL_CERTIDAO_CARCERARIA':
+        # Segunda tabela: um lançamento por linha e a conduta ao final (seletores com o último elemento)
+        lancamentos = ''.join(
+            f'<tr><td>{i}</td><td class="titulobk">{html.escape(data)}</td>'
+            f'<td class="titulobk"><div>{html.escape(texto)}</div></td></tr>'
+            for i, (data, texto) in enumerate(d['_LANCAMENTOS'], start=1)
+        )
+        corpo = (
+            _tabela({1: '<td>CERTIDÃO CARCERÁRIA</td>', 2: _par('NOME', d['NOME'])}, 2)
+            + f'<table>{lancamentos}<tr><td>CONDUTA:</td><td><span class="titulobk">{html.escape(d["CONDUTA"])}</span></td></tr></table>'
+        )
+    
+    elif chave_url == 'URL_FICHA_CARCERARIA':
+        corpo = _tabela({
+            1: _par('NOME', d['NOME']),
+            11: _par('ESTADO CIVIL', d['ESTADO CIVIL']),
+            25: _par('DATA PRISÃO', d['DATA PRISÃO']) + _par('ARTIGO', d['ARTIGO']) + _par('SENTENÇA DIAS', d['SENTENÇA DIAS']),
+            26: _par('DOM. CRIMINAL', d['DOM. CRIMINAL']),
+            27: _par('CRIME', d['CRIME']),
+            28: _par('CONDENADO?', d['CONDENADO?']) + _par('REGIME', d['REGIME']),
+            30: _par('PROCESSO', d['PROCESSO']),
+            31: _par('VARA', '1ª VARA CRIMINAL') + _par('RÉU', d['REU']),
+        }, 32)
+    
+    else:
+        raise KeyError(chave_url)
+    
+    return _pagina(chave_url, corpo)
+
+class ServidorCanaime:
+    """
+    Servidor HTTP local com as páginas do Canaimé, executado em uma thread.
+    
+    Uso:
+        with ServidorCanaime(1000, latencia=0.05) as servidor:
+            os.environ['PAMC_URL_CANAIME'] = servidor.url_base
+    """
+    
+    def __init__(self, total_presos, porta=0, latencia=0.0, variacao_latencia=0.0, taxa_erros=0.0,
+                 expirar_apos=None, semente=0):
+        """
+        Args:
+            total_presos: Quantidade de presos, distribuídos entre config.UNIDADES_PRISIONAIS
+            porta: Porta local (0 escolhe uma porta livre)
+            latencia: Atraso fixo de cada página, em segundos
+            variacao_latencia: Atraso adicional aleatório (0 até o valor), em segundos
+            taxa_erros: Fração das páginas respondidas com HTTP 503
+            expirar_apos: Se informado, as páginas após esse número redirecionam para a tela de login
+            semente: Semente do sorteio da latência e dos erros
+        """
+        self.latencia = latencia
+        self.variacao_latencia = variacao_latencia
+        self.taxa_erros = taxa_erros
+        self.expirar_apos = expirar_apos
+        self._rng = random.Random(semente)
+        self._trava = threading.Lock()
+        self.estatisticas = {'paginas': 0, 'erros_injetados': 0, 'redirecionamentos_login': 0}
+        
+        unidades = config.UNIDADES_PRISIONAIS
+        self.presos_unidade = {up: [] for up in unidades}
+        for i in range(total_presos):
+            self.presos_unidade[unidades[i % len(unidades)]].append(CODIGO_INICIAL + i)
+        self.codigos = {codigo for codigos in self.presos_unidade.values() for codigo in codigos}
+        
+        servidor = self
+        
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor._responder(self)
+            
+            def log_message(self, formato, *args):
+                pass
+        
+        self._http = ThreadingHTTPServer(('127.0.0.1', porta), Manipulador)
+        self._http.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url_base(self):
+        """Endereço para PAMC_URL_CANAIME."""
+        return f"http://127.0.0.1:{self._http.server_address[1]}"
+    
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+    
+    def __enter__(self):
+        return self.iniciar()
+    
+    def __exit__(self, *exc):
+        self.parar()
+    
+    def _sortear(self):
+        """Sorteia (atraso, erro injetado) de uma página."""
+        with self._trava:
+            self.estatisticas['paginas'] += 1
+            expirada = self.expirar_apos is not None and self.estatisticas['paginas'] > self.expirar_apos
+            atraso = self.latencia + self._rng.uniform(0, self.variacao_latencia)
+            erro = self._rng.random() < self.taxa_erros
+            if expirada:
+                self.estatisticas['redirecionamentos_login'] += 1
+            elif erro:
+                self.estatisticas['erros_injetados'] += 1
+        return atraso, erro, expirada
+    
+    def _enviar(self, manipulador, status, corpo=b'', tipo='text/html; charset=utf-8', cabecalhos=None):
+        manipulador.send_response(status)
+        manipulador.send_header('Content-Type', tipo)
+        manipulador.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            manipulador.send_header(nome, valor)
+        manipulador.end_headers()
+        manipulador.wfile.write(corpo)
+    
+    def _responder(self, manipulador):
+        url = urlsplit(manipulador.path)
+        parametros = parse_qs(url.query)
+        
+        if url.path in ESTATICOS:
+            tipo, corpo = ESTATICOS[url.path]
+            self._enviar(manipulador, 200, corpo, tipo, {'Cache-Control': 'max-age=86400'})
+            return
+        if url.path.startswith(CAMINHO_FOTOS):
+            self._enviar(manipulador, 404)
+            return
+        if url.path.startswith(CAMINHO_LOGIN):
+            self._enviar(manipulador, 200, _pagina('Login', '<form><input name="usuario"></form>').encode('utf-8'))
+            return
+        
+        atraso, erro, expirada = self._sortear()
+        if atraso:
+            time.sleep(atraso)
+        if expirada:
+            self._enviar(manipulador, 302, cabecalhos={'Location': CAMINHO_LOGIN})
+            return
+        if erro:
+            self._enviar(manipulador, 503, b'Servico indisponivel')
+            return
+        
+        if url.path == CAMINHO_UNIDADE:
+            up = parametros.get('id_und_prisional', [''])[0]
+            if up not in self.presos_unidade:
+                self._enviar(manipulador, 404)
+                return
+            self._enviar(manipulador, 200, pagina_unidade(up, self.presos_unidade[up]).encode('utf-8'))
+            return
+        
+        chave_url = CAMINHOS_DETALHES.get(url.path)
+        codigo = parametros.get('id_cad_preso', [''])[0]
+        if chave_url is None or not codigo.isdigit() or int(codigo) not in self.codigos:
+            self._enviar(manipulador, 404)
+            return
+        self._enviar(manipulador, 200, pagina_detalhes(chave_url, int(codigo)).encode('utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local com as páginas do Canaimé para testes")
+    parser.add_argument('--presos', type=int, default=1000, help="Quantidade de presos (padrão: 1000)")
+    parser.add_argument('--porta', type=int, default=8765, help="Porta local (padrão: 8765)")
+    parser.add_argument('--latencia', type=float, default=0, help="Atraso fixo por página em ms")
+    parser.add_argument('--variacao', type=float, default=0, help="Atraso aleatório adicional por página em ms")
+    parser.add_argument('--taxa-erros', type=float, default=0, help="Fração das páginas respondidas com HTTP 503")
+    parser.add_argument('--expirar-apos', type=int, help="Redireciona para o login após esse número de páginas")
+    args = parser.parse_args()
+    
+    servidor = ServidorCanaime(
+        args.presos,
+        porta=args.porta,
+        latencia=args.latencia / 1000,
+        variacao_latencia=args.variacao / 1000,
+        taxa_erros=args.taxa_erros,
+        expirar_apos=args.expirar_apos
+    )
+    print(f"Servidor do Canaimé em {servidor.url_base} com {args.presos} presos (Ctrl+C para encerrar)")
+    print(f"PAMC_URL_CANAIME={servidor.url_base} PAMC_PROVEDOR_SESSAO=local python run.py")
+    try:
+        servidor.iniciar()._thread.join()
+    except KeyboardInterrupt:
+        servidor.parar()
+
+if __name__ == "__main__":
+    main()